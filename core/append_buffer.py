@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# 容量不足时按该倍数扩大
+GROWTH_FACTOR = 1.5
+
+
+def _codes_dtype(n_categories):
+    """pandas为分类编码选择的整数类型（与类别数有关）"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+class _ArrayColumn:
+    """预留容量的NumPy数组，新值写入末尾"""
+
+    def __init__(self, values):
+        values = np.asarray(values)
+        self.buffer = np.empty(max(int(len(values) * GROWTH_FACTOR), 16), dtype=values.dtype)
+        self.buffer[:len(values)] = values
+        self.size = len(values)
+
+    def append(self, values):
+        """追加一批值；类型无法安全转换时返回False"""
+        values = np.asarray(values)
+        if values.dtype != self.buffer.dtype:
+            if not np.can_cast(values.dtype, self.buffer.dtype, 'safe'):
+                return False
+            values = values.astype(self.buffer.dtype)
+        needed = self.size + len(values)
+        if needed > len(self.buffer):
+            # 旧数组不修改，之前返回的视图仍然有效
+            buffer = np.empty(max(int(needed * GROWTH_FACTOR), 16), dtype=self.buffer.dtype)
+            buffer[:self.size] = self.buffer[:self.size]
+            self.buffer = buffer
+        self.buffer[self.size:needed] = values
+        self.size = needed
+        return True
+
+    def view(self):
+        return self.buffer[:self.size]
+
+
+class _NumpyColumn:
+    """NumPy类型的列（数值、布尔、日期时间、object）"""
+
+    def __init__(self, series):
+        self.dtype = series.dtype
+        self.values = _ArrayColumn(series.to_numpy())
+
+    def append(self, series):
+        return self.values.append(series.to_numpy())
+
+    def array(self):
+        return self.values.view()
+
+
+class _CategoricalColumn:
+    """分类列：只追加编码，新出现的值加到类别末尾（已有编码不变）"""
+
+    def __init__(self, series):
+        self.dtype = series.dtype
+        self.codes = _ArrayColumn(series.cat.codes.to_numpy())
+
+    def append(self, series):
+        values = series.dropna().unique()
+        missing = [value for value in values if value not in self.dtype.categories]
+        if missing:
+            self.dtype = pd.CategoricalDtype(self.dtype.categories.append(pd.Index(missing)),
+                                             self.dtype.ordered)
+        codes = pd.Categorical(series, dtype=self.dtype).codes
+        codes_dtype = _codes_dtype(len(self.dtype.categories))
+        if codes_dtype != self.codes.buffer.dtype:
+            # 类别数超过编码类型的范围，换用更宽的编码（很少发生）
+            self.codes = _ArrayColumn(self.codes.view().astype(codes_dtype))
+        return self.codes.append(codes.astype(codes_dtype))
+
+    def array(self):
+        return pd.Categorical.from_codes(self.codes.view(), dtype=self.dtype, validate=False)
+
+
+class _ChunkedColumn:
+    """pyarrow类型的列（包括pyarrow存储的字符串列）：按块保存
+
+    追加后合并大小相近的末尾块，块数保持在对数级别，每个值被合并的次数也是对数级别。
+    """
+
+    def __init__(self, series):
+        self.dtype = series.dtype
+        self.chunks = _arrow_chunks(series)
+
+    def append(self, series):
+        if series.dtype != self.dtype:
+            try:
+                series = series.astype(self.dtype)
+            except (TypeError, ValueError):
+                return False
+        self.chunks.extend(_arrow_chunks(series))
+        while len(self.chunks) > 1 and len(self.chunks[-2]) <= 2 * len(self.chunks[-1]):
+            last = self.chunks.pop()
+            self.chunks[-1] = pa.concat_arrays([self.chunks[-1], last])
+        return True
+
+    def array(self):
+        return pd.array(pa.chunked_array(self.chunks, type=self.chunks[0].type), dtype=self.dtype)
+
+
+def _arrow_chunks(series):
+    """列的pyarrow数组块（不复制）"""
+    values = pa.array(series.array)
+    if isinstance(values, pa.ChunkedArray):
+        return [chunk for chunk in values.chunks if len(chunk)] or [pa.array([], type=values.type)]
+    return [values]
+
+
+class _ConcatColumn:
+    """其他扩展类型的列：每次追加时整列拼接"""
+
+    def __init__(self, series):
+        self.dtype = series.dtype
+        self.series = series.reset_index(drop=True)
+
+    def append(self, series):
+        self.series = pd.concat([self.series, series.reset_index(drop=True)], ignore_index=True)
+        return True
+
+    def array(self):
+        return self.series.array
+
+
+def _make_column(series):
+    """按列的类型选择存储方式"""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return _CategoricalColumn(series)
+    if isinstance(dtype, np.dtype):
+        return _NumpyColumn(series)
+    if HAS_PYARROW and isinstance(series.array, pd.arrays.ArrowExtensionArray):
+        return _ChunkedColumn(series)
+    return _ConcatColumn(series)
+
+
+class AppendBuffer:
+    """跟踪模式下按列追加行的数据缓冲区
+
+    NumPy类型的列和分类列的编码保存在预留容量的数组中，容量不足时按倍数扩大；
+    pyarrow类型的列按块保存。每次追加后返回的DataFrame直接引用这些数组（不复制），
+    追加的开销只与新增的行数有关（均摊），而不是与总行数有关。
+    """
+
+    def __init__(self, data):
+        self.columns = data.columns
+        self.n_rows = len(data)
+        self._columns = [_make_column(data.iloc[:, position]) for position in range(data.shape[1])]
+        # 默认的行号索引不需要保存
+        self._index = None
+        if not data.index.equals(pd.RangeIndex(len(data))):
+            self._index = _ArrayColumn(data.index.to_numpy())
+
+    def append(self, frame):
+        """追加新行（列与数据一致），返回包含全部行的DataFrame"""
+        start = self.n_rows
+        for position, column in enumerate(self._columns):
+            series = frame.iloc[:, position]
+            if not column.append(series):
+                # 新值的类型与已有的列不兼容（如整数列出现缺失值）：整列拼接后重新建立存储
+                current = pd.Series(column.array(), copy=False)
+                combined = pd.concat([current, series.reset_index(drop=True)], ignore_index=True)
+                self._columns[position] = _make_column(combined)
+        self.n_rows = start + len(frame)
+        if self._index is not None:
+            self._index.append(np.arange(start, self.n_rows))
+        return self.frame()
+
+    def frame(self):
+        """由各列的当前数组构建DataFrame（不复制数据）"""
+        index = pd.RangeIndex(self.n_rows) if self._index is None else pd.Index(self._index.view())
+        arrays = {position: column.array() for position, column in enumerate(self._columns)}
+        data = pd.DataFrame(arrays, index=index, copy=False)
+        data.columns = self.columns
+        return data
@@ -0,0 +1,111 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# 分块处理的行数，临时数组的大小与该值成正比而不是与总行数成正比
+BIN_CHUNK_ROWS = 1_000_000
+
+
+def cell_indices(x, y, x_range, y_range, width, height):
+    """计算每个点落入的网格单元（按行展开的一维编号）
+
+    Returns:
+        (np.ndarray, np.ndarray): 单元编号，以及范围内有效点的布尔掩码
+    """
+    x0, x1 = x_range
+    y0, y1 = y_range
+    # 先换算为以单元为单位的坐标；NaN的比较结果为False，不需要单独检查
+    fx = (x - x0) * (width / ((x1 - x0) or 1.0))
+    fy = (y - y0) * (height / ((y1 - y0) or 1.0))
+    valid = (fx >= 0) & (fx <= width) & (fy >= 0) & (fy <= height)
+    ix = fx[valid].astype(np.intp)
+    iy = fy[valid].astype(np.intp)
+    # 上边界上的点归入最后一个单元
+    np.minimum(ix, width - 1, out=ix)
+    np.minimum(iy, height - 1, out=iy)
+    return iy * width + ix, valid
+
+
+def _accumulate(x, y, x_range, y_range, width, height, values):
+    """单个分块的计数和加权和"""
+    size = width * height
+    cells, valid = cell_indices(x, y, x_range, y_range, width, height)
+    counts = np.bincount(cells, minlength=size).astype(np.float64)
+    sums = None
+    if values is not None:
+        chunk_values = values[valid]
+        finite = np.isfinite(chunk_values)
+        sums = np.bincount(cells[finite], weights=chunk_values[finite], minlength=size)
+    return counts, sums
+
+
+def default_workers():
+    """分块累加使用的线程数"""
+    return min(8, os.cpu_count() or 1)
+
+
+def aggregate(x, y, x_range, y_range, width, height, values=None, how='count',
+              chunk_rows=BIN_CHUNK_ROWS, workers=None):
+    """把散点聚合到 height x width 的网格
+
+    数据按chunk_rows分块，用一维单元编号的bincount累加；分块数多于一个时
+    由多个线程并行计算（numpy的逐元素运算会释放GIL），各线程的网格最后相加。
+
+    Args:
+        x, y: float64数组
+        x_range, y_range: (下限, 上限)
+        width, height: int, 网格大小（通常等于绘图区域的像素大小）
+        values: 与点对应的数值，how为'sum'或'mean'时使用
+        how: 'count'、'sum' 或 'mean'
+        workers: int, 线程数；为None时按CPU核数确定
+
+    Returns:
+        np.ndarray: 形状为 (height, width) 的网格；'mean'时空单元为NaN
+    """
+    size = width * height
+    counts = np.zeros(size, dtype=np.float64)
+    sums = np.zeros(size, dtype=np.float64) if how != 'count' else None
+    if how == 'count':
+        values = None
+
+    starts = range(0, len(x), chunk_rows)
+    tasks = [(x[start:start + chunk_rows], y[start:start + chunk_rows], x_range, y_range,
+              width, height, None if values is None else values[start:start + chunk_rows])
+             for start in starts]
+    workers = default_workers() if workers is None else workers
+    if workers > 1 and len(tasks) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            results = list(executor.map(lambda task: _accumulate(*task), tasks))
+    else:
+        results = (_accumulate(*task) for task in tasks)
+
+    for chunk_counts, chunk_sums in results:
+        counts += chunk_counts
+        if sums is not None:
+            sums += chunk_sums
+
+    if how == 'count':
+        return counts.reshape(height, width)
+    if how == 'sum':
+        return sums.reshape(height, width)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(counts > 0, sums / counts, np.nan)
+    return mean.reshape(height, width)
+
+
+def data_range(values, lower=None, upper=None):
+    """确定聚合范围：优先使用给定的上下限，否则使用有限值的极值"""
+    if lower is not None and upper is not None and lower != upper:
+        return min(lower, upper), max(lower, upper)
+    if len(values) == 0:
+        return 0.0, 1.0
+    # fmin/fmax忽略NaN，不需要复制有效值；只有含无穷大时才过滤
+    lo, hi = float(np.fmin.reduce(values)), float(np.fmax.reduce(values))
+    if not (np.isfinite(lo) and np.isfinite(hi)):
+        finite = values[np.isfinite(values)]
+        if len(finite) == 0:
+            return 0.0, 1.0
+        lo, hi = float(finite.min()), float(finite.max())
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    return lo, hi
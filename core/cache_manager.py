@@ -0,0 +1,167 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  仅用于检测是否可用
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+class DataCache:
+    """已解析数据的二进制缓存
+
+    以文件路径、修改时间、大小和分隔符为键，把解析后的DataFrame保存为
+    Feather列式格式（未安装pyarrow时退回pickle），总大小超过上限时
+    按最近最少使用的顺序淘汰。
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=2 * 1024 ** 3):
+        self.logger = logging.getLogger("PlotData.DataCache")
+        self.cache_dir = cache_dir or os.path.join(os.path.expanduser("~"), ".plotdata", "cache")
+        self.index_file = os.path.join(self.cache_dir, "index.json")
+        self.max_bytes = max_bytes
+        self.format = 'feather' if HAS_PYARROW else 'pickle'
+        self._lock = threading.Lock()
+        self.index = {}
+
+        self._ensure_cache_dir()
+        self._load_index()
+
+    def _ensure_cache_dir(self):
+        """确保缓存目录存在"""
+        if not os.path.exists(self.cache_dir):
+            try:
+                os.makedirs(self.cache_dir)
+                self.logger.info(f"创建缓存目录: {self.cache_dir}")
+            except Exception as e:
+                self.logger.error(f"创建缓存目录失败: {str(e)}")
+
+    def _load_index(self):
+        """加载缓存索引，并丢弃数据文件已不存在的条目"""
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    self.index = json.load(f)
+            except Exception as e:
+                self.logger.error(f"加载缓存索引失败: {str(e)}")
+                self.index = {}
+        self.index = {
+            key: entry for key, entry in self.index.items()
+            if os.path.exists(os.path.join(self.cache_dir, entry['file']))
+        }
+
+    def _save_index(self):
+        """保存缓存索引"""
+        try:
+            with open(self.index_file, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f, ensure_ascii=False, indent=4)
+        except Exception as e:
+            self.logger.error(f"保存缓存索引失败: {str(e)}")
+
+    def make_key(self, file_path, sep=None, snapshot=None):
+        """根据文件路径、修改时间、大小和分隔符生成缓存键
+
+        Args:
+            snapshot: dict, 包含size和mtime_ns的文件状态（如解析之前记录的file_snapshot）；
+                为None时使用文件当前的状态
+        """
+        if snapshot is None:
+            stat = os.stat(file_path)
+            snapshot = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        raw = f"{os.path.abspath(file_path)}|{snapshot['mtime_ns']}|{snapshot['size']}|{sep}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, file_path, sep=None, snapshot=None):
+        """读取缓存的数据，未命中时返回None"""
+        with self._lock:
+            key = self.make_key(file_path, sep, snapshot)
+            entry = self.index.get(key)
+            if entry is None:
+                return None
+
+            cache_path = os.path.join(self.cache_dir, entry['file'])
+            try:
+                if entry['format'] == 'feather':
+                    data = pd.read_feather(cache_path)
+                else:
+                    data = pd.read_pickle(cache_path)
+            except Exception as e:
+                self.logger.warning(f"读取缓存失败，将重新解析: {str(e)}")
+                self._remove(key)
+                self._save_index()
+                return None
+
+            entry['last_access'] = time.time()
+            self._save_index()
+            return data
+
+    def put(self, file_path, data, sep=None, snapshot=None):
+        """写入缓存，并按LRU策略淘汰超出容量的条目
+
+        snapshot应是解析之前记录的文件状态：解析期间文件被追加时，
+        缓存键仍对应已解析的内容，之后打开变大的文件不会命中不完整的数据。
+        """
+        with self._lock:
+            key = self.make_key(file_path, sep, snapshot)
+            ext = 'feather' if self.format == 'feather' else 'pkl'
+            file_name = f"{key}.{ext}"
+            cache_path = os.path.join(self.cache_dir, file_name)
+            try:
+                if self.format == 'feather':
+                    # Feather要求默认索引和字符串列名
+                    frame = data.reset_index(drop=True)
+                    frame.columns = [str(col) for col in frame.columns]
+                    frame.to_feather(cache_path)
+                else:
+                    data.to_pickle(cache_path)
+            except Exception as e:
+                self.logger.warning(f"写入缓存失败: {str(e)}")
+                if os.path.exists(cache_path):
+                    os.remove(cache_path)
+                return False
+
+            self.index[key] = {
+                'file': file_name,
+                'format': self.format,
+                'source': os.path.abspath(file_path),
+                'size': os.path.getsize(cache_path),
+                'last_access': time.time()
+            }
+            self._evict()
+            self._save_index()
+            return True
+
+    def _remove(self, key):
+        """删除一个缓存条目"""
+        entry = self.index.pop(key, None)
+        if entry is None:
+            return
+        cache_path = os.path.join(self.cache_dir, entry['file'])
+        try:
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+        except Exception as e:
+            self.logger.error(f"删除缓存文件失败: {str(e)}")
+
+    def _evict(self):
+        """按最近访问时间淘汰条目，直到总大小不超过上限"""
+        total = sum(entry['size'] for entry in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            total -= self.index[key]['size']
+            self.logger.info(f"淘汰缓存: {self.index[key]['source']}")
+            self._remove(key)
+
+    def clear(self):
+        """清空所有缓存"""
+        with self._lock:
+            for key in list(self.index):
+                self._remove(key)
+            self._save_index()
@@ -0,0 +1,140 @@
+import os
+import logging
+import numpy as np
+import pandas as pd
+
+from core.data_loader import resolve_delimiter, select_engine, text_read_kwargs
+
+logger = logging.getLogger("PlotData.ChunkedSource")
+
+
+class ColumnAccumulator:
+    """单列的流式统计量累加器（计数、极值、均值和方差）"""
+
+    def __init__(self):
+        self.count = 0
+        self.na_count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+
+    def add(self, values):
+        """累加一批数值（NaN计入空值数）"""
+        values = np.asarray(values, dtype=np.float64)
+        valid = values[~np.isnan(values)]
+        self.na_count += len(values) - len(valid)
+        if len(valid) == 0:
+            return
+
+        # 使用并行合并公式更新均值和二阶矩，避免大数相减的精度损失
+        n = len(valid)
+        mean = valid.mean()
+        m2 = ((valid - mean) ** 2).sum()
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.count * n / total
+        self.count = total
+
+        self.min = np.nanmin([self.min, valid.min()])
+        self.max = np.nanmax([self.max, valid.max()])
+
+    @property
+    def std(self):
+        """样本标准差"""
+        if self.count < 2:
+            return np.nan
+        return np.sqrt(self.m2 / (self.count - 1))
+
+
+def bottom_k_sample(sample, keys, chunk, chunk_keys, k):
+    """合并样本与新数据块，保留随机键最小的k行（均匀无放回抽样）"""
+    if sample is None:
+        merged, merged_keys = chunk, chunk_keys
+    else:
+        merged = pd.concat([sample, chunk])
+        merged_keys = np.concatenate([keys, chunk_keys])
+
+    if len(merged) <= k:
+        return merged, merged_keys
+
+    keep = np.argpartition(merged_keys, k - 1)[:k]
+    return merged.iloc[keep], merged_keys[keep]
+
+
+class ChunkedSource:
+    """按数据块读取大文本文件的数据源，只保留有限的工作集"""
+
+    def __init__(self, file_path, sep=None, chunksize=200_000):
+        self.file_path = file_path
+        self.chunksize = chunksize
+        self.file_size = os.path.getsize(file_path)
+
+        self.read_kwargs = text_read_kwargs(sep)
+        self.sep = resolve_delimiter(file_path, sep, encoding=self.read_kwargs.get('encoding', 'utf-8'))
+        # pyarrow引擎不支持分块读取
+        engine = select_engine(self.sep)
+        self.engine = 'c' if engine == 'pyarrow' else engine
+
+        # 读取表头获取列名
+        header = pd.read_csv(file_path, sep=self.sep, engine=self.engine, nrows=0, **self.read_kwargs)
+        self.columns = list(header.columns.str.strip())
+
+    def iter_chunks(self, columns=None, progress_callback=None):
+        """逐块读取数据
+
+        Args:
+            columns: list, 只读取这些列；为None时读取全部列
+            progress_callback: callable, 接收已读取的百分比(0-100)
+        """
+        encoding = self.read_kwargs.get('encoding', 'utf-8')
+        with open(self.file_path, 'r', encoding=encoding, errors='replace') as f:
+            reader = pd.read_csv(
+                f,
+                sep=self.sep,
+                engine=self.engine,
+                chunksize=self.chunksize,
+                **self.read_kwargs
+            )
+            for chunk in reader:
+                chunk.columns = self.columns
+                if columns is not None:
+                    chunk = chunk[columns]
+                if progress_callback is not None and self.file_size > 0:
+                    progress_callback(min(100, int(f.buffer.tell() * 100 / self.file_size)))
+                yield chunk
+
+    def scan(self, sample_rows, progress_callback=None, seed=None):
+        """扫描整个文件，计算各列统计量并抽取均匀样本
+
+        Args:
+            seed: int, 抽样的随机种子；种子相同时样本相同（与分块大小无关）
+
+        Returns:
+            (DataFrame, dict, int): 按原始行序排列的样本、各数值列的累加器、总行数
+        """
+        rng = np.random.default_rng(seed)
+        sample, keys = None, None
+        accumulators = {}
+        numeric_cols = None
+        total_rows = 0
+
+        for chunk in self.iter_chunks(progress_callback=progress_callback):
+            # 以第一个数据块的类型确定数值列
+            if numeric_cols is None:
+                numeric_cols = list(chunk.select_dtypes(include=['number']).columns)
+                accumulators = {col: ColumnAccumulator() for col in numeric_cols}
+
+            for col in numeric_cols:
+                accumulators[col].add(pd.to_numeric(chunk[col], errors='coerce'))
+
+            # 保留原始行号，便于样本按文件顺序排列
+            chunk.index = pd.RangeIndex(total_rows, total_rows + len(chunk))
+            total_rows += len(chunk)
+
+            sample, keys = bottom_k_sample(sample, keys, chunk, rng.random(len(chunk)), sample_rows)
+
+        if sample is None:
+            return pd.DataFrame(columns=self.columns), {}, 0
+        return sample.sort_index(), accumulators, total_rows
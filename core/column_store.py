@@ -0,0 +1,125 @@
+import os
+import atexit
+import shutil
+import logging
+import tempfile
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+
+
+class ColumnStore:
+    """内存映射的数值列存储
+
+    每列在第一次被请求时写入内存映射文件（保持原来的数值类型，int64不会转换为float64
+    而丢失精度），绘图时返回只读的零拷贝视图，避免每个绘图任务复制整张表。
+    列按位置存储，不受列名修改的影响。
+    """
+
+    def __init__(self, base_dir=None):
+        self.logger = logging.getLogger("PlotData.ColumnStore")
+        self.base_dir = base_dir
+        self.store_dir = None
+        self.n_rows = 0
+        self._arrays = {}
+        self._data = None
+        self._lock = threading.Lock()
+        self._finalizer = None
+        self._generation = 0
+
+    def build(self, data):
+        """更换数据：只记录数据引用，各列在第一次被请求时才写入映射文件"""
+        self.close()
+        self.n_rows = len(data)
+        self._data = data
+
+    def attach(self, data):
+        """数据只在末尾追加了列时更新数据引用，已写入的列保持有效"""
+        self._data = data
+
+    def extend(self, data, start):
+        """数据在末尾追加了行：只把新增的行追加到已写入的映射文件"""
+        with self._lock:
+            self._data = data
+            self.n_rows = len(data)
+            for position in list(self._arrays):
+                array = self._arrays[position]
+                values = _numeric_values(data.iloc[start:, position])
+                if len(array) == 0 or values.dtype != array.dtype:
+                    # 空列没有映射文件；追加后类型改变（如整数列出现缺失值）时
+                    # 丢弃旧映射，下次请求时整列重新写入
+                    del self._arrays[position]
+                    continue
+                with open(array.filename, 'ab') as f:
+                    f.write(values.tobytes())
+                # 已返回的旧映射仍然有效（文件只在末尾增长）
+                self._arrays[position] = np.memmap(array.filename, dtype=array.dtype, mode='r',
+                                                   shape=(self.n_rows,))
+
+    def _write(self, position, series):
+        """把一列写入内存映射文件，返回只读映射"""
+        values = _numeric_values(series)
+        if len(values) == 0:
+            array = np.empty(0, dtype=values.dtype)
+        else:
+            if self.store_dir is None:
+                self.store_dir = tempfile.mkdtemp(prefix="plotdata_cols_", dir=self.base_dir)
+                # 程序退出时自动清理临时文件
+                self._finalizer = weakref.finalize(self, shutil.rmtree, self.store_dir, True)
+            # 每次写入使用新文件，重新写入的列不会覆盖仍被旧视图映射的文件
+            self._generation += 1
+            path = os.path.join(self.store_dir, f"col_{position}_{self._generation}.bin")
+            writer = np.memmap(path, dtype=values.dtype, mode='w+', shape=values.shape)
+            writer[:] = values
+            writer.flush()
+            del writer
+            array = np.memmap(path, dtype=values.dtype, mode='r', shape=values.shape)
+        self._arrays[position] = array
+        return array
+
+    def get(self, position, rows=None):
+        """获取一列的只读数值数组
+
+        Args:
+            position: int, 列位置
+            rows: 行位置数组或切片；为None时返回整列的零拷贝视图
+        """
+        with self._lock:
+            array = self._arrays.get(position)
+            if array is None:
+                # 第一次被请求时写入一次并缓存
+                array = self._write(position, self._data.iloc[:, position])
+        if rows is None:
+            return array
+        return array[rows]
+
+    def close(self):
+        """释放内存映射并删除临时文件
+
+        先释放本对象持有的映射再删除目录（Windows下不能删除仍被映射的文件）；
+        绘图任务等仍持有旧视图时目录删除失败，改为在程序退出时删除。
+        """
+        with self._lock:
+            arrays, self._arrays = self._arrays, {}
+            arrays.clear()
+            del arrays
+        self._data = None
+        if self._finalizer is not None:
+            self._finalizer()
+            self._finalizer = None
+            if os.path.exists(self.store_dir):
+                self.logger.info(f"映射文件仍在使用，退出时删除: {self.store_dir}")
+                atexit.register(shutil.rmtree, self.store_dir, True)
+        self.store_dir = None
+
+
+def _numeric_values(series):
+    """列的数值数组：NumPy数值类型保持不变，其他类型转换为float64（无法转换的值为NaN）"""
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in 'iuf':
+        return series.to_numpy()
+    if pd.api.types.is_integer_dtype(dtype) and not series.hasnans:
+        # 没有缺失值的可空整数列保持整数精度
+        return series.to_numpy(dtype=dtype.numpy_dtype)
+    return pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
@@ -22,7 +22,10 @@ class ConfigManager:
             "window_position": [100, 100],
             "show_grid": True,
             "auto_save_settings": False,
-            "decimal_places": 2
+            "decimal_places": 2,
+            "data_cache_max_mb": 2048,
+            "optimize_dtypes_on_load": False,
+            "lazy_columns": False
         }
         
         # 当前配置
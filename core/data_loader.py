@@ -0,0 +1,336 @@
+import csv
+import io
+import os
+import time
+import logging
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  仅用于检测是否可用
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# 空白分隔符（多个空格/制表符合并为1个）
+WHITESPACE_SEP = r'\s+'
+
+# 嗅探时尝试的单字符分隔符，按优先级排列
+CANDIDATE_SEPS = [',', '\t', '|', ';']
+
+# 嗅探分隔符时读取的文件头部字节数
+SNIFF_BYTES = 64 * 1024
+
+# 打开大文件时先显示的预览行数
+PREVIEW_ROWS = 5000
+
+logger = logging.getLogger("PlotData.DataLoader")
+
+
+def read_head_lines(file_path, sample_bytes=SNIFF_BYTES, encoding='utf-8'):
+    """读取文件头部样本，返回非空的完整行"""
+    with open(file_path, 'r', encoding=encoding, errors='replace') as f:
+        sample = f.read(sample_bytes)
+
+    lines = sample.splitlines()
+    # 样本被截断或文件正在写入（没有以换行符结尾）时，最后一行可能不完整
+    if len(lines) > 1 and (len(sample) >= sample_bytes or not sample.endswith(('\n', '\r'))):
+        lines = lines[:-1]
+    return [line for line in lines if line.strip()]
+
+
+def sniff_delimiter(lines):
+    """根据样本行推断分隔符
+
+    优先选择在每一行中字段数一致且大于1的单字符分隔符，
+    否则退回到空白分隔符。
+    """
+    if not lines:
+        return WHITESPACE_SEP
+
+    best_sep = None
+    best_fields = 1
+    for sep in CANDIDATE_SEPS:
+        try:
+            counts = {len(row) for row in csv.reader(lines, delimiter=sep)}
+        except csv.Error:
+            continue
+        if len(counts) == 1:
+            fields = counts.pop()
+            if fields > best_fields:
+                best_sep, best_fields = sep, fields
+
+    if best_sep is not None:
+        return best_sep
+
+    # 所有单字符分隔符都不一致时，使用空白分隔
+    return WHITESPACE_SEP
+
+
+def select_engine(sep):
+    """根据分隔符选择最快的解析引擎"""
+    if sep == WHITESPACE_SEP:
+        # C引擎对 \s+ 有专门的快速路径
+        return 'c'
+    if len(sep) == 1:
+        return 'pyarrow' if HAS_PYARROW else 'c'
+    # 其他正则分隔符只能使用python引擎
+    return 'python'
+
+
+class ProgressReader(io.RawIOBase):
+    """记录读取进度的二进制文件
+
+    每次读取后按已读取的字节数计算百分比(0-100)，百分比变化时调用progress_callback；
+    回调中抛出的异常会中断解析（用于取消加载）。
+    """
+
+    def __init__(self, file_path, progress_callback=None, limit=None):
+        super().__init__()
+        self._file = open(file_path, 'rb')
+        # limit: 只读取文件的前limit个字节（加载开始时的文件大小）
+        self._size = os.path.getsize(file_path) if limit is None else limit
+        self._callback = progress_callback
+        self._percent = -1
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        remaining = self._size - self._file.tell()
+        if remaining <= 0:
+            return 0
+        if len(buffer) > remaining:
+            n = self._file.readinto(memoryview(buffer)[:remaining])
+        else:
+            n = self._file.readinto(buffer)
+        if self._callback is not None and self._size > 0:
+            percent = min(100, self._file.tell() * 100 // self._size)
+            if percent != self._percent:
+                self._percent = percent
+                self._callback(percent)
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def read_text_table(file_path, sep=None, progress_callback=None, **read_kwargs):
+    """单次解析CSV/TXT文件
+
+    Args:
+        file_path: str, 文件路径
+        sep: str, 分隔符，为None时从文件头部样本嗅探；指定时原样使用
+        progress_callback: callable, 接收已读取字节的百分比(0-100)
+        **read_kwargs: 传递给 pd.read_csv 的其他参数
+
+    Returns:
+        (DataFrame, dict): 数据和加载信息（分隔符、引擎、各阶段耗时和file_snapshot的结果）
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    requested = sep
+    space_aligned = False
+    if sep is None:
+        lines = read_head_lines(file_path, encoding=read_kwargs.get('encoding', 'utf-8'))
+        sep = sniff_delimiter(lines)
+        space_aligned = sep == WHITESPACE_SEP and is_space_aligned(lines)
+    timings['sniff'] = time.perf_counter() - start
+
+    engine = select_engine(sep)
+    start = time.perf_counter()
+    # 只解析加载开始时已有的字节：加载期间追加的行留给跟踪模式从snapshot的偏移读取
+    snapshot = file_snapshot(file_path)
+    source = ProgressReader(file_path, progress_callback, snapshot['size'])
+    try:
+        data = None
+        if space_aligned:
+            # 单个空格加skipinitialspace比 \s+ 的C引擎快路径还快约三分之一；
+            # 样本之后的行不符合要求时解析失败或结果可以检测出来，改用 \s+ 重新解析
+            try:
+                data = pd.read_csv(source, sep=' ', skipinitialspace=True, engine='c', **read_kwargs)
+            except (ValueError, pd.errors.ParserError):
+                data = None
+            if data is not None and not matches_whitespace_parse(data):
+                data = None
+            if data is None:
+                source.seek(0)
+        if data is None:
+            data, engine = _parse(source, sep, engine, requested, read_kwargs)
+    finally:
+        source.close()
+    timings['parse'] = time.perf_counter() - start
+
+    return data, {'sep': sep, 'engine': engine, 'timings': timings, **snapshot}
+
+
+def _parse(source, sep, engine, requested, read_kwargs):
+    """用选择的引擎解析，失败时退回到python引擎；返回数据和实际使用的引擎"""
+    try:
+        try:
+            return pd.read_csv(source, sep=sep, engine=engine, **read_kwargs), engine
+        except (ValueError, pd.errors.ParserError) as e:
+            if engine == 'python':
+                raise
+            # 快速引擎不支持某些参数或解析失败时，退回到python引擎
+            logger.warning(f"{engine} 引擎解析失败，改用python引擎: {str(e)}")
+            source.seek(0)
+            return pd.read_csv(source, sep=sep, engine='python', **read_kwargs), 'python'
+    except pd.errors.ParserError as e:
+        if requested is None:
+            raise
+        # 不替换用户指定的分隔符，直接报告
+        raise ValueError(f"使用指定的分隔符 {requested!r} 解析失败: {str(e)}") from e
+
+
+def is_space_aligned(lines):
+    """样本行是否只用空格分隔（没有制表符，行尾没有空白）"""
+    return bool(lines) and all('\t' not in line and line == line.rstrip() for line in lines)
+
+
+def matches_whitespace_parse(data):
+    """检查按单个空格解析的结果是否与 \\s+ 一致
+
+    样本之后出现制表符时，制表符两侧的字段合并为一个含制表符的字符串；
+    只有空白的行被解析为全部缺失的一行（\\s+ 跳过这样的行）。
+    行尾有空白时字段数变多，pandas直接报错，不需要在这里检查。
+    """
+    for name in data.columns:
+        column = data[name]
+        if not pd.api.types.is_numeric_dtype(column.dtype) and column.astype(str).str.contains('\t').any():
+            return False
+    return not data.isna().all(axis=1).any()
+
+
+def file_snapshot(file_path):
+    """记录文件当前的大小、最后一个换行符之后的偏移和文件标识
+
+    Returns:
+        dict: size（字节数）、mtime_ns（修改时间）、end_offset（最后一个完整行之后的偏移）、
+        partial_tail（end_offset之后是否还有未写完的内容）、
+        identity（设备号、inode号，用于识别文件是否被替换）
+    """
+    with open(file_path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        size = stat.st_size
+        # 从文件末尾向前按块查找最后一个换行符
+        end_offset, position, partial_tail = 0, size, False
+        while position > 0:
+            block = min(SNIFF_BYTES, position)
+            position -= block
+            f.seek(position)
+            data = f.read(block)
+            newline = data.rfind(b'\n')
+            if newline >= 0:
+                end_offset = position + newline + 1
+                partial_tail = partial_tail or bool(data[newline + 1:].strip())
+                break
+            partial_tail = partial_tail or bool(data.strip())
+    return {
+        'size': size,
+        'mtime_ns': stat.st_mtime_ns,
+        'end_offset': end_offset,
+        'partial_tail': partial_tail,
+        'identity': (stat.st_dev, stat.st_ino),
+    }
+
+
+def read_header(file_path, sep=None):
+    """只读取CSV/TXT文件的表头
+
+    Returns:
+        (list, str): 原始列名和实际使用的分隔符
+    """
+    read_kwargs = text_read_kwargs(sep)
+    sep = resolve_delimiter(file_path, sep, encoding=read_kwargs.get('encoding', 'utf-8'))
+    engine = select_engine(sep)
+    if engine == 'pyarrow':
+        engine = 'c'
+    header = pd.read_csv(file_path, sep=sep, engine=engine, nrows=0, **read_kwargs)
+    return list(header.columns), sep
+
+
+def read_head(file_path, sep=None, nrows=PREVIEW_ROWS):
+    """只读取CSV/TXT文件的前nrows行，用于完整加载之前的快速预览
+
+    Returns:
+        (DataFrame, dict): 数据和加载信息；不是文本文件时返回 (None, None)
+    """
+    if not file_path.endswith(('.csv', '.txt')):
+        return None, None
+    read_kwargs = text_read_kwargs(sep)
+    start = time.perf_counter()
+    sep = resolve_delimiter(file_path, sep, encoding=read_kwargs.get('encoding', 'utf-8'))
+    engine = select_engine(sep)
+    if engine == 'pyarrow':
+        # pyarrow引擎不支持nrows
+        engine = 'c'
+    data = pd.read_csv(file_path, sep=sep, engine=engine, nrows=nrows, **read_kwargs)
+    timings = {'preview': time.perf_counter() - start}
+    return data, {'sep': sep, 'engine': engine, 'timings': timings}
+
+
+def text_read_kwargs(sep):
+    """返回解析文本文件时使用的额外参数"""
+    if sep is None:
+        return {}
+    # 如果指定了分隔符，跳过错误行并保留空字符串
+    return {
+        'skip_blank_lines': True,
+        'quotechar': '"',
+        'on_bad_lines': 'skip',
+        'keep_default_na': False,
+        'encoding': 'utf-8'  # 显式指定编码
+    }
+
+
+def resolve_delimiter(file_path, sep=None, encoding='utf-8'):
+    """确定文本文件的分隔符：sep为None时从文件头部样本嗅探，否则原样使用指定的分隔符"""
+    if sep is not None:
+        return sep
+    return sniff_delimiter(read_head_lines(file_path, encoding=encoding))
+
+
+def read_file(file_path, sep=None, progress_callback=None, usecols=None):
+    """根据文件类型读取数据文件
+
+    Args:
+        progress_callback: callable, 接收读取进度(0-100)；
+            只有CSV/TXT文件按已读取的字节报告，其他格式在解析完成后报告100
+        usecols: list, 只解析这些列（原始列名）；只对CSV/TXT文件有效
+
+    Returns:
+        (DataFrame, dict): 数据和加载信息（包括解析之前的文件大小size和修改时间mtime_ns）；
+        不支持的格式返回 (None, None)
+    """
+    if file_path.endswith('.csv') or file_path.endswith('.txt'):
+        read_kwargs = text_read_kwargs(sep)
+        if usecols is not None:
+            read_kwargs['usecols'] = usecols
+        return read_text_table(file_path, sep=sep, progress_callback=progress_callback,
+                               **read_kwargs)
+
+    # 解析之前的文件状态，用作缓存键
+    stat = os.stat(file_path)
+    start = time.perf_counter()
+    if file_path.endswith(('.xlsx', '.xls')):
+        data = pd.read_excel(file_path)
+    elif file_path.endswith('.json'):
+        data = pd.read_json(file_path)
+    else:
+        return None, None
+    timings = {'parse': time.perf_counter() - start}
+    if progress_callback is not None:
+        progress_callback(100)
+    return data, {'sep': None, 'engine': os.path.splitext(file_path)[1], 'timings': timings,
+                  'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
@@ -1,116 +1,922 @@
 import pandas as pd
 import numpy as np
 import os
-import re
-from PyQt6.QtCore import pyqtSignal, QObject
+import time
+import logging
+from PyQt6.QtCore import pyqtSignal, pyqtSlot, QObject, QThreadPool
+from core.data_loader import (read_file, read_head, read_header, read_text_table,
+                              text_read_kwargs, file_snapshot,
+                              PREVIEW_ROWS)
+from core.chunked_source import ChunkedSource, ColumnAccumulator, bottom_k_sample
+from core.cache_manager import DataCache
+from core.column_store import ColumnStore
+from core.dtype_optimizer import optimize_frame
+from core.sorted_index import SortedIndex
+from core.row_mask import RowMask
+from core.filter_engine import FilterEngine, FilterSyntaxError, UnknownColumnError, referenced_columns
+from core.load_worker import LoadWorker, LoadCancelled
+from core.multi_loader import expand_paths, read_many
+from core.file_follower import FileFollower
+from core.append_buffer import AppendBuffer
 
 class DataManager(QObject):
     data_loaded = pyqtSignal()
+    load_progress = pyqtSignal(int)  # 加载进度（已读取字节的百分比）
+    load_failed = pyqtSignal(str)    # 后台加载失败，携带错误消息
+    load_cancelled = pyqtSignal()    # 后台加载被取消
+    columns_loaded = pyqtSignal(list)  # 懒加载列模式下按需载入了新的列
+    rows_appended = pyqtSignal(int)    # 跟踪模式下文件追加了新行，携带第一个新行的位置
+    follow_changed = pyqtSignal(bool)  # 跟踪模式开始或停止
+
+    # 超过该大小的文本文件自动使用流式模式
+    STREAMING_THRESHOLD = 2 * 1024 ** 3
+    # 超过该大小的文本文件在后台加载前先显示头部预览
+    PREVIEW_THRESHOLD = 32 * 1024 ** 2
+    # 懒加载列模式下加载时解析的列数（绘图默认使用前两列作为X、Y）
+    LAZY_INITIAL_COLUMNS = 2
+    # 流式模式下内存中保留的样本行数
+    STREAM_SAMPLE_ROWS = 200_000
+    # 可撤销的筛选步骤数
+    FILTER_STACK_SIZE = 10
+
     def __init__(self):
         super().__init__()
         self.current_file = None
         self.data = None
+        # 数据和筛选结果的版本号，任一变化时绘图需要重新准备数据
+        self.data_version = 0
+        self.filter_version = 0
+        # 按行位图取出的筛选结果：(行位图, 数据, (数据版本, 筛选版本), DataFrame)
+        self._filtered_frame = None
         self.filtered_data = None
         self.file_path = None
         self.file_name = None
+        self.load_info = None
+        # 流式模式状态
+        self.stream_source = None
+        self.stream_stats = None
+        self.stream_filter_plan = None
+        # 已解析文件的二进制缓存
+        self.cache = DataCache()
+        # 数值列的内存映射存储，供绘图使用零拷贝视图
+        self.column_store = ColumnStore()
+        # 单调列索引，范围筛选使用二分查找
+        self.sorted_index = SortedIndex()
+        # 加载时是否自动降级数值类型并把低基数字符串列转为分类类型
+        self.optimize_dtypes_on_load = False
+        # 加载CSV/TXT时是否只解析表头和前几列，其他列在第一次用到时再读取
+        self.lazy_columns = False
+        # 懒加载列模式的表结构：{'names': 全部列名, 'raw': {列名: 文件中的原始列名}, 'sep': 指定的分隔符}；
+        # 为None时所有列都已载入
+        self.lazy_schema = None
+        self.memory_report = None
+        # 筛选表达式编译器（缓存编译后的筛选计划）
+        self.filter_engine = FilterEngine()
+        self.filter_timings = None
+        # 筛选历史：[(筛选计划, 筛选结果), ...]，栈顶为当前筛选
+        self.filter_stack = []
+        # 后台加载：当前的加载任务和编号，编号不是最新的结果被丢弃
+        self.load_pool = QThreadPool()
+        self.load_pool.setMaxThreadCount(2)
+        self.load_worker = None
+        self._load_generation = 0
+        # 当前数据是否只是文件头部的预览（完整数据仍在加载）
+        self.preview = False
+        # 跟踪模式：监视文件末尾追加的行，并增量更新的数值列统计量
+        self.follower = None
+        self.follow_stats = None
+        self.append_buffer = None  # 跟踪模式下追加行的数据缓冲区
+        self.logger = logging.getLogger("PlotData.DataManager")
+
+    @property
+    def filtered_data(self):
+        """筛选后的数据
+
+        筛选结果以行位图保存，第一次访问时才按位图从原始数据中取出，之后复用，
+        直到筛选结果或数据变化；返回的DataFrame由各调用方共享，不要修改。
+        流式模式的匹配样本和直接设置的DataFrame按原样保存。
+        """
+        result = self._filter_result
+        if not isinstance(result, RowMask):
+            return result
+        if self.data is None:
+            return None
+        versions = (self.data_version, self.filter_version)
+        cached = self._filtered_frame
+        if cached is None or cached[0] is not result or cached[1] is not self.data or cached[2] != versions:
+            cached = (result, self.data, versions, self.data.iloc[result.indexer()])
+            self._filtered_frame = cached
+        return cached[3]
+
+    @filtered_data.setter
+    def filtered_data(self, value):
+        """设置筛选结果（DataFrame、RowMask或None）"""
+        self._filter_result = value
+        self._filtered_frame = None
+        self.filter_version += 1
+
+    @property
+    def filter_mask(self):
+        """当前筛选的行位图；没有筛选或结果不是位图时返回None"""
+        result = self._filter_result
+        return result if isinstance(result, RowMask) else None
 
     def has_filter(self):
         """检查是否应用了筛选条件"""
-        return self.filtered_data is not None and not self.filtered_data.empty
+        result = self._filter_result
+        if isinstance(result, RowMask):
+            return result.any()
+        return result is not None and not result.empty
+
+    def is_streaming(self):
+        """检查当前数据是否以流式模式加载"""
+        return self.stream_source is not None
+
+    def load_data(self, file_path, sep=None, streaming=None, use_cache=True, optimize=None):
+        """加载数据文件（在当前线程中同步完成）
+
+        Args:
+            file_path: str, 文件路径
+            sep: str, 分隔符，为None时自动嗅探
+            streaming: bool, 是否分块流式读取；为None时根据文件大小自动选择
+            use_cache: bool, 是否使用已解析数据的二进制缓存
+            optimize: bool, 是否优化数据类型；为None时使用 optimize_dtypes_on_load
+        """
+        result, message = self.read_dataset(file_path, sep, streaming, use_cache, optimize,
+                                             progress_callback=self.load_progress.emit)
+        if result is None:
+            return False, message
+        return self.install_dataset(result)
+
+    def load_data_async(self, file_path, sep=None, preview=False, **options):
+        """在后台线程中加载数据文件
+
+        解析期间当前数据保持可用；解析完成后在GUI线程中替换数据并发出data_loaded，
+        失败时发出load_failed，取消时发出load_cancelled。再次调用时取消尚未完成的加载。
+
+        preview为True且文件较大时，先同步读取文件头部的PREVIEW_ROWS行作为预览数据
+        并发出data_loaded，完整数据加载完成后替换预览并再次发出data_loaded。
+
+        Args:
+            preview: bool, 是否先显示头部预览
+            **options: streaming、use_cache、optimize，同load_data
+
+        Returns:
+            LoadWorker: 加载任务
+        """
+        return self._start_load(file_path, sep, None, options, preview)
+
+    def load_many(self, pattern, sep=None, **options):
+        """同步加载并合并多个文件，参数见read_many_dataset"""
+        result, message = self.read_many_dataset(pattern, sep, progress_callback=self.load_progress.emit,
+                                                 **options)
+        if result is None:
+            return False, message
+        return self.install_dataset(result)
+
+    def load_many_async(self, pattern, sep=None, **options):
+        """在后台线程中并行加载并合并多个文件，信号与load_data_async相同
+
+        Returns:
+            LoadWorker: 加载任务
+        """
+        return self._start_load(pattern, sep, self.read_many_dataset, options)
+
+    def _start_load(self, file_path, sep, read, options, preview=False):
+        """启动后台加载任务，取消尚未完成的旧任务"""
+        self.cancel_load()
+        self._load_generation += 1
+        worker = LoadWorker(self, self._load_generation, file_path, sep, read, **options)
+        worker.signals.progress.connect(self._on_load_progress)
+        worker.signals.loaded.connect(self._on_load_finished)
+        worker.signals.failed.connect(self._on_load_failed)
+        worker.signals.cancelled.connect(self._on_load_cancelled)
+        self.load_worker = worker
+        # 预览在启动完整加载之前显示，此时is_loading()已为True
+        if preview:
+            self._install_preview(file_path, sep)
+        self.load_pool.start(worker)
+        return worker
+
+    def _install_preview(self, file_path, sep=None):
+        """读取并显示文件头部的预览；失败时不影响完整加载"""
+        try:
+            if (not os.path.isfile(file_path)
+                    or os.path.getsize(file_path) <= self.PREVIEW_THRESHOLD):
+                return
+            data, load_info = read_head(file_path, sep, PREVIEW_ROWS)
+            if data is None or data.empty:
+                return
+        except Exception as e:
+            self.logger.warning(f"读取预览失败: {str(e)}")
+            return
+
+        data.columns = data.columns.str.strip()
+        self.data = data
+        self._clear_stream()
+        self.memory_report = None
+        self.load_info = load_info
+        self.preview = True
+        self.lazy_schema = None
+        self.file_path = file_path
+        self.file_name = os.path.basename(file_path)
+        self.file_info = {
+            'file_name': self.file_name,
+            'file_path': self.file_path,
+            'rows': len(data),
+            'columns': len(data.columns),
+            'preview': True
+        }
+        self.logger.info(f"预览 {self.file_name}: 前 {len(data)} 行，"
+                         f"耗时 {load_info['timings']['preview']:.3f}s")
+        self._on_data_changed()
+        self.data_loaded.emit()
+
+    def is_preview(self):
+        """检查当前数据是否只是文件头部的预览"""
+        return self.preview
+
+    def cancel_load(self):
+        """取消正在进行的后台加载"""
+        if self.load_worker is not None:
+            self.load_worker.cancel()
+
+    def is_loading(self):
+        """检查是否有正在进行的后台加载"""
+        return self.load_worker is not None
+
+    @pyqtSlot(int, int)
+    def _on_load_progress(self, generation, percent):
+        if generation == self._load_generation:
+            self.load_progress.emit(percent)
 
-    def load_data(self, file_path, sep=None):
+    @pyqtSlot(int, object)
+    def _on_load_finished(self, generation, result):
+        # 已被新的加载取代的结果直接丢弃
+        if generation != self._load_generation:
+            return
+        worker, self.load_worker = self.load_worker, None
+        if worker is not None and worker.cancelled:
+            self.load_cancelled.emit()
+            return
+        try:
+            success, message = self.install_dataset(result)
+        except Exception as e:
+            success, message = False, f"数据加载失败: {str(e)}"
+        if not success:
+            self.load_failed.emit(message)
+
+    @pyqtSlot(int, str)
+    def _on_load_failed(self, generation, message):
+        if generation == self._load_generation:
+            self.load_worker = None
+            self.load_failed.emit(message)
+
+    @pyqtSlot(int)
+    def _on_load_cancelled(self, generation):
+        if generation == self._load_generation:
+            self.load_worker = None
+            self.load_cancelled.emit()
+
+    def read_dataset(self, file_path, sep=None, streaming=None, use_cache=True, optimize=None,
+                     progress_callback=None, lazy=None):
+        """读取并解析数据文件，不修改当前数据集
+
+        可以在工作线程中调用，结果由install_dataset应用。参数同load_data；
+        progress_callback接收已读取字节的百分比(0-100)，在其中抛出LoadCancelled可中断解析。
+        lazy为True时（为None时使用lazy_columns）只解析CSV/TXT文件的表头和前LAZY_INITIAL_COLUMNS列。
+
+        Returns:
+            (dict, str): 加载结果和消息；失败时加载结果为None
+        """
         try:
             # 验证文件路径
             if not file_path or not isinstance(file_path, str):
-                return False, "无效的文件路径"
+                return None, "无效的文件路径"
                 
             if not os.path.exists(file_path):
-                return False, f"文件不存在: {file_path}"
+                return None, f"文件不存在: {file_path}"
                 
             if not os.access(file_path, os.R_OK):
-                return False, f"没有读取文件的权限: {file_path}"
+                return None, f"没有读取文件的权限: {file_path}"
                 
-            # 根据文件类型处理
-            if file_path.endswith('.csv') or file_path.endswith('.txt'):
-                # 优化分隔符处理
-                if sep is None:
-                    # 默认使用单个空格作为分隔符，并将多个空格合并为1个
-                    sep = r'\s+'
-                    try:
-                        self.data = pd.read_csv(file_path, delimiter=sep, engine='python')
-                    except pd.errors.ParserError:
-                        # 如果空格分隔失败，尝试常见分隔符
-                        for test_sep in [',', '\t', '|', ';']:
-                            try:
-                                self.data = pd.read_csv(file_path, delimiter=test_sep, engine='python')
-                                break
-                            except pd.errors.ParserError:
-                                continue
+            is_text = file_path.endswith(('.csv', '.txt'))
+            if streaming is None:
+                streaming = is_text and os.path.getsize(file_path) > self.STREAMING_THRESHOLD
+            if streaming:
+                if not is_text:
+                    return None, "流式模式只支持CSV/TXT文件"
+                return self._read_streaming(file_path, sep, progress_callback)
 
-                else:
-                    # 如果指定了分隔符，直接使用
-                    self.data = pd.read_csv(file_path, delimiter=sep, engine='python')
-                    
-                    # 添加更多读取参数
-                    self.data = pd.read_csv(
-                        file_path,
-                        delimiter=sep,
-                        engine='python',
-                        skip_blank_lines=True,
-                        quotechar='"',
-                        quoting=0,
-                        on_bad_lines='skip',
-                        keep_default_na=False,
-                        encoding='utf-8'  # 显式指定编码
-                    )
-                    
-            elif file_path.endswith(('.xlsx', '.xls')):
-                self.data = pd.read_excel(file_path)
-            elif file_path.endswith('.json'):
-                self.data = pd.read_json(file_path)
+            start = time.perf_counter()
+            schema, usecols = None, None
+            if (self.lazy_columns if lazy is None else lazy) and is_text:
+                # 懒加载列：只解析表头和最先用到的列；缓存保存的是完整数据，不使用缓存
+                names, _ = read_header(file_path, sep)
+                raw = {str(name).strip(): name for name in names}
+                schema = {'names': list(raw), 'raw': raw, 'sep': sep}
+                usecols = names[:self.LAZY_INITIAL_COLUMNS]
+                use_cache = False
+
+            # 优先读取缓存；先记录文件状态再查找，缓存的数据与记录的偏移一致
+            snapshot = file_snapshot(file_path) if use_cache and is_text else None
+            cached = self.cache.get(file_path, sep, snapshot) if use_cache else None
+            if cached is not None:
+                data = cached
+                load_info = {
+                    'sep': sep,
+                    'engine': 'cache',
+                    'timings': {'cache_read': time.perf_counter() - start}
+                }
+                if snapshot is not None:
+                    # 缓存有效说明文件没有变化，跟踪模式从记录的文件末尾开始
+                    load_info.update(snapshot)
+                if progress_callback is not None:
+                    progress_callback(100)
             else:
-                return False, "不支持的格式"
+                # 根据文件类型处理（单次解析，自动嗅探分隔符）
+                data, load_info = read_file(file_path, sep, progress_callback, usecols)
+                if load_info is None:
+                    return None, "不支持的格式"
 
-            # 数据有效性检查
-            if self.data is None or self.data.empty:
-                return False, "加载的数据为空"
-                
-            # 清理列名
-            self.data.columns = self.data.columns.str.strip()
-            
-            # 保存文件信息
-            self.file_path = file_path
-            self.file_name = os.path.basename(file_path)
-            self.file_info = {
-                'file_name': self.file_name,
-                'file_path': self.file_path,
-                'rows': len(self.data),
-                'columns': len(self.data.columns)
-            }
-            
-            # 发出信号
-            self.data_loaded.emit()
-            return True, "数据加载成功"
-            
+                # 数据有效性检查
+                if data is None or data.empty:
+                    return None, "加载的数据为空"
+
+                # 清理列名
+                post_start = time.perf_counter()
+                data.columns = data.columns.str.strip()
+                load_info['timings']['postprocess'] = time.perf_counter() - post_start
+
+                # 写入缓存，下次打开时直接读取；缓存键使用解析之前的文件状态，
+                # 加载期间追加的行不在数据中，之后打开变大的文件时不会命中
+                if use_cache:
+                    cache_start = time.perf_counter()
+                    self.cache.put(file_path, data, sep, load_info)
+                    load_info['timings']['cache_write'] = time.perf_counter() - cache_start
+
+            # 优化数据类型
+            if optimize is None:
+                optimize = self.optimize_dtypes_on_load
+            memory_report = None
+            if optimize:
+                optimize_start = time.perf_counter()
+                data, memory_report = optimize_frame(data)
+                load_info['timings']['optimize'] = time.perf_counter() - optimize_start
+
+            return {
+                'file_path': file_path,
+                'data': data,
+                'load_info': load_info,
+                'memory_report': memory_report,
+                'start': start,
+                'schema': schema,
+                'stream': None
+            }, "数据读取成功"
+
+        except LoadCancelled:
+            raise
         except pd.errors.EmptyDataError:
-            return False, "文件为空或格式不正确"
+            return None, "文件为空或格式不正确"
         except pd.errors.ParserError:
-            return False, "文件解析错误，请检查文件格式"
+            return None, "文件解析错误，请检查文件格式"
         except Exception as e:
-            return False, f"数据加载失败: {str(e)}"
-    
+            return None, f"数据加载失败: {str(e)}"
+
+    def read_many_dataset(self, pattern, sep=None, progress_callback=None, processes=None,
+                          optimize=None):
+        """用进程池并行读取多个文件并合并为一个数据集，不修改当前数据集
+
+        合并后的数据增加SOURCE_COLUMN列记录每行的来源文件；单个文件失败不中断其他文件，
+        每个文件的耗时和失败原因记录在load_info['files']中。可以在工作线程中调用。
+
+        Args:
+            pattern: 文件夹、通配符或文件路径列表
+            sep: str, 分隔符，为None时每个文件单独嗅探
+            progress_callback: callable, 接收已完成文件的百分比(0-100)
+            processes: int, 进程数；为None时按CPU核数确定
+            optimize: bool, 是否优化数据类型；为None时使用 optimize_dtypes_on_load
+
+        Returns:
+            (dict, str): 加载结果和消息；失败时加载结果为None
+        """
+        try:
+            paths = expand_paths(pattern)
+            if not paths:
+                return None, f"没有找到匹配的文件: {pattern}"
+
+            start = time.perf_counter()
+            data, report = read_many(paths, sep, processes, progress_callback)
+            failed = [item for item in report if item['error'] is not None]
+            if data is None:
+                return None, "所有文件都加载失败:\n" + "\n".join(
+                    f"{os.path.basename(item['file'])}: {item['error']}" for item in failed)
+            load_info = {
+                'sep': sep,
+                'engine': 'multi',
+                'timings': {'parse': time.perf_counter() - start},
+                'files': report
+            }
+
+            if optimize is None:
+                optimize = self.optimize_dtypes_on_load
+            memory_report = None
+            if optimize:
+                optimize_start = time.perf_counter()
+                data, memory_report = optimize_frame(data)
+                load_info['timings']['optimize'] = time.perf_counter() - optimize_start
+
+            # 文件夹或通配符作为数据集的路径
+            if isinstance(pattern, (list, tuple)):
+                label = os.path.dirname(paths[0])
+            else:
+                label = pattern.rstrip(os.sep) or pattern
+            return {
+                'file_path': label,
+                'data': data,
+                'load_info': load_info,
+                'memory_report': memory_report,
+                'start': start,
+                'schema': None,
+                'stream': None
+            }, f"已合并 {len(paths) - len(failed)}/{len(paths)} 个文件"
+
+        except LoadCancelled:
+            raise
+        except Exception as e:
+            return None, f"数据加载失败: {str(e)}"
+
+    def install_dataset(self, result):
+        """用read_dataset的结果替换当前数据集，并发出加载完成信号"""
+        if result['stream'] is not None:
+            return self._install_streaming(result)
+
+        self.data = result['data']
+        self._clear_stream()
+        self.preview = False
+        self.lazy_schema = result['schema']
+        self.memory_report = result['memory_report']
+        if self.memory_report is not None:
+            self.logger.info(self._format_memory_report(self.memory_report))
+        return self._finish_load(result['file_path'], result['load_info'], result['start'])
+
+    def _finish_load(self, file_path, load_info, start):
+        """记录加载信息和文件信息，并发出加载完成信号"""
+        # 记录各阶段耗时
+        load_info['timings']['total'] = time.perf_counter() - start
+        self.load_info = load_info
+        self.logger.info(
+            f"加载 {os.path.basename(file_path)}: 分隔符={load_info['sep']!r}, "
+            f"引擎={load_info['engine']}, 耗时=" +
+            ", ".join(f"{k} {v:.3f}s" for k, v in load_info['timings'].items())
+        )
+        
+        # 保存文件信息
+        self.file_path = file_path
+        self.file_name = os.path.basename(file_path)
+        self.file_info = {
+            'file_name': self.file_name,
+            'file_path': self.file_path,
+            'rows': len(self.data),
+            'columns': len(self.data.columns)
+        }
+        if 'files' in load_info:
+            # 多文件合并：记录文件数和失败数
+            self.file_info['files'] = len(load_info['files'])
+            self.file_info['failed_files'] = sum(item['error'] is not None for item in load_info['files'])
+        self._update_residency()
+        self._on_data_changed()
+        
+        # 发出信号
+        self.data_loaded.emit()
+        return True, "数据加载成功"
+
+    def _read_streaming(self, file_path, sep=None, progress_callback=None):
+        """分块扫描文件：计算统计量并只在内存中保留均匀抽样的工作集"""
+        start = time.perf_counter()
+        source = ChunkedSource(file_path, sep)
+        sample, accumulators, total_rows = source.scan(
+            self.STREAM_SAMPLE_ROWS,
+            progress_callback=progress_callback
+        )
+        if total_rows == 0:
+            return None, "加载的数据为空"
+
+        elapsed = time.perf_counter() - start
+        load_info = {
+            'sep': source.sep,
+            'engine': source.engine,
+            'timings': {'scan': elapsed, 'total': elapsed}
+        }
+        self.logger.info(f"流式加载 {os.path.basename(file_path)}: {total_rows} 行，"
+                         f"保留样本 {len(sample)} 行，耗时 {elapsed:.3f}s")
+        return {
+            'file_path': file_path,
+            'data': sample,
+            'load_info': load_info,
+            'memory_report': None,
+            'start': start,
+            'schema': None,
+            'stream': {'source': source, 'stats': accumulators, 'total_rows': total_rows}
+        }, "数据读取成功"
+
+    def _install_streaming(self, result):
+        """应用流式扫描的结果"""
+        stream = result['stream']
+        sample, total_rows = result['data'], stream['total_rows']
+        self.data = sample
+        self.filtered_data = None
+        self.stream_source = stream['source']
+        self.stream_stats = stream['stats']
+        self.stream_filter_plan = None
+        self.preview = False
+        self.lazy_schema = None
+        self.memory_report = None
+        self.load_info = result['load_info']
+
+        file_path = result['file_path']
+        self.file_path = file_path
+        self.file_name = os.path.basename(file_path)
+        self.file_info = {
+            'file_name': self.file_name,
+            'file_path': self.file_path,
+            'rows': total_rows,
+            'columns': len(self.data.columns),
+            'streaming': True,
+            'sample_rows': len(sample)
+        }
+        self._on_data_changed()
+
+        self.load_progress.emit(100)
+        self.data_loaded.emit()
+        return True, f"数据加载成功（流式模式，共 {total_rows} 行，内存中保留 {len(sample)} 行样本）"
+
+    def ensure_columns(self, columns=None):
+        """确保列已载入内存
+
+        懒加载列模式下，第一次用到的列从原文件中只解析这些列（usecols）并追加到数据末尾，
+        已有列的位置不变，列存储和筛选结果仍然有效。其他模式下所有列都已载入。
+
+        Args:
+            columns: list, 需要的列名（不在表结构中的名称被忽略）；为None时载入全部列
+
+        Returns:
+            (bool, str)
+        """
+        schema = self.lazy_schema
+        if schema is None or self.data is None:
+            return True, "所有列都已载入"
+        wanted = schema['names'] if columns is None else [col for col in dict.fromkeys(columns) if col]
+        missing = [col for col in wanted if col in schema['raw'] and col not in self.data.columns]
+        if not missing:
+            return True, "所需的列都已载入"
+
+        try:
+            start = time.perf_counter()
+            read_kwargs = text_read_kwargs(schema['sep'])
+            read_kwargs['usecols'] = [schema['raw'][col] for col in missing]
+            data, _ = read_text_table(self.file_path, self.load_info['sep'], **read_kwargs)
+            data.columns = data.columns.str.strip()
+            if len(data) != len(self.data):
+                return False, f"按需载入的列行数（{len(data)}）与已载入的数据（{len(self.data)}）不一致"
+            if self.memory_report is not None:
+                data, _ = optimize_frame(data)
+            data.index = self.data.index
+            self.data = pd.concat([self.data, data[missing]], axis=1)
+        except Exception as e:
+            return False, f"载入列失败: {str(e)}"
+
+        # 已有列的位置不变，列存储只需更新数据引用；新列可能是单调列
+        self.column_store.attach(self.data)
+        self.sorted_index.build(self.data, self.column_store)
+        self._update_residency()
+        self.logger.info(f"按需载入列 {', '.join(missing)}: 耗时 {time.perf_counter() - start:.3f}s，"
+                         f"已载入 {len(self.data.columns)}/{len(schema['names'])} 列")
+        self.columns_loaded.emit(missing)
+        return True, f"已载入 {len(missing)} 列"
+
+    def _materialize_columns(self):
+        """载入全部列并退出懒加载列模式
+
+        修改行（删除、去重等）之前调用：行改变后无法再与原文件逐行对齐。
+        """
+        success, message = self.ensure_columns()
+        if success:
+            self.lazy_schema = None
+            self._update_residency()
+        return success, message
+
+    def _update_residency(self):
+        """在文件信息中记录已载入的列"""
+        if not hasattr(self, 'file_info') or self.data is None:
+            return
+        if self.lazy_schema is None:
+            self.file_info.pop('resident_columns', None)
+            self.file_info['columns'] = len(self.data.columns)
+        else:
+            self.file_info['resident_columns'] = list(self.data.columns)
+            self.file_info['columns'] = len(self.lazy_schema['names'])
+
+    def get_resident_columns(self):
+        """已载入内存的列名"""
+        return list(self.data.columns) if self.data is not None else []
+
+    def is_lazy(self):
+        """检查是否有尚未载入的列"""
+        return (self.lazy_schema is not None and self.data is not None
+                and len(self.data.columns) < len(self.lazy_schema['names']))
+
+    def start_follow(self, interval_ms=1000):
+        """开始跟踪当前文件：文件末尾追加的行被增量解析并追加到数据中
+
+        只支持完整加载的CSV/TXT文件；数据被修改（清洗、预处理、重新加载等）后自动停止跟踪。
+        """
+        if self.data is None or not self.file_path:
+            return False, "请先加载数据"
+        if self.follower is not None:
+            return True, "已在跟踪文件"
+        if not os.path.isfile(self.file_path) or not self.file_path.endswith(('.csv', '.txt')):
+            return False, "跟踪模式只支持CSV/TXT文件"
+        if self.stream_source is not None:
+            return False, "流式模式下不支持跟踪文件"
+        if self.preview or self.is_loading():
+            return False, "请等待数据加载完成"
+
+        info = self.load_info or {}
+        if info.get('end_offset') is None:
+            return False, "无法确定已加载的数据在文件中的位置，请重新加载文件"
+
+        try:
+            # 新行需要与所有列对齐
+            success, message = self._materialize_columns()
+            if not success:
+                return False, message
+            # 从加载时最后一个完整行之后开始读取，加载之后追加的行不会遗漏
+            follower = FileFollower(self.file_path, info['end_offset'], info.get('identity'),
+                                    info.get('sep'), interval_ms, parent=self)
+            names = follower.columns
+            if names != list(self.data.columns)[:len(names)]:
+                follower.deleteLater()
+                return False, "文件表头与当前数据的列不一致"
+        except Exception as e:
+            return False, f"无法跟踪文件: {str(e)}"
+
+        if info.get('partial_tail') and len(self.data):
+            # 加载时文件末尾有一行还没写完（没有换行符），已被解析为最后一行；
+            # 去掉这一行，写完后由跟踪从该行开头重新读取
+            self.logger.info("去掉加载时尚未写完的最后一行")
+            self.data = self.data.iloc[:-1]
+            self._on_data_changed()
+            info['partial_tail'] = False
+
+        # 追加的行写入预留容量的缓冲区，每次追加不再复制全部数据
+        self.append_buffer = AppendBuffer(self.data)
+        self.data = self.append_buffer.frame()
+        self.column_store.attach(self.data)
+
+        self.follow_stats = {}
+        for col in self.data.columns:
+            dtype = self.data[col].dtype
+            if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+                acc = ColumnAccumulator()
+                acc.add(self.column_store.get(self.data.columns.get_loc(col)))
+                self.follow_stats[col] = acc
+
+        follower.rows_appended.connect(self.append_rows)
+        follower.file_reset.connect(self._on_follow_reset)
+        follower.error.connect(lambda message: self.logger.warning(message))
+        self.follower = follower
+        follower.start()
+        self.logger.info(f"开始跟踪文件: {self.file_path}（偏移 {follower.offset}）")
+        self.follow_changed.emit(True)
+        return True, f"正在跟踪 {self.file_name} 的新增数据"
+
+    def stop_follow(self):
+        """停止跟踪文件"""
+        if self.follower is None:
+            return
+        follower, self.follower = self.follower, None
+        follower.stop()
+        follower.deleteLater()
+        self.follow_stats = None
+        self.append_buffer = None
+        if self.load_info is not None and self.load_info.get('end_offset') is not None:
+            # 再次开始跟踪时从已读取到的位置继续
+            self.load_info['end_offset'] = follower.offset
+            self.load_info['identity'] = follower.identity
+        self.logger.info(f"停止跟踪文件: {follower.file_path}")
+        self.follow_changed.emit(False)
+
+    def is_following(self):
+        """检查是否正在跟踪文件"""
+        return self.follower is not None
+
+    def _on_follow_reset(self):
+        """文件被截断或替换：已加载的行不再与文件对应，停止跟踪"""
+        self.logger.warning(f"文件被截断或替换，停止跟踪: {self.file_path}")
+        if self.load_info is not None:
+            # 需要重新加载文件后才能再次跟踪
+            self.load_info['end_offset'] = None
+        self.stop_follow()
+
+    def append_rows(self, frame):
+        """把文件新增的行追加到数据末尾
+
+        数据保存在预留容量的缓冲区中；列存储、单调列索引、统计量和行位图筛选结果
+        都只处理新增的行，每次追加的开销只与新增的行数有关。
+        """
+        if self.data is None or frame is None or frame.empty:
+            return
+        if self.append_buffer is None:
+            self.append_buffer = AppendBuffer(self.data)
+        start = len(self.data)
+        frame = frame.reindex(columns=self.data.columns)
+        for col, dtype in self.data.dtypes.items():
+            if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+                frame[col] = pd.to_numeric(frame[col], errors='coerce')
+        # 分类列新出现的值由缓冲区加入类别
+        self.data = self.append_buffer.append(frame)
+        new_rows = slice(start, len(self.data))
+
+        self.column_store.extend(self.data, start)
+        self.sorted_index.extend(start)
+        if self.follow_stats is not None:
+            for col, acc in self.follow_stats.items():
+                acc.add(self.column_store.get(self.data.columns.get_loc(col), new_rows))
+
+        # 行位图筛选结果：只对新增的行求值，筛选历史中的每一步都原位扩展
+        if self.filter_mask is not None:
+            try:
+                # 先求值（可能失败），全部成功后再扩展，避免只扩展了一部分
+                evaluated = {}
+                for plan, result in self.filter_stack:
+                    if isinstance(result, RowMask) and plan.expr not in evaluated:
+                        evaluated[plan.expr] = plan.evaluate(self.data, rows=new_rows)
+            except Exception as e:
+                self.logger.warning(f"新增行的筛选失败，已清除筛选: {str(e)}")
+                self.clear_filtered_data()
+            else:
+                # 同一个行位图可能同时是筛选历史的一步和当前结果，只扩展一次
+                extended = set()
+                for plan, result in self.filter_stack:
+                    if isinstance(result, RowMask) and id(result) not in extended:
+                        result.extend(evaluated[plan.expr])
+                        extended.add(id(result))
+                if id(self.filter_mask) not in extended:
+                    self.filter_mask.extend(np.zeros(len(frame), dtype=bool))
+                self.filter_version += 1
+
+        self.data_version += 1
+        if hasattr(self, 'file_info'):
+            self.file_info['rows'] = len(self.data)
+        self.rows_appended.emit(start)
+
+    def optimize_dtypes(self, category_ratio=0.5):
+        """降级数值列并把低基数字符串列转换为分类类型，报告优化前后的内存占用"""
+        if self.data is None:
+            return False, "没有数据可优化"
+        try:
+            result = self._filter_result
+            self.data, self.memory_report = optimize_frame(self.data, category_ratio)
+            self._on_data_changed()
+            # 行没有变化，筛选结果仍然有效
+            self.filtered_data = result
+            message = self._format_memory_report(self.memory_report)
+            self.logger.info(message)
+            return True, message
+        except Exception as e:
+            return False, f"数据类型优化失败: {str(e)}"
+
+    @staticmethod
+    def _format_memory_report(report):
+        """格式化内存优化报告"""
+        changed = ", ".join(f"{col}: {old}→{new}" for col, (old, new) in report['changed'].items())
+        return (f"内存占用: {report['before'] / 1024 ** 2:.2f} MB → {report['after'] / 1024 ** 2:.2f} MB"
+                f"（节省 {report['saved_ratio']:.0%}）" + (f"\n{changed}" if changed else ""))
+
+    def _on_data_changed(self):
+        """数据内容改变后，重建派生的数据结构"""
+        # 修改后的数据不再与文件逐行对应
+        self.stop_follow()
+        self.data_version += 1
+        self.column_store.build(self.data)
+        self.sorted_index.build(self.data, self.column_store)
+        # 数据变化后旧的筛选结果（行位图）和筛选历史不再有效
+        self.filtered_data = None
+        self.filter_stack = []
+
+    def plot_data_key(self, columns):
+        """绘图数据的标识：数据版本、筛选版本和列名都相同时绘图数据不变"""
+        return (self.data_version, self.filter_version, tuple(col for col in columns if col))
+
+    def get_plot_data(self, columns, start=None):
+        """获取绘图所需列的数值数据
+
+        未筛选时直接返回内存映射存储的只读零拷贝视图，
+        筛选时只按行位置提取需要的列，不复制整张表。
+        start不为None时只返回位置不小于start的行（跟踪模式下新增的行）；
+        筛选结果不是行位图时无法区分新增的行，返回None。
+        """
+        if self.data is None:
+            return None
+        columns = [col for col in dict.fromkeys(columns) if col]
+        self.ensure_columns(columns)
+
+        rows = None
+        result = self._filter_result
+        if start is not None:
+            if isinstance(result, RowMask):
+                rows = result.indices()
+                rows = rows[np.searchsorted(rows, start):]
+            elif result is None:
+                rows = slice(start, None)
+            else:
+                return None
+        elif isinstance(result, RowMask):
+            rows = result.indexer()
+        elif result is not None:
+            if self.data.index.is_unique:
+                rows = self.data.index.get_indexer(result.index)
+            if rows is None or (rows < 0).any():
+                # 筛选结果不是当前数据的子集（如流式模式下的匹配样本），直接转换
+                return pd.DataFrame({
+                    col: pd.to_numeric(result[col], errors='coerce').to_numpy(
+                        dtype=np.float64, na_value=np.nan)
+                    for col in columns
+                })
+
+        arrays = {
+            col: self.column_store.get(self.data.columns.get_loc(col), rows)
+            for col in columns
+        }
+        return pd.DataFrame(arrays, copy=False)
+
+    def _clear_stream(self):
+        """清除流式模式状态"""
+        self.stream_source = None
+        self.stream_stats = None
+        self.stream_filter_plan = None
+
+    def iter_display_chunks(self, columns=None, progress_callback=None):
+        """流式模式下逐块返回（应用当前筛选条件后的）完整数据
+
+        非流式模式返回None。
+        """
+        if self.stream_source is None:
+            return None
+
+        names = list(self.data.columns)
+        plan = self.stream_filter_plan
+
+        def generate():
+            for chunk in self.stream_source.iter_chunks(progress_callback=progress_callback):
+                # 列名与内存中的样本保持一致
+                chunk.columns = names[:len(chunk.columns)]
+                if plan is not None:
+                    chunk = chunk[plan.evaluate(chunk)]
+                yield chunk if columns is None else chunk[columns]
+
+        return generate()
+
     def get_data(self, filtered=True):
-        """获取数据，可选择是否返回筛选后的数据"""
-        if filtered and self.filtered_data is not None:
+        """获取数据，可选择是否返回筛选后的数据
+
+        筛选结果为行位图时第一次调用会复制选中的行（见filtered_data）；
+        只需要判断是否有数据、列名或行数时使用has_data、column_names和filtered_count。
+        """
+        if filtered and self._filter_result is not None:
             return self.filtered_data
         return self.data
+
+    def has_data(self):
+        """是否已加载数据"""
+        return self.data is not None
+
+    @property
+    def column_names(self):
+        """已载入内存的列名（不复制数据）"""
+        return list(self.data.columns) if self.data is not None else []
+
+    @property
+    def filtered_count(self):
+        """筛选后的行数；没有筛选时为全部行数（不复制数据）"""
+        result = self._filter_result
+        if isinstance(result, RowMask):
+            return result.count
+        if result is not None:
+            return len(result)
+        return len(self.data) if self.data is not None else 0
         
     def reset_filter(self):
         """重置筛选，清除筛选后的数据"""
         self.filtered_data = None
+        self.stream_filter_plan = None
+        self.filter_stack = []
 
     def get_column_names(self):
-        """获取列名列表"""
+        """获取列名列表（懒加载列模式下包括尚未载入的列）"""
+        if self.lazy_schema is not None:
+            return list(self.lazy_schema['names'])
         if self.data is not None:
             return list(self.data.columns)
         return []
@@ -119,6 +925,7 @@ class DataManager(QObject):
         """获取选定的数据"""
         if self.data is None:
             return None
+        self.ensure_columns(columns)
         
         if rows is None:
             # 如果没有指定行，则选择所有行
@@ -148,6 +955,11 @@ class DataManager(QObject):
             return False, "没有数据可处理"
         
         try:
+            # 会删除行，先载入全部列
+            success, message = self._materialize_columns()
+            if not success:
+                return False, message
+
             # 记录原始数据行数
             original_rows = len(self.data)
             
@@ -171,6 +983,7 @@ class DataManager(QObject):
             
             # 记录处理后的行数
             processed_rows = len(self.data)
+            self._on_data_changed()
             
             return True, f"数据预处理完成，移除了 {original_rows - processed_rows} 行空数据"
         except Exception as e:
@@ -182,13 +995,37 @@ class DataManager(QObject):
             return None
         
         try:
+            self.ensure_columns([column] if column else None)
+            # 流式模式和跟踪模式下计数、极值、均值和标准差由累加器给出，不需要重新扫描
+            accumulators = self.stream_stats if self.stream_stats is not None else self.follow_stats
             if column:
                 # 获取单列统计信息
                 if column not in self.data.columns:
                     return None
                 
-                series = self.data[column]
+                series = self._filtered_column(column)
                 
+                # 流式模式：计数、极值、均值和标准差来自完整扫描，分位数来自样本估计
+                if (accumulators is not None and column in accumulators
+                        and self._filter_result is None):
+                    acc = accumulators[column]
+                    return {
+                        "列名": column,
+                        "数据类型": str(series.dtype),
+                        "非空值数": acc.count,
+                        "空值数": acc.na_count,
+                        "最小值": acc.min,
+                        "最大值": acc.max,
+                        "平均值": acc.mean,
+                        "中位数": series.median(),
+                        "标准差": acc.std,
+                        "四分位数": {
+                            "25%": series.quantile(0.25),
+                            "50%": series.quantile(0.5),
+                            "75%": series.quantile(0.75)
+                        }
+                    }
+
                 # 检查是否为数值列
                 if pd.api.types.is_numeric_dtype(series):
                     stats = {
@@ -223,19 +1060,43 @@ class DataManager(QObject):
             else:
                 # 获取整体统计信息
                 numeric_data = self.data.select_dtypes(include=['number'])
+                result = self._filter_result
+                if isinstance(result, RowMask):
+                    numeric_data = numeric_data.iloc[result.indexer()]
+                elif result is not None:
+                    numeric_data = result.select_dtypes(include=['number'])
                 if not numeric_data.empty:
-                    return numeric_data.describe().to_dict()
+                    stats = numeric_data.describe().to_dict()
+                    # 流式模式下用完整扫描的结果替换样本统计量
+                    if accumulators is not None and result is None:
+                        for col, acc in accumulators.items():
+                            if col in stats:
+                                stats[col].update({
+                                    'count': acc.count, 'mean': acc.mean, 'std': acc.std,
+                                    'min': acc.min, 'max': acc.max
+                                })
+                    return stats
                 else:
                     return {"error": "没有数值列可以统计"}
         except Exception as e:
             return {"error": str(e)}
 
+    def _filtered_column(self, column):
+        """按当前筛选结果取出一列，只复制这一列"""
+        result = self._filter_result
+        if isinstance(result, RowMask):
+            return self.data[column].iloc[result.indexer()]
+        if result is not None and column in result.columns:
+            return result[column]
+        return self.data[column]
+
     def analyze_correlation(self, columns=None):
         """分析列之间的相关性"""
         if self.data is None:
             return None, "没有数据可分析"
         
         try:
+            self.ensure_columns(columns)
             # 如果没有指定列，则使用所有数值列
             if columns is None:
                 numeric_data = self.data.select_dtypes(include=['number'])
@@ -262,6 +1123,7 @@ class DataManager(QObject):
             return None, "没有数据可分析"
         
         try:
+            self.ensure_columns([column])
             if column not in self.data.columns:
                 return None, f"列 '{column}' 不存在"
             
@@ -340,6 +1202,11 @@ class DataManager(QObject):
             }
         
         try:
+            # 会删除行，先载入全部列
+            success, message = self._materialize_columns()
+            if not success:
+                return False, message
+
             # 记录原始数据行数和列数
             original_rows = len(self.data)
             original_cols = len(self.data.columns)
@@ -401,6 +1268,7 @@ class DataManager(QObject):
             
             # 更新数据
             self.data = cleaned_data
+            self._on_data_changed()
             
             # 计算变化
             cleaned_rows = len(self.data)
@@ -421,6 +1289,7 @@ class DataManager(QObject):
         if isinstance(expr_or_data, pd.DataFrame):
             # 直接设置模式
             self.filtered_data = expr_or_data
+            self.filter_stack = []
             return True, "直接设置筛选数据成功"
 
         try:
@@ -432,53 +1301,175 @@ class DataManager(QObject):
                 
             # 处理空表达式
             if not expr.strip():
-                self.filtered_data = None
+                self.clear_filtered_data()
                 return True, "已清除筛选条件"
 
-            # 修改这里：确保所有列名都被正确处理
-            all_columns = raw_data.columns.tolist()
-            # 1. 先获取所有列名
-            expr = re.sub(
-                r'\b(?!_)(?!\d)([a-zA-Z_][\w\s:-]*?)\b(?![\w\s]*`)',  # 扩展特殊字符匹配范围
-                lambda m: f'`{m.group(1)}`' if any(c in m.group(1) for c in (' ', ':', '-', '%', '#', '@')) else m.group(1),
-                expr
-            )
-            
-            # 2. 再处理普通列名（确保所有数据列都被正确引用）
-            for col in all_columns:
-                # 避免重复添加反引号
-                if f"`{col}`" not in expr and re.search(r'\b' + re.escape(col) + r'\b', expr):
-                    expr = re.sub(r'\b' + re.escape(col) + r'\b', f"`{col}`", expr)
-            
-            # 3. 提取所有引用的列名并验证
-            referenced_cols = [col.strip('`') for col in re.findall(r'`([^`]+)`', expr)]
-            missing_cols = [col for col in referenced_cols if col not in raw_data.columns]
+            start = time.perf_counter()
+            if self.lazy_schema is not None and raw_data is self.data:
+                # 先载入表达式引用的列
+                success, message = self.ensure_columns(
+                    referenced_columns(expr, self.lazy_schema['names']))
+                if not success:
+                    return False, message
+                raw_data = self.data
+            plan = self.filter_engine.compile(expr, raw_data)
+            timings = dict(self.filter_engine.last_timings)
+            self.filter_timings = timings
 
-            if missing_cols:
-                return False, f"列名不存在: {', '.join(missing_cols)}"
+            if self.stream_source is not None and raw_data is self.data:
+                return self._filter_streaming(plan)
 
-            # 打印处理后的表达式，便于调试
-            print(f"处理后的筛选表达式: {expr}")
-            filtered = raw_data.query(expr)
-            
-            if filtered.empty:
+            extra = self._refinement(plan, raw_data)
+            if extra is not None:
+                # 追加条件：只在当前筛选结果的行上计算新增的条件
+                result = self._filter_result
+                extra_plan = plan.subplan(extra)
+                if extra_plan is None:
+                    timings.update({'evaluate': 0.0, 'backend': 'refine'})
+                else:
+                    result = result.refine(extra_plan.evaluate(self.data, rows=result.indexer()))
+                    timings.update(extra_plan.last_timings)
+                    timings['backend'] = f"refine+{timings['backend']}"
+                count = result.count
+            elif raw_data is self.data:
+                result = self._evaluate_mask(plan, timings)
+                count = result.count
+            else:
+                # 对外部传入的数据筛选时直接生成DataFrame
+                result = raw_data[plan.evaluate(raw_data)]
+                timings.update(plan.last_timings)
+                count = len(result)
+            if count == 0:
                 return False, "筛选条件没有匹配到任何数据"
-            
-            self.filtered_data = filtered
-            return True, f"找到 {len(filtered)} 条匹配记录"
-            
-        except pd.errors.UndefinedVariableError as e:
-            return False, f"存在未定义的列名: {str(e).split(':')[-1]}"
+
+            timings['total'] = time.perf_counter() - start
+            self.logger.info(
+                f"筛选 {plan.text}: 编译 {timings['compile']:.4f}s"
+                f"{'（缓存）' if timings['cache_hit'] else ''}，"
+                f"求值 {timings['evaluate']:.4f}s（{timings['backend']}），"
+                f"共 {timings['total']:.4f}s"
+            )
+
+            self.filtered_data = result
+            self._push_filter(plan)
+            return True, f"找到 {count} 条匹配记录"
+
+        except UnknownColumnError as e:
+            return False, str(e)
+        except FilterSyntaxError as e:
+            return False, f"无效的筛选表达式: {str(e)}"
         except Exception as e:
             return False, f"无效的筛选表达式: {str(e)}"
     
+    def _refinement(self, plan, raw_data):
+        """当前筛选作用于完整数据且新表达式只是追加条件时，返回追加的合取项"""
+        if not self.filter_stack or raw_data is not self.data or self.filter_mask is None:
+            return None
+        previous, previous_result = self.filter_stack[-1]
+        if previous_result is not self._filter_result:
+            return None
+        return plan.refinement_of(previous)
+
+    def _push_filter(self, plan):
+        """把当前筛选结果压入历史栈，超出上限时丢弃最早的步骤"""
+        self.filter_stack.append((plan, self._filter_result))
+        if len(self.filter_stack) > self.FILTER_STACK_SIZE:
+            del self.filter_stack[0]
+
+    def undo_filter(self):
+        """撤销最近一次筛选，恢复上一步的筛选结果
+
+        Returns:
+            (bool, str, str): 是否成功、提示信息、恢复后的筛选表达式
+        """
+        if not self.filter_stack:
+            return False, "没有可撤销的筛选", ""
+        self.filter_stack.pop()
+        if not self.filter_stack:
+            self.filtered_data = None
+            self.stream_filter_plan = None
+            return True, "已撤销筛选，显示全部数据", ""
+
+        plan, result = self.filter_stack[-1]
+        self.filtered_data = result
+        if self.stream_source is not None:
+            self.stream_filter_plan = plan
+        count = result.count if isinstance(result, RowMask) else len(result)
+        return True, f"已恢复上一步筛选: {count} 条记录", plan.expr
+
+    def _evaluate_mask(self, plan, timings):
+        """对完整数据执行筛选计划，返回行位图
+
+        单调列上的范围条件通过二分查找解析为行区间，只对区间内的行计算其余条件。
+        """
+        n_rows = len(self.data)
+        resolved = self.sorted_index.resolve(plan, self.data)
+        if resolved is None:
+            mask = RowMask.from_bool(plan.evaluate(self.data))
+            timings.update(plan.last_timings)
+            return mask
+
+        rows, residual = resolved
+        mask = RowMask.from_slice(rows, n_rows)
+        if residual is None:
+            timings.update({'evaluate': 0.0, 'backend': 'sorted_index'})
+            return mask
+
+        mask = mask.refine(residual.evaluate(self.data, rows=mask.indexer()))
+        timings.update(residual.last_timings)
+        timings['backend'] = f"sorted_index+{timings['backend']}"
+        return mask
+
+    def _filter_streaming(self, plan):
+        """流式模式下逐块筛选完整文件，只保留匹配行的均匀样本"""
+        rng = np.random.default_rng()
+        sample, keys = None, None
+        matched = 0
+        row_offset = 0
+        names = list(self.data.columns)
+
+        for chunk in self.stream_source.iter_chunks(progress_callback=self.load_progress.emit):
+            chunk.columns = names[:len(chunk.columns)]
+            chunk.index = pd.RangeIndex(row_offset, row_offset + len(chunk))
+            row_offset += len(chunk)
+
+            hits = chunk[plan.evaluate(chunk)]
+            if hits.empty:
+                continue
+            matched += len(hits)
+            sample, keys = bottom_k_sample(sample, keys, hits, rng.random(len(hits)),
+                                           self.STREAM_SAMPLE_ROWS)
+
+        self.load_progress.emit(100)
+        if matched == 0:
+            return False, "筛选条件没有匹配到任何数据"
+
+        self.filtered_data = sample.sort_index()
+        self.stream_filter_plan = plan
+        self._push_filter(plan)
+        if matched > len(sample):
+            return True, f"找到 {matched} 条匹配记录（显示抽样 {len(sample)} 条）"
+        return True, f"找到 {matched} 条匹配记录"
+
     def clear_filtered_data(self):
         """清除筛选后的数据"""
         self.filtered_data = None
+        self.stream_filter_plan = None
+        self.filter_stack = []
     
+    def get_display_view(self):
+        """返回 (数据, 行位置数组)，供表格按行位置直接读取原始数据
+
+        筛选结果为行位图时不复制数据；其他情况下行位置为None。
+        """
+        mask = self.filter_mask
+        if mask is not None and self.data is not None:
+            return self.data, mask.indices()
+        return self.get_display_data(), None
+
     def get_display_data(self):
         """获取用于显示和绘图的数据（优先使用筛选后的数据）"""
-        return self.filtered_data if self.filtered_data is not None else self.data
+        return self.filtered_data if self._filter_result is not None else self.data
 
     def open_file(self, file_path):
         """打开数据文件并记录当前文件路径"""
@@ -496,13 +1487,21 @@ class DataManager(QObject):
         """获取筛选后的数据
         如果没有应用筛选，则返回原始数据
         """
-        if self.filtered_data is not None:
+        if self._filter_result is not None:
             return self.filtered_data
         return self.data
 
     def reset(self):
         """重置数据管理器状态"""
+        self.cancel_load()
+        self.stop_follow()
+        self.preview = False
+        self.lazy_schema = None
         self.data = None
         self.filtered_data = None
         self.display_data = None
+        self.filter_stack = []
+        self._clear_stream()
+        self.sorted_index.clear()
+        self.column_store.close()
         print("数据管理器已重置")
\ No newline at end of file
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+
+def memory_usage(data):
+    """返回DataFrame占用的内存字节数（包括对象列的实际内容）"""
+    return int(data.memory_usage(deep=True).sum())
+
+
+def _downcast_float(series):
+    """浮点列：只有转换为float32后数值完全不变时才降级"""
+    values = series.to_numpy()
+    # 全部为整数且没有空值的浮点列转换为最小的整数类型
+    if not np.isnan(values).any() and np.array_equal(values, np.round(values)):
+        return pd.to_numeric(series, downcast='integer')
+    as_float32 = values.astype(np.float32)
+    if np.array_equal(as_float32.astype(values.dtype), values, equal_nan=True):
+        return series.astype(np.float32)
+    return series
+
+
+def optimize_frame(data, category_ratio=0.5):
+    """降级数值列并把低基数的字符串列转换为分类类型
+
+    Args:
+        data: pandas DataFrame
+        category_ratio: float, 唯一值占比低于该值的对象列转换为category
+
+    Returns:
+        (DataFrame, dict): 优化后的数据和内存报告
+    """
+    before = memory_usage(data)
+    optimized = data.copy(deep=False)
+    changed = {}
+
+    for col in optimized.columns:
+        series = optimized[col]
+        dtype = series.dtype
+        if pd.api.types.is_bool_dtype(dtype):
+            continue
+
+        if pd.api.types.is_integer_dtype(dtype):
+            # 使用有符号整数，避免筛选表达式中的减法出现无符号回绕
+            new_series = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_float_dtype(dtype):
+            new_series = _downcast_float(series)
+        elif ((pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype))
+              and len(series) > 0):
+            # pandas 3 默认把文本列读取为str（StringDtype），不再是object
+            n_unique = series.nunique(dropna=True)
+            if n_unique / len(series) < category_ratio:
+                new_series = series.astype('category')
+            else:
+                continue
+        else:
+            continue
+
+        if new_series.dtype != dtype:
+            optimized[col] = new_series
+            changed[col] = (str(dtype), str(new_series.dtype))
+
+    after = memory_usage(optimized)
+    report = {
+        'before': before,
+        'after': after,
+        'saved_ratio': 1 - after / before if before else 0.0,
+        'changed': changed
+    }
+    return optimized, report
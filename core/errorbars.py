@@ -0,0 +1,82 @@
+import numpy as np
+
+# 端帽的半长（像素）
+CAP_PIXELS = 5
+# 误差棒短于该像素数时被标记遮住，不绘制误差棒和端帽
+MIN_BAR_PIXELS = 2.0
+# 带误差棒的散点图抽稀后保留的最大点数
+ERRORBAR_MAX_POINTS = 50_000
+# 可见点数超过该值时端帽互相重叠，不再绘制端帽
+CAP_MAX_POINTS = 5_000
+
+# 误差棒和端帽用 (n, 2, 2) 的线段数组表示，分别放入一个LineCollection，
+# 不再为每个点创建单独的artist。
+
+
+def _errors(err, n):
+    """误差数组（取绝对值）；未设置时返回None"""
+    if err is None:
+        return None
+    err = np.abs(np.asarray(err, dtype=np.float64))
+    return err if len(err) == n else None
+
+
+def bar_segments(x, y, xerr=None, yerr=None, x_per_pixel=0.0, y_per_pixel=0.0):
+    """误差棒线段：X误差为水平线段，Y误差为竖直线段
+
+    含NaN的线段被忽略；给出每像素的数据长度时，屏幕上短于MIN_BAR_PIXELS的线段也被忽略。
+    """
+    parts = []
+    xerr = _errors(xerr, len(x))
+    yerr = _errors(yerr, len(x))
+    if xerr is not None:
+        valid = np.isfinite(x) & np.isfinite(y) & np.isfinite(xerr)
+        valid &= xerr * 2 >= max(MIN_BAR_PIXELS * x_per_pixel, np.finfo(float).tiny)
+        xs, ys, es = x[valid], y[valid], xerr[valid]
+        parts.append(np.stack([np.column_stack([xs - es, ys]), np.column_stack([xs + es, ys])], axis=1))
+    if yerr is not None:
+        valid = np.isfinite(x) & np.isfinite(y) & np.isfinite(yerr)
+        valid &= yerr * 2 >= max(MIN_BAR_PIXELS * y_per_pixel, np.finfo(float).tiny)
+        xs, ys, es = x[valid], y[valid], yerr[valid]
+        parts.append(np.stack([np.column_stack([xs, ys - es]), np.column_stack([xs, ys + es])], axis=1))
+    if not parts:
+        return np.empty((0, 2, 2))
+    return np.concatenate(parts)
+
+
+def cap_segments(x, y, xerr, yerr, x_per_pixel, y_per_pixel, cap_pixels=CAP_PIXELS):
+    """误差棒两端的端帽线段
+
+    端帽长度以像素为单位，按当前坐标轴每像素对应的数据长度换算；
+    屏幕上短于MIN_BAR_PIXELS的误差棒不绘制端帽，点数超过CAP_MAX_POINTS时不绘制端帽。
+    """
+    parts = []
+    xerr = _errors(xerr, len(x))
+    yerr = _errors(yerr, len(x))
+    if cap_pixels <= 0 or len(x) > CAP_MAX_POINTS:
+        return np.empty((0, 2, 2))
+    if xerr is not None:
+        valid = np.isfinite(x) & np.isfinite(y) & (xerr * 2 >= MIN_BAR_PIXELS * x_per_pixel)
+        half = cap_pixels * y_per_pixel
+        xs, ys, es = x[valid], y[valid], xerr[valid]
+        for ends in (xs - es, xs + es):
+            parts.append(np.stack([np.column_stack([ends, ys - half]),
+                                   np.column_stack([ends, ys + half])], axis=1))
+    if yerr is not None:
+        valid = np.isfinite(x) & np.isfinite(y) & (yerr * 2 >= MIN_BAR_PIXELS * y_per_pixel)
+        half = cap_pixels * x_per_pixel
+        xs, ys, es = x[valid], y[valid], yerr[valid]
+        for ends in (ys - es, ys + es):
+            parts.append(np.stack([np.column_stack([xs - half, ends]),
+                                   np.column_stack([xs + half, ends])], axis=1))
+    if not parts:
+        return np.empty((0, 2, 2))
+    return np.concatenate(parts)
+
+
+def data_per_pixel(axes):
+    """当前坐标轴每像素对应的数据长度 (x, y)"""
+    bbox = axes.get_window_extent()
+    x0, x1 = axes.get_xlim()
+    y0, y1 = axes.get_ylim()
+    return abs(x1 - x0) / max(bbox.width, 1.0), abs(y1 - y0) / max(bbox.height, 1.0)
@@ -0,0 +1,122 @@
+import io
+import os
+import logging
+import pandas as pd
+from PyQt6.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+from core.data_loader import read_header, select_engine
+
+
+class FileFollower(QObject):
+    """跟踪只追加写入的CSV/TXT文件
+
+    记录已读取到的字节偏移，文件变大时只读取并解析新追加的完整行
+    （最后一行没有换行符时视为尚未写完，留到下次读取）。
+    文件变小或被替换（设备号、inode号改变）时偏移失效，发出file_reset。
+    文件变化由QFileSystemWatcher通知，另用定时器轮询，
+    避免网络文件系统等情况下漏掉通知。只能在GUI线程中使用。
+    """
+
+    rows_appended = pyqtSignal(object)  # 新追加的行（DataFrame，列名与表头一致）
+    file_reset = pyqtSignal()           # 文件被截断或替换，偏移已失效
+    error = pyqtSignal(str)
+
+    def __init__(self, file_path, offset, identity=None, sep=None, interval_ms=1000, parent=None):
+        """
+        Args:
+            offset: int, 已加载的数据对应的字节偏移（加载时最后一个完整行之后），从这里开始读取
+            identity: (设备号, inode号), 加载时的文件标识；为None时使用当前文件的标识
+        """
+        super().__init__(parent)
+        self.logger = logging.getLogger("PlotData.FileFollower")
+        self.file_path = file_path
+        names, self.sep = read_header(file_path, sep)
+        self.columns = [str(name).strip() for name in names]
+        # 追加的数据块很小，不需要pyarrow；C引擎还能容忍字段数不足的行（缺失值为NaN）
+        self.engine = 'c' if select_engine(self.sep) == 'pyarrow' else select_engine(self.sep)
+        self.offset = offset
+        self.identity = identity if identity is not None else self._identity(os.stat(file_path))
+
+        self.watcher = QFileSystemWatcher([file_path], self)
+        self.watcher.fileChanged.connect(self.poll)
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.poll)
+
+    def start(self):
+        """开始跟踪"""
+        self.timer.start()
+
+    def stop(self):
+        """停止跟踪"""
+        self.timer.stop()
+        if self.watcher.files():
+            self.watcher.removePaths(self.watcher.files())
+
+    def poll(self):
+        """检查文件是否有新追加的内容"""
+        # 文件被原子替换后监视会失效，重新添加
+        if self.file_path not in self.watcher.files() and os.path.exists(self.file_path):
+            self.watcher.addPath(self.file_path)
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return
+        if self._identity(stat) != self.identity:
+            self.logger.info(f"文件被替换: {self.file_path}")
+            self.identity = self._identity(stat)
+            self.offset = stat.st_size
+            self.file_reset.emit()
+            return
+        size = stat.st_size
+        if size < self.offset:
+            self.logger.info(f"文件被截断: {self.file_path}")
+            self.offset = size
+            self.file_reset.emit()
+            return
+        if size == self.offset:
+            return
+
+        try:
+            with open(self.file_path, 'rb') as f:
+                if self._identity(os.fstat(f.fileno())) != self.identity:
+                    # stat之后文件刚被替换，下次轮询时处理
+                    return
+                # 偏移前一个字节应是已读取的最后一个换行符；不是时说明文件被原位重写
+                rewritten = False
+                if self.offset > 0:
+                    f.seek(self.offset - 1)
+                    rewritten = f.read(1) != b'\n'
+                chunk = b'' if rewritten else f.read(size - self.offset)
+            if rewritten:
+                self.logger.info(f"文件被重写: {self.file_path}")
+                self.offset = size
+                self.file_reset.emit()
+                return
+            end = chunk.rfind(b'\n')
+            if end < 0:
+                return
+            chunk = chunk[:end + 1]
+            self.offset += len(chunk)
+            frame = self.parse(chunk)
+        except Exception as e:
+            self.error.emit(f"读取追加内容失败: {str(e)}")
+            return
+        if len(frame):
+            self.rows_appended.emit(frame)
+
+    @staticmethod
+    def _identity(stat):
+        """文件标识：原子替换（写入新文件后改名）会得到新的inode号"""
+        return (stat.st_dev, stat.st_ino)
+
+    def parse(self, chunk):
+        """解析新追加的字节（不含表头）"""
+        return pd.read_csv(
+            io.BytesIO(chunk),
+            sep=self.sep,
+            engine=self.engine,
+            header=None,
+            names=self.columns,
+            skip_blank_lines=True,
+            on_bad_lines='skip'
+        )
@@ -0,0 +1,675 @@
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+try:
+    import numexpr
+    HAS_NUMEXPR = True
+except ImportError:
+    HAS_NUMEXPR = False
+
+logger = logging.getLogger("PlotData.FilterEngine")
+
+# 行数少于该值时numexpr的启动开销大于收益
+NUMEXPR_MIN_ROWS = 10_000
+
+_NUMBER_RE = re.compile(r'(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?')
+_IDENT_RE = re.compile(r'[A-Za-z_]\w*')
+_OPERATORS = ['**', '<=', '>=', '==', '!=', '<', '>', '&', '|', '~', '(', ')', '[', ']', ',',
+              '+', '-', '*', '/', '%']
+_KEYWORDS = {'and': '&', 'or': '|', 'not': '~', 'in': 'in'}
+_COMPARISONS = {'<', '<=', '>', '>=', '==', '!='}
+# 与 DataFrame.query 相同的数学函数：函数名 -> 参数个数
+_FUNCTIONS = {
+    'sin': 1, 'cos': 1, 'tan': 1, 'arcsin': 1, 'arccos': 1, 'arctan': 1,
+    'sinh': 1, 'cosh': 1, 'tanh': 1, 'arcsinh': 1, 'arccosh': 1, 'arctanh': 1,
+    'exp': 1, 'expm1': 1, 'log': 1, 'log10': 1, 'log1p': 1, 'sqrt': 1, 'abs': 1,
+    'floor': 1, 'ceil': 1, 'arctan2': 2,
+}
+# numexpr不支持的函数只用numpy求值
+_NUMPY_ONLY_FUNCTIONS = {'floor', 'ceil'}
+
+
+class FilterSyntaxError(ValueError):
+    """筛选表达式语法错误"""
+
+
+class UnknownColumnError(FilterSyntaxError):
+    """筛选表达式引用了不存在的列"""
+
+    def __init__(self, columns):
+        self.columns = columns
+        super().__init__(f"列名不存在: {', '.join(columns)}")
+
+
+def _tokenize(expr, columns):
+    """把表达式拆分为记号
+
+    裸列名按已知列名做最长匹配，因此 UT1-UTC 这样包含特殊字符的列名无需反引号。
+    """
+    names = sorted(columns, key=len, reverse=True)
+    tokens = []
+    unknown = []
+    pos = 0
+    while pos < len(expr):
+        ch = expr[pos]
+        if ch.isspace():
+            pos += 1
+            continue
+
+        if ch == '`':
+            end = expr.find('`', pos + 1)
+            if end < 0:
+                raise FilterSyntaxError("反引号没有闭合")
+            name = expr[pos + 1:end]
+            if name not in columns:
+                unknown.append(name)
+            tokens.append(('col', name))
+            pos = end + 1
+            continue
+
+        if ch in '\'"':
+            end = expr.find(ch, pos + 1)
+            if end < 0:
+                raise FilterSyntaxError("字符串没有闭合")
+            tokens.append(('str', expr[pos + 1:end]))
+            pos = end + 1
+            continue
+
+        # 已知列名的最长匹配（要求在标识符边界结束）
+        matched = None
+        for name in names:
+            if expr.startswith(name, pos):
+                end = pos + len(name)
+                if end == len(expr) or not (expr[end].isalnum() or expr[end] == '_'):
+                    matched = name
+                    break
+        if matched is not None:
+            tokens.append(('col', matched))
+            pos += len(matched)
+            continue
+
+        number = _NUMBER_RE.match(expr, pos)
+        if number:
+            tokens.append(('num', float(number.group(0))))
+            pos = number.end()
+            continue
+
+        ident = _IDENT_RE.match(expr, pos)
+        if ident:
+            word = ident.group(0)
+            if word.lower() in _KEYWORDS:
+                tokens.append(('op', _KEYWORDS[word.lower()]))
+            elif word in ('True', 'False'):
+                tokens.append(('bool', word == 'True'))
+            elif word in _FUNCTIONS and expr[ident.end():].lstrip().startswith('('):
+                tokens.append(('func', word))
+            else:
+                unknown.append(word)
+                tokens.append(('col', word))
+            pos = ident.end()
+            continue
+
+        for op in _OPERATORS:
+            if expr.startswith(op, pos):
+                tokens.append(('op', op))
+                pos += len(op)
+                break
+        else:
+            raise FilterSyntaxError(f"无法识别的字符 '{ch}'（位置 {pos}）")
+
+    if unknown:
+        raise UnknownColumnError(list(dict.fromkeys(unknown)))
+    return tokens
+
+
+class _Parser:
+    """递归下降解析器，生成元组形式的语法树
+
+    优先级与 DataFrame.query 一致：比较运算符高于 & 和 |。
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def parse(self):
+        if not self.tokens:
+            raise FilterSyntaxError("表达式为空")
+        node = self._or()
+        if self.pos != len(self.tokens):
+            raise FilterSyntaxError(f"多余的内容: {self.tokens[self.pos][1]}")
+        return node
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def _accept(self, *ops):
+        kind, value = self._peek()
+        if kind == 'op' and value in ops:
+            self.pos += 1
+            return value
+        return None
+
+    def _or(self):
+        children = [self._and()]
+        while self._accept('|'):
+            children.append(self._and())
+        return _flatten('or', children)
+
+    def _and(self):
+        children = [self._not()]
+        while self._accept('&'):
+            children.append(self._not())
+        return _flatten('and', children)
+
+    def _not(self):
+        if self._accept('~'):
+            return ('not', self._not())
+        return self._comparison()
+
+    def _membership_op(self):
+        """识别 in 和 not in，返回是否取反；不是成员运算时返回None"""
+        if self._accept('in'):
+            return False
+        kind, value = self._peek()
+        following = self.tokens[self.pos + 1] if self.pos + 1 < len(self.tokens) else None
+        if kind == 'op' and value == '~' and following == ('op', 'in'):
+            self.pos += 2
+            return True
+        return None
+
+    def _comparison(self):
+        left = self._arith()
+        terms = []
+        while True:
+            negate = self._membership_op()
+            if negate is not None:
+                terms.append(_membership(left, self._arith(), negate))
+                break
+            kind, value = self._peek()
+            if kind != 'op' or value not in _COMPARISONS:
+                break
+            self.pos += 1
+            right = self._arith()
+            if value in ('==', '!=') and 'list' in (left[0], right[0]):
+                # 与 DataFrame.query 相同：和列表比较相等表示成员判断
+                if left[0] == 'list':
+                    left, right = right, left
+                terms.append(_membership(left, right, value == '!='))
+            else:
+                terms.append(('cmp', value, left, right))
+            left = right
+        if not terms:
+            return left
+        # 链式比较 a < b < c 展开为 (a < b) & (b < c)
+        return _flatten('and', terms)
+
+    def _arith(self):
+        node = self._term()
+        while True:
+            op = self._accept('+', '-')
+            if op is None:
+                return node
+            node = ('bin', op, node, self._term())
+
+    def _term(self):
+        node = self._unary()
+        while True:
+            op = self._accept('*', '/', '%')
+            if op is None:
+                return node
+            node = ('bin', op, node, self._unary())
+
+    def _unary(self):
+        if self._accept('-'):
+            return ('neg', self._unary())
+        if self._accept('+'):
+            return self._unary()
+        return self._power()
+
+    def _power(self):
+        node = self._atom()
+        if self._accept('**'):
+            node = ('bin', '**', node, self._unary())
+        return node
+
+    def _atom(self):
+        kind, value = self._peek()
+        if kind is None:
+            raise FilterSyntaxError("表达式不完整")
+        self.pos += 1
+        if kind in ('num', 'str', 'bool', 'col'):
+            return (kind, value)
+        if kind == 'func':
+            return self._call(value)
+        if kind == 'op' and value == '(':
+            node = self._or()
+            if not self._accept(')'):
+                raise FilterSyntaxError("括号没有闭合")
+            return node
+        if kind == 'op' and value == '[':
+            return self._list()
+        raise FilterSyntaxError(f"意外的符号: {value}")
+
+    def _call(self, name):
+        """函数调用 name(参数, ...)"""
+        if not self._accept('('):
+            raise FilterSyntaxError(f"函数 {name} 缺少参数")
+        args = [self._arith()]
+        while self._accept(','):
+            args.append(self._arith())
+        if not self._accept(')'):
+            raise FilterSyntaxError("括号没有闭合")
+        if len(args) != _FUNCTIONS[name]:
+            raise FilterSyntaxError(f"函数 {name} 需要 {_FUNCTIONS[name]} 个参数")
+        return ('call', name, args)
+
+    def _list(self):
+        """常量列表 [v1, v2, ...]"""
+        values = []
+        if not self._accept(']'):
+            while True:
+                value = constant_value(self._arith())
+                if value is None:
+                    raise FilterSyntaxError("列表中只能包含常量")
+                values.append(value)
+                if self._accept(']'):
+                    break
+                if not self._accept(','):
+                    raise FilterSyntaxError("列表没有闭合")
+        return ('list', tuple(values))
+
+
+def constant_value(node):
+    """常量节点（包括负数）的值；不是常量时返回None"""
+    if node[0] in ('num', 'str', 'bool'):
+        return node[1]
+    if node[0] == 'neg' and node[1][0] == 'num':
+        return -node[1][1]
+    return None
+
+
+def _membership(left, right, negate):
+    """成员判断节点 ('in', 是否取反, 左侧, 常量元组)"""
+    if right[0] != 'list':
+        value = constant_value(right)
+        if value is None:
+            raise FilterSyntaxError("in 的右侧必须是常量列表")
+        right = ('list', (value,))
+    if left[0] == 'list':
+        raise FilterSyntaxError("in 的左侧不能是列表")
+    return ('in', negate, left, right)
+
+
+def _flatten(kind, children):
+    """合并嵌套的同类逻辑节点，便于按合取项分析"""
+    if len(children) == 1:
+        return children[0]
+    flat = []
+    for child in children:
+        if child[0] == kind:
+            flat.extend(child[1])
+        else:
+            flat.append(child)
+    return (kind, flat)
+
+
+def node_columns(node, found=None):
+    """返回语法树引用的列名（按出现顺序）"""
+    if found is None:
+        found = []
+    kind = node[0]
+    if kind == 'col':
+        if node[1] not in found:
+            found.append(node[1])
+    elif kind in ('and', 'or'):
+        for child in node[1]:
+            node_columns(child, found)
+    elif kind in ('not', 'neg'):
+        node_columns(node[1], found)
+    elif kind == 'in':
+        node_columns(node[2], found)
+    elif kind == 'call':
+        for arg in node[2]:
+            node_columns(arg, found)
+    elif kind in ('cmp', 'bin'):
+        node_columns(node[2], found)
+        node_columns(node[3], found)
+    return found
+
+
+def _mentioned_columns(expr, columns):
+    """解析器不支持的表达式：按文本中出现的列名估计引用的列"""
+    return [col for col in columns if col in expr]
+
+
+def referenced_columns(expr, columns):
+    """表达式引用的列名；columns为可以识别的全部列名"""
+    columns = [str(col) for col in columns]
+    try:
+        return node_columns(_Parser(_tokenize(expr, columns)).parse())
+    except FilterSyntaxError:
+        return _mentioned_columns(expr, columns)
+
+
+def node_to_text(node):
+    """把语法树还原为规范化的表达式文本（列名带反引号）"""
+    kind = node[0]
+    if kind == 'col':
+        return f"`{node[1]}`"
+    if kind == 'num':
+        return repr(node[1])
+    if kind == 'str':
+        return repr(node[1])
+    if kind == 'bool':
+        return str(node[1])
+    if kind == 'and':
+        return " & ".join(
+            f"({node_to_text(child)})" if child[0] == 'or' else node_to_text(child)
+            for child in node[1]
+        )
+    if kind == 'or':
+        return " | ".join(node_to_text(child) for child in node[1])
+    if kind == 'not':
+        return f"~({node_to_text(node[1])})"
+    if kind == 'neg':
+        return f"-({node_to_text(node[1])})"
+    if kind == 'list':
+        return f"[{', '.join(repr(value) for value in node[1])}]"
+    if kind == 'in':
+        op = 'not in' if node[1] else 'in'
+        return f"({node_to_text(node[2])} {op} {node_to_text(node[3])})"
+    if kind == 'call':
+        return f"{node[1]}({', '.join(node_to_text(arg) for arg in node[2])})"
+    if kind == 'query':
+        return f"({node[1]})"
+    return f"({node_to_text(node[2])} {node[1]} {node_to_text(node[3])})"
+
+
+_NUMPY_OPS = {
+    '<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal,
+    '==': np.equal, '!=': np.not_equal,
+    '+': np.add, '-': np.subtract, '*': np.multiply, '/': np.true_divide,
+    '%': np.mod, '**': np.power,
+}
+
+
+def column_array(data, name, rows=None):
+    """取出列的计算用数组：数值列统一为float64，其余列为object数组
+
+    rows为行位置数组或切片时只取出这些行。
+    """
+    series = data[name]
+    if rows is not None:
+        series = series.iloc[rows]
+    if pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.asarray(series.astype(object))
+
+
+class FilterPlan:
+    """编译后的筛选计划，可对任意具有相同列结构的数据重复求值"""
+
+    def __init__(self, expr, tree, numeric_columns):
+        self.expr = expr
+        self.tree = tree
+        self.numeric_columns = numeric_columns
+        self.columns = node_columns(tree)
+        self.text = node_to_text(tree)
+        self._numexpr_source = None
+        if HAS_NUMEXPR and all(col in numeric_columns for col in self.columns):
+            self._numexpr_source = self._to_numexpr(tree)
+        self.last_timings = {}
+
+    @property
+    def conjuncts(self):
+        """顶层的合取项列表（整个表达式为 c1 & c2 & ... ）"""
+        if self.tree[0] == 'and':
+            return list(self.tree[1])
+        return [self.tree]
+
+    def refinement_of(self, previous):
+        """判断本计划是否是在previous基础上追加条件得到的
+
+        Returns:
+            list: 需要追加计算的合取项（与previous相同时为空列表）；不是追加关系时返回None
+        """
+        previous_keys = {node_to_text(node) for node in previous.conjuncts}
+        own = {node_to_text(node): node for node in self.conjuncts}
+        if not previous_keys.issubset(own):
+            return None
+        return [node for key, node in own.items() if key not in previous_keys]
+
+    def subplan(self, conjuncts):
+        """用部分合取项组成新的筛选计划；没有合取项时返回None"""
+        if not conjuncts:
+            return None
+        tree = conjuncts[0] if len(conjuncts) == 1 else ('and', list(conjuncts))
+        return FilterPlan(node_to_text(tree), tree, self.numeric_columns)
+
+    def _to_numexpr(self, node):
+        """生成numexpr表达式；包含字符串常量时返回None"""
+        kind = node[0]
+        if kind == 'col':
+            return f"c{self.columns.index(node[1])}"
+        if kind == 'num':
+            return repr(node[1])
+        if kind == 'bool':
+            return str(node[1])
+        if kind == 'str':
+            return None
+        if kind in ('and', 'or'):
+            parts = [self._to_numexpr(child) for child in node[1]]
+            if None in parts:
+                return None
+            joiner = ' & ' if kind == 'and' else ' | '
+            return joiner.join(f"({part})" for part in parts)
+        if kind in ('not', 'neg'):
+            inner = self._to_numexpr(node[1])
+            if inner is None:
+                return None
+            return f"~({inner})" if kind == 'not' else f"-({inner})"
+        if kind == 'in':
+            left = self._to_numexpr(node[2])
+            values = node[3][1]
+            if left is None or not values or any(isinstance(value, str) for value in values):
+                return None
+            op, joiner = ('!=', ' & ') if node[1] else ('==', ' | ')
+            return "(" + joiner.join(f"({left} {op} {value!r})" for value in values) + ")"
+        if kind == 'call':
+            if node[1] in _NUMPY_ONLY_FUNCTIONS:
+                return None
+            args = [self._to_numexpr(arg) for arg in node[2]]
+            if None in args:
+                return None
+            return f"{node[1]}({', '.join(args)})"
+        left = self._to_numexpr(node[2])
+        right = self._to_numexpr(node[3])
+        if left is None or right is None:
+            return None
+        return f"({left} {node[1]} {right})"
+
+    def _eval_numpy(self, node, arrays):
+        kind = node[0]
+        if kind == 'col':
+            return arrays[node[1]]
+        if kind in ('num', 'str', 'bool'):
+            return node[1]
+        if kind == 'and':
+            result = self._eval_numpy(node[1][0], arrays)
+            for child in node[1][1:]:
+                result = np.logical_and(result, self._eval_numpy(child, arrays))
+            return result
+        if kind == 'or':
+            result = self._eval_numpy(node[1][0], arrays)
+            for child in node[1][1:]:
+                result = np.logical_or(result, self._eval_numpy(child, arrays))
+            return result
+        if kind == 'not':
+            return np.logical_not(self._eval_numpy(node[1], arrays))
+        if kind == 'neg':
+            return np.negative(self._eval_numpy(node[1], arrays))
+        if kind == 'in':
+            found = np.isin(self._eval_numpy(node[2], arrays), list(node[3][1]))
+            return np.logical_not(found) if node[1] else found
+        if kind == 'call':
+            args = [self._eval_numpy(arg, arrays) for arg in node[2]]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return getattr(np, node[1])(*args)
+        if kind == 'list':
+            raise FilterSyntaxError("列表只能用于 in 或 == 比较")
+        left = self._eval_numpy(node[2], arrays)
+        right = self._eval_numpy(node[3], arrays)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return _NUMPY_OPS[node[1]](left, right)
+
+    def evaluate(self, data, rows=None):
+        """对数据求值，返回布尔掩码数组
+
+        rows为行位置数组或切片时只对这些行求值，只复制表达式引用的列。
+        """
+        start = time.perf_counter()
+        arrays = {col: column_array(data, col, rows) for col in self.columns}
+        fetch_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if rows is None:
+            n_rows = len(data)
+        elif isinstance(rows, slice):
+            n_rows = len(range(*rows.indices(len(data))))
+        else:
+            n_rows = len(rows)
+        if self._numexpr_source is not None and n_rows >= NUMEXPR_MIN_ROWS:
+            local_dict = {f"c{i}": arrays[col] for i, col in enumerate(self.columns)}
+            mask = numexpr.evaluate(self._numexpr_source, local_dict=local_dict)
+            backend = 'numexpr'
+        else:
+            mask = self._eval_numpy(self.tree, arrays)
+            backend = 'numpy'
+
+        mask = np.asarray(mask)
+        if mask.dtype != bool:
+            raise FilterSyntaxError("筛选表达式的结果不是布尔值")
+        if mask.ndim == 0:
+            # 常量表达式（如 True）
+            mask = np.full(n_rows, bool(mask))
+
+        self.last_timings = {
+            'fetch': fetch_time,
+            'evaluate': time.perf_counter() - start,
+            'backend': backend
+        }
+        return mask
+
+
+class QueryPlan:
+    """解析器不支持的表达式：退回到 DataFrame.eval 求值
+
+    与FilterPlan接口相同，但不能做增量筛选和单调列索引优化。
+    """
+
+    def __init__(self, expr, columns):
+        self.expr = expr
+        self.text = expr
+        self.tree = ('query', expr)
+        self.columns = columns
+        self.last_timings = {}
+
+    @property
+    def conjuncts(self):
+        return [self.tree]
+
+    def refinement_of(self, previous):
+        return None
+
+    def subplan(self, conjuncts):
+        return None
+
+    def evaluate(self, data, rows=None):
+        """对数据求值，返回布尔掩码数组；rows为行位置数组或切片时只对这些行求值"""
+        start = time.perf_counter()
+        # 先取行再取列，只对新增的行求值时不复制整列
+        frame = data.iloc[rows] if rows is not None else data
+        if self.columns:
+            frame = frame[self.columns]
+        fetch_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        try:
+            mask = frame.eval(self.expr)
+        except Exception as e:
+            raise FilterSyntaxError(str(e)) from e
+        mask = np.asarray(mask)
+        if mask.dtype != bool:
+            raise FilterSyntaxError("筛选表达式的结果不是布尔值")
+        if mask.ndim == 0:
+            mask = np.full(len(frame), bool(mask))
+        self.last_timings = {
+            'fetch': fetch_time,
+            'evaluate': time.perf_counter() - start,
+            'backend': 'pandas'
+        }
+        return mask
+
+
+class FilterEngine:
+    """筛选表达式编译器，按表达式文本和列结构缓存编译结果"""
+
+    def __init__(self, max_plans=64):
+        self.max_plans = max_plans
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self.last_timings = {}
+
+    @staticmethod
+    def schema_key(data):
+        """列名和列类型组成的结构键"""
+        return tuple((str(col), str(dtype)) for col, dtype in data.dtypes.items())
+
+    def compile(self, expr, data):
+        """编译表达式，命中缓存时直接返回已有计划"""
+        start = time.perf_counter()
+        key = (expr, self.schema_key(data))
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self.last_timings = {'compile': time.perf_counter() - start, 'cache_hit': True}
+                return plan
+
+        columns = [str(col) for col in data.columns]
+        try:
+            tree = _Parser(_tokenize(expr, columns)).parse()
+        except FilterSyntaxError as e:
+            plan = self._query_plan(expr, data, columns, e)
+        else:
+            numeric_columns = {
+                str(col) for col, dtype in data.dtypes.items()
+                if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+            }
+            plan = FilterPlan(expr, tree, numeric_columns)
+
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+        self.last_timings = {'compile': time.perf_counter() - start, 'cache_hit': False}
+        logger.info(f"编译筛选表达式: {plan.text}")
+        return plan
+
+    @staticmethod
+    def _query_plan(expr, data, columns, error):
+        """解析失败时检查 DataFrame.eval 能否处理该表达式；不能时抛出原来的错误"""
+        mentioned = [col for col in _mentioned_columns(expr, columns) if col in data.columns]
+        plan = QueryPlan(expr, mentioned)
+        try:
+            plan.evaluate(data.iloc[:1])
+        except Exception:
+            raise error
+        logger.info(f"筛选表达式由 DataFrame.eval 求值: {expr}（{error}）")
+        return plan
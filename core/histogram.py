@@ -0,0 +1,113 @@
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from core.binning import BIN_CHUNK_ROWS, default_workers, data_range
+
+# 流式直方图的基础分箱数：先按细粒度分箱累加，修改分箱数时由基础直方图重新分箱。
+# 7200能被常用的分箱数（10、20、30、40、50、60、100、200等）整除，重新分箱结果精确
+BASE_BINS = 7200
+
+
+class HistogramAccumulator:
+    """等宽分箱的直方图累加器
+
+    边界固定为 [lower, upper] 上的bins个等宽分箱，逐块累加计数（或权重和），
+    分箱编号由数值直接换算，不需要二分查找；上边界上的值归入最后一个分箱，
+    与np.histogram一致。多个线程的部分结果可以用merge合并。
+    """
+
+    def __init__(self, lower, upper, bins):
+        self.lower = float(lower)
+        self.upper = float(upper)
+        self.bins = int(bins)
+        self.counts = np.zeros(self.bins, dtype=np.float64)
+
+    @property
+    def edges(self):
+        return np.linspace(self.lower, self.upper, self.bins + 1)
+
+    @property
+    def nbytes(self):
+        return self.counts.nbytes
+
+    @property
+    def total(self):
+        return float(self.counts.sum())
+
+    def empty_like(self):
+        """边界相同的空累加器"""
+        return HistogramAccumulator(self.lower, self.upper, self.bins)
+
+    def add(self, values, weights=None):
+        """累加一批数值；NaN和范围外的值被忽略"""
+        values = np.asarray(values, dtype=np.float64)
+        # NaN的比较结果为False，不需要单独检查
+        valid = (values >= self.lower) & (values <= self.upper)
+        kept = values[valid]
+        index = ((kept - self.lower) * (self.bins / ((self.upper - self.lower) or 1.0))).astype(np.intp)
+        np.minimum(index, self.bins - 1, out=index)
+        # 与np.histogram相同：按实际边界修正落在边界附近的舍入误差
+        edges = self.edges
+        index -= kept < edges[index]
+        index += (kept >= edges[index + 1]) & (index != self.bins - 1)
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64)[valid]
+        self.counts += np.bincount(index, weights=weights, minlength=self.bins)
+        return self
+
+    def merge(self, other):
+        """合并边界相同的另一个累加器"""
+        if (other.lower, other.upper, other.bins) != (self.lower, self.upper, self.bins):
+            raise ValueError("只能合并分箱边界相同的直方图")
+        self.counts += other.counts
+        return self
+
+    def rebin(self, bins, lower=None, upper=None):
+        """由当前（细粒度）直方图生成新分箱的直方图，不再读取原始数据
+
+        新边界与当前边界对齐时（如分箱数整除）结果精确；否则按分箱内均匀分布
+        对累计计数线性插值，误差不超过一个细分箱的计数。
+        """
+        lower = self.lower if lower is None else float(lower)
+        upper = self.upper if upper is None else float(upper)
+        result = HistogramAccumulator(lower, upper, bins)
+        if (lower, upper) == (self.lower, self.upper) and self.bins % result.bins == 0:
+            # 边界对齐：相邻的细分箱直接相加
+            result.counts = self.counts.reshape(result.bins, -1).sum(axis=1)
+            return result
+        cumulative = np.concatenate([[0.0], np.cumsum(self.counts)])
+        result.counts = np.diff(np.interp(result.edges, self.edges, cumulative))
+        return result
+
+
+def accumulate(values, bins, lower=None, upper=None, weights=None,
+               chunk_rows=BIN_CHUNK_ROWS, workers=None):
+    """分块（多线程）计算直方图
+
+    Args:
+        values: float64数组
+        bins: int, 分箱数
+        lower, upper: 分箱范围；未设置时使用有限值的极值
+        weights: 每个值的权重
+        workers: int, 线程数；为None时按CPU核数确定
+
+    Returns:
+        HistogramAccumulator
+    """
+    lower, upper = data_range(values, lower, upper)
+    result = HistogramAccumulator(lower, upper, bins)
+    starts = range(0, len(values), chunk_rows)
+
+    def partial(start):
+        stop = start + chunk_rows
+        return result.empty_like().add(values[start:stop],
+                                       None if weights is None else weights[start:stop])
+
+    workers = default_workers() if workers is None else workers
+    if workers > 1 and len(starts) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(starts))) as executor:
+            for part in executor.map(partial, starts):
+                result.merge(part)
+    else:
+        for start in starts:
+            result.merge(partial(start))
+    return result
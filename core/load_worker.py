@@ -0,0 +1,75 @@
+import logging
+import threading
+import traceback
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, QRunnable
+
+
+class LoadCancelled(Exception):
+    """数据文件的加载已被取消"""
+
+
+class LoadWorkerSignals(QObject):
+    """加载线程信号类，每个信号都携带加载任务的编号"""
+    loaded = pyqtSignal(int, object)  # 解析完成，携带加载结果（尚未应用到DataManager）
+    failed = pyqtSignal(int, str)     # 加载失败，携带错误消息
+    cancelled = pyqtSignal(int)       # 加载被取消
+    progress = pyqtSignal(int, int)   # 已读取字节的百分比
+
+
+class LoadWorker(QRunnable):
+    """文件加载工作线程
+
+    只调用DataManager.read_dataset（或read指定的其他读取方法）解析文件，不修改当前数据集；
+    结果通过loaded信号交给GUI线程，由DataManager.install_dataset替换数据。
+    每次报告进度时检查取消标志，已取消时抛出LoadCancelled中断解析。
+    """
+
+    def __init__(self, data_manager, generation, file_path, sep=None, read=None, **options):
+        super().__init__()
+        self.setAutoDelete(True)
+
+        self.data_manager = data_manager
+        self.generation = generation
+        self.file_path = file_path
+        self.sep = sep
+        # 读取方法：read(file_path, sep, progress_callback=..., **options) -> (结果, 消息)
+        self.read = read if read is not None else data_manager.read_dataset
+        self.options = options
+        self._cancel = threading.Event()
+
+        self.signals = LoadWorkerSignals()
+        self.logger = logging.getLogger("PlotData.LoadWorker")
+
+    def cancel(self):
+        """请求取消加载（在下一次报告进度时生效）"""
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def _report(self, percent):
+        """进度回调：已取消时中断解析"""
+        if self._cancel.is_set():
+            raise LoadCancelled()
+        self.signals.progress.emit(self.generation, percent)
+
+    @pyqtSlot()
+    def run(self):
+        """线程执行函数"""
+        try:
+            self.logger.info(f"开始加载: {self.file_path}")
+            result, message = self.read(
+                self.file_path, self.sep, progress_callback=self._report, **self.options)
+            if self._cancel.is_set():
+                raise LoadCancelled()
+            if result is None:
+                self.signals.failed.emit(self.generation, message)
+            else:
+                self.signals.loaded.emit(self.generation, result)
+        except LoadCancelled:
+            self.logger.info(f"已取消加载: {self.file_path}")
+            self.signals.cancelled.emit(self.generation)
+        except Exception as e:
+            self.logger.error(f"加载线程异常: {str(e)}\n{traceback.format_exc()}")
+            self.signals.failed.emit(self.generation, f"数据加载失败: {str(e)}")
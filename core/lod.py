@@ -0,0 +1,293 @@
+import numpy as np
+from core.binning import aggregate
+from core.errorbars import bar_segments, cap_segments, data_per_pixel, ERRORBAR_MAX_POINTS
+
+# 数据点少于该值时直接绘制全部数据
+LOD_MIN_POINTS = 20_000
+# 散点图抽稀后保留的最大点数
+SCATTER_MAX_POINTS = 200_000
+
+
+def is_sorted(x):
+    """检查数组是否单调不减（不含NaN）"""
+    return len(x) < 2 or bool(np.all(x[1:] >= x[:-1]))
+
+
+def _first_per_bucket(positions, buckets):
+    """positions升序、buckets单调不减时，返回每个桶中的第一个位置"""
+    if len(positions) == 0:
+        return positions
+    first = np.empty(len(positions), dtype=bool)
+    first[0] = True
+    np.not_equal(buckets[1:], buckets[:-1], out=first[1:])
+    return positions[first]
+
+
+def _stable_keys(indices):
+    """由行位置生成固定的伪随机数，缩放时抽样结果保持稳定"""
+    hashed = (indices.astype(np.uint64) * np.uint64(2654435761)) % np.uint64(2 ** 32)
+    return hashed / float(2 ** 32)
+
+
+def decimate_line(x, y, width, x_range=None, x_sorted=None):
+    """折线图的最小/最大值抽稀
+
+    把可见范围内的数据按像素列分桶，每个桶只保留第一个点、最后一个点以及
+    y的最小值和最大值所在的点，绘制结果与全部数据在像素上一致。
+
+    Args:
+        x, y: float64数组
+        width: int, 绘图区域宽度（像素）
+        x_range: (x0, x1), 可见范围；为None时使用全部数据
+        x_sorted: bool, x是否已排序；为None时自动检测
+
+    Returns:
+        np.ndarray: 需要绘制的行位置（升序）
+    """
+    n = len(x)
+    if x_sorted is None:
+        x_sorted = is_sorted(x)
+    width = max(int(width), 1)
+
+    if x_sorted:
+        start, stop = 0, n
+        if x_range is not None:
+            # 多保留可见范围外侧的一个点，使线段延伸到边界
+            start = max(int(np.searchsorted(x, x_range[0], side='left')) - 1, 0)
+            stop = min(int(np.searchsorted(x, x_range[1], side='right')) + 1, n)
+        indices = np.arange(start, stop)
+    elif x_range is not None:
+        visible = (x >= x_range[0]) & (x <= x_range[1])
+        visible[1:] |= visible[:-1].copy()
+        visible[:-1] |= visible[1:].copy()
+        indices = np.flatnonzero(visible)
+    else:
+        indices = np.arange(n)
+
+    if len(indices) <= 4 * width:
+        return indices
+
+    xs = x[indices]
+    ys = y[indices]
+    m = len(indices)
+    if x_sorted and xs[-1] > xs[0]:
+        edges = np.linspace(xs[0], xs[-1], width + 1)
+        starts = np.searchsorted(xs, edges[:-1], side='left')
+    else:
+        # x无序时按数据顺序等量分组
+        starts = np.linspace(0, m, width + 1).astype(np.intp)[:-1]
+    starts = np.unique(starts)
+    counts = np.diff(np.append(starts, m))
+    buckets = np.repeat(np.arange(len(starts)), counts)
+
+    mins = np.fmin.reduceat(ys, starts)
+    maxs = np.fmax.reduceat(ys, starts)
+    at_min = np.flatnonzero(ys == mins[buckets])
+    at_max = np.flatnonzero(ys == maxs[buckets])
+
+    keep = np.concatenate([
+        starts,
+        starts + counts - 1,
+        _first_per_bucket(at_min, buckets[at_min]),
+        _first_per_bucket(at_max, buckets[at_max])
+    ])
+    return indices[np.unique(keep)]
+
+
+def thin_scatter(x, y, width, height, x_range=None, y_range=None, max_points=SCATTER_MAX_POINTS):
+    """散点图的保密度抽稀
+
+    可见的点按固定的伪随机数均匀抽样，保持点的疏密分布；
+    同时每个被占据的像素至少保留一个点，孤立点和边缘不会丢失。
+
+    Returns:
+        np.ndarray: 需要绘制的行位置（升序）
+    """
+    valid = np.isfinite(x) & np.isfinite(y)
+    if x_range is not None:
+        valid &= (x >= x_range[0]) & (x <= x_range[1])
+    if y_range is not None:
+        valid &= (y >= y_range[0]) & (y <= y_range[1])
+    indices = np.flatnonzero(valid)
+    m = len(indices)
+    if m <= max_points:
+        return indices
+
+    xs = x[indices]
+    ys = y[indices]
+    x0, x1 = x_range if x_range is not None else (xs.min(), xs.max())
+    y0, y1 = y_range if y_range is not None else (ys.min(), ys.max())
+    width = max(int(width), 1)
+    height = max(int(height), 1)
+
+    keep = _stable_keys(indices) < max_points / m
+
+    px = np.clip(((xs - x0) / ((x1 - x0) or 1.0) * width).astype(np.intp), 0, width - 1)
+    py = np.clip(((ys - y0) / ((y1 - y0) or 1.0) * height).astype(np.intp), 0, height - 1)
+    first = np.full(width * height, m, dtype=np.intp)
+    np.minimum.at(first, py * width + px, np.arange(m))
+    keep[first[first < m]] = True
+    return indices[keep]
+
+
+class LODController:
+    """把全分辨率数据和已绘制的artist关联起来
+
+    坐标轴范围变化（缩放、平移）后，只对可见范围重新抽稀并更新artist，
+    分辨率跟随绘图区域的像素大小。
+    """
+
+    def __init__(self, axes, kind, x, y, artist, debounce_ms=50):
+        self.axes = axes
+        self.kind = kind  # 'line' 或 'scatter'
+        self.x = x
+        self.y = y
+        self.artist = artist
+        self.debounce_ms = debounce_ms
+        self.x_sorted = is_sorted(x) if kind == 'line' else False
+        # 为True时（如拖动过程中）暂停重新抽稀
+        self.suspended = False
+        self._updating = False
+        self._timer = None
+        # 先确定自动缩放的范围，避免首次绘制时触发范围变化回调
+        axes.get_xlim()
+        axes.get_ylim()
+        self._cids = [
+            axes.callbacks.connect('xlim_changed', self._on_limits_changed),
+            axes.callbacks.connect('ylim_changed', self._on_limits_changed)
+        ]
+
+    def pixel_size(self):
+        """绘图区域的像素大小"""
+        bbox = self.axes.get_window_extent()
+        return max(int(bbox.width), 1), max(int(bbox.height), 1)
+
+    def select(self):
+        """按当前可见范围计算需要绘制的行位置"""
+        width, height = self.pixel_size()
+        x_range = tuple(sorted(self.axes.get_xlim()))
+        if self.kind == 'line':
+            return decimate_line(self.x, self.y, width, x_range, x_sorted=self.x_sorted)
+        y_range = tuple(sorted(self.axes.get_ylim()))
+        return thin_scatter(self.x, self.y, width, height, x_range, y_range)
+
+    def _on_limits_changed(self, axes):
+        if self.suspended or self._updating:
+            return
+        # 定时器在GUI线程中第一次需要时创建
+        if self._timer is None:
+            self._timer = self.axes.figure.canvas.new_timer(interval=self.debounce_ms)
+            self._timer.single_shot = True
+            self._timer.add_callback(self.update)
+        self._timer.stop()
+        self._timer.start()
+
+    def update(self):
+        """重新抽稀可见范围并刷新artist"""
+        if self.suspended or self.artist is None:
+            return
+        self._updating = True
+        try:
+            self._refresh()
+        finally:
+            self._updating = False
+        self.axes.figure.canvas.draw_idle()
+
+    def _refresh(self):
+        indices = self.select()
+        if self.kind == 'line':
+            self.artist.set_data(self.x[indices], self.y[indices])
+        else:
+            self.artist.set_offsets(np.column_stack([self.x[indices], self.y[indices]]))
+
+    def extend(self, x, y):
+        """在全分辨率数据末尾追加点（跟踪文件时），由调用方随后调用update刷新"""
+        x = np.asarray(x, dtype=np.float64)
+        if self.x_sorted and len(x):
+            # 只检查新增部分及其与原数据末尾的衔接
+            self.x_sorted = is_sorted(np.concatenate([self.x[-1:], x]))
+        self.x = np.concatenate([self.x, x])
+        self.y = np.concatenate([self.y, np.asarray(y, dtype=np.float64)])
+
+    def detach(self):
+        """断开与坐标轴的连接"""
+        for cid in self._cids:
+            self.axes.callbacks.disconnect(cid)
+        self._cids = []
+        if self._timer is not None:
+            self._timer.stop()
+            self._timer = None
+        self.artist = None
+
+
+def raster_grid(x, y, x_range, y_range, width, height):
+    """按像素聚合点数，零计数的单元被掩蔽（显示为透明）"""
+    counts = aggregate(x, y, x_range, y_range, width, height)
+    return np.ma.masked_equal(counts, 0)
+
+
+class RasterController(LODController):
+    """栅格渲染模式：把点聚合为画布分辨率的计数网格，缩放后重新聚合可见范围"""
+
+    def __init__(self, axes, x, y, image):
+        super().__init__(axes, 'raster', x, y, image)
+
+    def _refresh(self):
+        width, height = self.pixel_size()
+        x0, x1 = sorted(self.axes.get_xlim())
+        y0, y1 = sorted(self.axes.get_ylim())
+        grid = raster_grid(self.x, self.y, (x0, x1), (y0, y1), width, height)
+        self.artist.set_data(grid)
+        self.artist.set_extent((x0, x1, y0, y1))
+        vmax = grid.max()
+        self.artist.norm.vmax = 1.0 if vmax is np.ma.masked else max(float(vmax), 1.0)
+
+
+class ErrorbarController(LODController):
+    """带误差棒的散点图：缩放后重新抽稀点，并按新的像素比例重建误差棒和端帽
+
+    artist为标记的Line2D，bars和caps为LineCollection（caps可以为None）。
+    """
+
+    def __init__(self, axes, x, y, xerr, yerr, artist, bars, caps):
+        self.xerr = xerr
+        self.yerr = yerr
+        self.bars = bars
+        self.caps = caps
+        # 可见范围外的点的误差棒可能伸入可见范围，选择时按最大误差扩展范围
+        self.x_margin = self._max_error(xerr)
+        self.y_margin = self._max_error(yerr)
+        super().__init__(axes, 'scatter', x, y, artist)
+
+    @staticmethod
+    def _max_error(err):
+        if err is None or len(err) == 0:
+            return 0.0
+        value = np.fmax.reduce(np.abs(err))
+        return float(value) if np.isfinite(value) else 0.0
+
+    def select(self):
+        width, height = self.pixel_size()
+        x0, x1 = sorted(self.axes.get_xlim())
+        y0, y1 = sorted(self.axes.get_ylim())
+        return thin_scatter(self.x, self.y, width, height,
+                            (x0 - self.x_margin, x1 + self.x_margin),
+                            (y0 - self.y_margin, y1 + self.y_margin),
+                            max_points=ERRORBAR_MAX_POINTS)
+
+    def _refresh(self):
+        indices = self.select()
+        x = self.x[indices]
+        y = self.y[indices]
+        xerr = None if self.xerr is None else self.xerr[indices]
+        yerr = None if self.yerr is None else self.yerr[indices]
+        scale = data_per_pixel(self.axes)
+        self.artist.set_data(x, y)
+        self.bars.set_segments(bar_segments(x, y, xerr, yerr, *scale))
+        if self.caps is not None:
+            self.caps.set_segments(cap_segments(x, y, xerr, yerr, *scale))
+
+    def detach(self):
+        super().detach()
+        self.bars = None
+        self.caps = None
@@ -0,0 +1,131 @@
+import glob
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+from core.data_loader import read_file
+
+# 合并后记录每行来源文件的列
+SOURCE_COLUMN = 'source_file'
+
+# 打开文件夹时读取的文件类型
+SUPPORTED_EXTENSIONS = ('.csv', '.txt', '.xlsx', '.xls', '.json')
+
+logger = logging.getLogger("PlotData.MultiLoader")
+
+
+def expand_paths(pattern):
+    """把文件夹、通配符或路径列表展开为按文件名排序的文件列表"""
+    if isinstance(pattern, (list, tuple)):
+        return [path for path in dict.fromkeys(pattern) if os.path.isfile(path)]
+    if os.path.isdir(pattern):
+        return sorted(
+            os.path.join(pattern, name) for name in os.listdir(pattern)
+            if name.lower().endswith(SUPPORTED_EXTENSIONS)
+            and os.path.isfile(os.path.join(pattern, name))
+        )
+    return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+
+
+def default_processes():
+    """并行解析的进程数"""
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+def _read_one(file_path, sep=None):
+    """在子进程中解析一个文件
+
+    Returns:
+        (DataFrame, dict, str, float): 数据、加载信息、错误消息和耗时；失败时数据为None
+    """
+    start = time.perf_counter()
+    data, load_info, error = None, None, None
+    try:
+        data, load_info = read_file(file_path, sep)
+        if load_info is None:
+            error = "不支持的格式"
+        elif data is None or data.empty:
+            error = "文件为空"
+        else:
+            data.columns = data.columns.str.strip()
+    except Exception as e:
+        error = str(e)
+    if error is not None:
+        data, load_info = None, None
+    return data, load_info, error, time.perf_counter() - start
+
+
+def read_many(paths, sep=None, processes=None, progress_callback=None):
+    """用进程池并行解析多个文件并按文件顺序合并
+
+    单个文件失败不会中断其他文件，失败原因记录在报告中。
+
+    Args:
+        paths: list, 文件路径
+        sep: str, 分隔符，为None时每个文件单独嗅探
+        processes: int, 进程数；为None时按CPU核数确定
+        progress_callback: callable, 接收已完成文件的百分比(0-100)；
+            在其中抛出的异常会取消尚未开始的文件并向上传递
+
+    Returns:
+        (DataFrame, list): 合并后的数据（增加SOURCE_COLUMN列，全部失败时为None）
+        和每个文件的报告 [{'file', 'rows', 'seconds', 'engine', 'error'}, ...]
+    """
+    processes = default_processes() if processes is None else processes
+    processes = max(1, min(processes, len(paths)))
+    results = {}
+
+    def collect(path, outcome):
+        data, load_info, error, elapsed = outcome
+        results[path] = (data, {
+            'file': path,
+            'rows': 0 if data is None else len(data),
+            'seconds': elapsed,
+            'engine': None if load_info is None else load_info['engine'],
+            'error': error
+        })
+        if error is not None:
+            logger.warning(f"解析 {os.path.basename(path)} 失败: {error}")
+        else:
+            logger.info(f"解析 {os.path.basename(path)}: {len(data)} 行，耗时 {elapsed:.3f}s")
+        if progress_callback is not None:
+            progress_callback(len(results) * 100 // len(paths))
+
+    start = time.perf_counter()
+    if processes == 1:
+        for path in paths:
+            collect(path, _read_one(path, sep))
+    else:
+        # spawn启动的子进程不继承GUI线程的状态
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+            futures = {executor.submit(_read_one, path, sep): path for path in paths}
+            try:
+                for future in as_completed(futures):
+                    try:
+                        outcome = future.result()
+                    except Exception as e:
+                        # 子进程异常退出等情况
+                        outcome = (None, None, str(e), time.perf_counter() - start)
+                    collect(futures[future], outcome)
+            except BaseException:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    report = [results[path][1] for path in paths]
+    frames = []
+    for path in paths:
+        data = results[path][0]
+        if data is not None:
+            data[SOURCE_COLUMN] = os.path.basename(path)
+            frames.append(data)
+    if not frames:
+        return None, report
+
+    merged = pd.concat(frames, ignore_index=True, sort=False)
+    merged[SOURCE_COLUMN] = merged[SOURCE_COLUMN].astype('category')
+    logger.info(f"并行解析 {len(paths)} 个文件（{processes} 个进程）: "
+                f"成功 {len(frames)} 个，共 {len(merged)} 行，耗时 {time.perf_counter() - start:.3f}s")
+    return merged, report
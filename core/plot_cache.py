@@ -0,0 +1,78 @@
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+def _nbytes(value):
+    """估算准备结果占用的内存"""
+    if isinstance(value, np.ma.MaskedArray):
+        return value.data.nbytes + np.ma.getmaskarray(value).nbytes
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(item) for item in value)
+    return getattr(value, 'nbytes', 0)
+
+
+def freeze(value):
+    """把分箱参数等转换为可哈希的键"""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, np.ndarray):
+        return (value.shape, value.tobytes())
+    return value
+
+
+class PlotCache:
+    """绘图数据准备结果的内存缓存
+
+    以（绘图类型、数据版本、筛选版本、列名、分箱等参数）为键，保存工作线程
+    准备好的数值数组和分箱结果。只修改标题、颜色等样式时直接复用，
+    不再转换数据类型和重新分箱。总大小超过上限时按最近最少使用的顺序淘汰。
+    多个工作线程可以同时访问。
+    """
+
+    def __init__(self, max_bytes=512 * 1024 ** 2):
+        self.logger = logging.getLogger("PlotData.PlotCache")
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # 键 -> (准备结果, 字节数)
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """读取缓存，未命中时返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, arrays):
+        """写入缓存；单个结果超过上限时不缓存"""
+        size = _nbytes(arrays)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total -= old[1]
+            self._entries[key] = (arrays, size)
+            self._total += size
+            while self._total > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._total -= evicted
+                self.logger.info(f"淘汰绘图缓存条目: {evicted} 字节")
+
+    @property
+    def total_bytes(self):
+        return self._total
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._total = 0
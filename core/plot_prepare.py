@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+from core.binning import data_range
+from core.density import density_grid
+from core.histogram import accumulate
+from core.errorbars import bar_segments, ERRORBAR_MAX_POINTS
+from core.lod import LOD_MIN_POINTS, SCATTER_MAX_POINTS, decimate_line, thin_scatter, raster_grid
+
+# 自动渲染模式下，点数超过该值时散点图改为栅格渲染
+RASTER_MIN_POINTS = 2_000_000
+
+# 本模块只做数值计算，不访问figure和画布，可以在工作线程中并行执行；
+# 返回的数组由Visualizer在GUI线程中应用到artist。
+
+
+def column_values(data, col):
+    """取出一列的float64数组"""
+    return pd.to_numeric(data[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def axis_range(lower, upper):
+    """用户设置的坐标轴范围；未设置或无效时返回None"""
+    if lower is None or upper is None or lower == upper:
+        return None
+    return min(lower, upper), max(lower, upper)
+
+
+def use_raster(render_mode, n_points):
+    """判断散点类图表是否使用栅格渲染"""
+    if render_mode == 'raster':
+        return True
+    return render_mode == 'auto' and n_points > RASTER_MIN_POINTS
+
+
+def prepare_xy(data, x_col, y_col, kind, pixel_size, render_mode='auto',
+               limits=(None, None, None, None), xerr_col=None, yerr_col=None):
+    """准备散点图、带误差棒的散点图和折线图的数据
+
+    Args:
+        kind: 'scatter'、'errorbar' 或 'line'
+        pixel_size: (宽, 高), 绘图区域的像素大小，决定抽稀和栅格的分辨率
+        limits: (x_min, x_max, y_min, y_max), 用户设置的坐标轴范围
+
+    Returns:
+        dict: x、y为完整数据；indices为抽稀后需要绘制的行位置（None表示全部绘制）；
+        栅格模式下grid为计数网格，x_range、y_range为其范围；
+        误差棒图另有xerr、yerr和误差棒线段bars
+    """
+    x_min, x_max, y_min, y_max = limits
+    width, height = pixel_size
+    x = column_values(data, x_col)
+    y = column_values(data, y_col)
+    arrays = {'x': x, 'y': y, 'indices': None, 'grid': None}
+
+    if kind != 'line' and use_raster(render_mode, len(x)):
+        # 点数过多时按像素聚合，误差棒小于像素，不再绘制
+        x_range = data_range(x, x_min, x_max)
+        y_range = data_range(y, y_min, y_max)
+        arrays['grid'] = raster_grid(x, y, x_range, y_range, width, height)
+        arrays['x_range'] = x_range
+        arrays['y_range'] = y_range
+        return arrays
+
+    if len(x) > LOD_MIN_POINTS:
+        x_range = axis_range(x_min, x_max)
+        if kind == 'line':
+            arrays['indices'] = decimate_line(x, y, width, x_range)
+        else:
+            arrays['indices'] = thin_scatter(
+                x, y, width, height, x_range, axis_range(y_min, y_max),
+                max_points=ERRORBAR_MAX_POINTS if kind == 'errorbar' else SCATTER_MAX_POINTS)
+
+    if kind == 'errorbar':
+        xerr = column_values(data, xerr_col) if xerr_col and xerr_col != "无" else None
+        yerr = column_values(data, yerr_col) if yerr_col and yerr_col != "无" else None
+        arrays['xerr'] = xerr
+        arrays['yerr'] = yerr
+        # 误差棒线段只为抽稀后保留的点生成，按初始范围估算像素比例忽略看不见的短线段；
+        # 端帽与最终的坐标轴范围有关，在GUI线程中生成
+        rows = arrays['indices'] if arrays['indices'] is not None else slice(None)
+        x_lo, x_hi = data_range(x, x_min, x_max)
+        y_lo, y_hi = data_range(y, y_min, y_max)
+        arrays['bars'] = bar_segments(x[rows], y[rows],
+                                      None if xerr is None else xerr[rows],
+                                      None if yerr is None else yerr[rows],
+                                      (x_hi - x_lo) / width, (y_hi - y_lo) / height)
+    return arrays
+
+
+def histogram_arrays(accumulator, weighted=False):
+    """直方图累加器转换为绘图数组"""
+    return {'counts': accumulator.counts, 'edges': accumulator.edges, 'weighted': weighted}
+
+
+def prepare_histogram(data, col, bins, weights=None):
+    """计算直方图的计数和分箱边界
+
+    bins为整数时用等宽分箱的累加器分块计算；为边界数组时使用np.histogram。
+
+    Returns:
+        dict: counts, edges, weighted（是否为预分箱的计数）
+    """
+    values = column_values(data, col)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)
+    if np.ndim(bins) == 0:
+        return histogram_arrays(accumulate(values, int(bins), weights=weights), weights is not None)
+    finite = np.isfinite(values)
+    counts, edges = np.histogram(values[finite], bins=bins,
+                                 weights=None if weights is None else weights[finite])
+    return {'counts': counts, 'edges': edges, 'weighted': weights is not None}
+
+
+def prepare_density(data, x_col, y_col, bins, weights=None):
+    """计算2D密度图的计数网格
+
+    Returns:
+        dict: h（形状为 (x分箱数, y分箱数)）, x_edges, y_edges, count（有效点数）, weighted
+    """
+    x = column_values(data, x_col)
+    y = column_values(data, y_col)
+    valid = np.isfinite(x) & np.isfinite(y)
+    count = int(np.count_nonzero(valid))
+    arrays = {'h': None, 'x_edges': None, 'y_edges': None, 'count': count,
+              'weighted': weights is not None}
+    if count == 0:
+        return arrays
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64)
+    # 无效点在分箱时被忽略，不需要先复制有效部分
+    h, x_edges, y_edges = density_grid(x, y, bins, weights=weights)
+    arrays.update(h=h, x_edges=x_edges, y_edges=y_edges)
+    return arrays
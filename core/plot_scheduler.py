@@ -0,0 +1,120 @@
+import logging
+import threading
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+
+
+class PlotCancelled(Exception):
+    """绘图任务已被更新的请求取代"""
+
+
+class PlotJob:
+    """一次绘图请求
+
+    generation为递增的请求编号。工作线程在各个检查点调用check()，
+    任务被取消后抛出PlotCancelled，放弃剩余的计算。
+    """
+
+    def __init__(self, generation):
+        self.generation = generation
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self):
+        """取消检查点"""
+        if self._cancelled.is_set():
+            raise PlotCancelled()
+
+
+class _JobRelay(QObject):
+    """在GUI线程中接收单个任务的信号，转发前检查任务是否仍是最新的"""
+
+    def __init__(self, scheduler, job):
+        super().__init__()
+        self.scheduler = scheduler
+        self.job = job
+
+    def _is_current(self):
+        return self.scheduler.current_job is self.job
+
+    @pyqtSlot(object)
+    def on_prepared(self, payload):
+        if not self._is_current():
+            self.scheduler.logger.info(f"丢弃过期的绘图结果 #{self.job.generation}")
+            return
+        self.scheduler._finish()
+        self.scheduler.prepared.emit(payload)
+
+    @pyqtSlot(bool, str)
+    def on_finished(self, success, message):
+        if not self._is_current():
+            return
+        self.scheduler._finish()
+        self.scheduler.finished.emit(success, message)
+
+    @pyqtSlot(int)
+    def on_progress(self, value):
+        if self._is_current():
+            self.scheduler.progress.emit(value)
+
+    @pyqtSlot(str)
+    def on_error(self, message):
+        if self._is_current():
+            self.scheduler.error.emit(message)
+
+
+class PlotScheduler(QObject):
+    """绘图任务调度：只保留最新的请求
+
+    提交新任务时取消正在执行的任务；已取消任务的结果、进度和错误都被丢弃，
+    只有最新一代任务的信号会转发出去。
+    """
+
+    prepared = pyqtSignal(object)     # 最新任务的PlotPayload
+    finished = pyqtSignal(bool, str)  # 最新任务失败时的状态和消息
+    progress = pyqtSignal(int)        # 最新任务的进度
+    error = pyqtSignal(str)           # 最新任务的错误
+
+    def __init__(self, thread_pool, parent=None):
+        super().__init__(parent)
+        self.thread_pool = thread_pool
+        self.generation = 0
+        self.current_job = None
+        self._relay = None
+        self.logger = logging.getLogger("PlotData.PlotScheduler")
+
+    def submit(self, worker):
+        """取消当前任务并启动新的工作线程"""
+        self.cancel()
+        self.generation += 1
+        job = PlotJob(self.generation)
+        self.current_job = job
+        worker.job = job
+
+        # 中转对象在GUI线程中创建，工作线程的信号以排队方式送达
+        relay = _JobRelay(self, job)
+        signals = worker.signals
+        signals.prepared.connect(relay.on_prepared)
+        signals.finished.connect(relay.on_finished)
+        signals.progress.connect(relay.on_progress)
+        signals.error.connect(relay.on_error)
+        self._relay = relay
+
+        self.thread_pool.start(worker)
+        return job
+
+    def cancel(self):
+        """取消正在执行的任务"""
+        if self.current_job is not None:
+            self.current_job.cancel()
+            self.logger.info(f"取消绘图任务 #{self.current_job.generation}")
+        self._finish()
+
+    def _finish(self):
+        # 中转对象保留到下一次提交时再释放，避免在它自己的槽函数中被销毁
+        self.current_job = None
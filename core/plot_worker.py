@@ -1,29 +1,62 @@
 import logging
 from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot, QRunnable, QThreadPool
 import pandas as pd
+import numpy as np
 import traceback
+from core.plot_prepare import prepare_xy, prepare_histogram, prepare_density, histogram_arrays
+from core.histogram import HistogramAccumulator, BASE_BINS
+from core.density import density_grid
+from core.plot_scheduler import PlotCancelled
+from core.plot_cache import freeze
+
+
+class PlotPayload:
+    """工作线程准备好的绘图数据
+
+    arrays为分箱计数、抽稀后的行位置等可以直接绘制的数组，kwargs为样式参数。
+    由Visualizer.render在GUI线程中应用到artist。
+    """
+
+    def __init__(self, plot_type, arrays, kwargs):
+        self.plot_type = plot_type
+        self.arrays = arrays
+        self.kwargs = kwargs
+
 
 class PlotWorkerSignals(QObject):
     """工作线程信号类，用于在线程间通信"""
     # 定义信号
     finished = pyqtSignal(bool, str)  # 完成信号，返回成功状态和消息
+    prepared = pyqtSignal(object)     # 绘图数据准备完成，携带PlotPayload
     progress = pyqtSignal(int)        # 进度信号
     error = pyqtSignal(str)           # 错误信号
 
 class PlotWorker(QRunnable):
-    """绘图工作线程类，用于处理耗时的绘图操作"""
+    """绘图工作线程类
+
+    只负责数据转换、流式分箱、抽稀等数值计算，不访问matplotlib的figure；
+    结果通过prepared信号交给GUI线程绘制。
+    """
     
-    def __init__(self, visualizer, plot_type, data, **kwargs):
+    def __init__(self, plot_type, data, stream=None, cache=None, **kwargs):
         super().__init__()
         
         # 设置线程优先级
         self.setAutoDelete(True)
         
         # 保存参数
-        self.visualizer = visualizer
         self.plot_type = plot_type
-        self.data = data.copy()  # 创建数据副本，避免修改原始数据
+        self.data = data  # 只读的列视图，需要转换类型时再浅拷贝
         self.kwargs = kwargs
+        # 流式模式的数据管理器，直方图和2D密度图将逐块累加完整数据
+        self.stream = stream
+        self.weights = None
+        # 流式模式下累加得到的直方图（HistogramAccumulator）
+        self.histogram = None
+        # 准备结果的缓存（PlotCache），只改样式时直接复用
+        self.cache = cache
+        # 由PlotScheduler设置的任务，用于协作式取消
+        self.job = None
         
         # 创建信号对象
         self.signals = PlotWorkerSignals()
@@ -36,32 +69,43 @@ class PlotWorker(QRunnable):
     def run(self):
         """线程执行函数"""
         try:
-            self.logger.info(f"开始执行绘图任务: {self.plot_type}")
-            
-            # 预处理数据，确保数据类型正确
-            self._preprocess_data()
-            
-            # 根据绘图类型调用不同的绘图方法
-            result = False
-            message = ""
-            
-            if self.plot_type == "散点图":
-                result, message = self._draw_scatter()
-            elif self.plot_type == "带误差棒的散点图":
-                result, message = self._draw_scatter_with_error()
-            elif self.plot_type == "直方图":
-                result, message = self._draw_histogram()
-            elif self.plot_type == "2D密度图":
-                result, message = self._draw_density_map_2d()
-            elif self.plot_type == "线图":
-                result, message = self._draw_line()
+            self._checkpoint()
+            self.logger.info(f"开始准备绘图数据: {self.plot_type}")
+
+            cache_key = self._cache_key()
+            arrays = self.cache.get(cache_key) if cache_key is not None else None
+            if arrays is not None:
+                self.logger.info(f"使用缓存的绘图数据: {self.plot_type}")
+                if self.stream is not None and self.plot_type in ("直方图", "2D密度图"):
+                    # 渲染时的结构键与未命中时保持一致
+                    self.kwargs['bins'] = arrays.get('bins', self.kwargs.get('bins'))
             else:
-                message = f"不支持的绘图类型: {self.plot_type}"
-                self.logger.error(message)
-            
-            # 发送完成信号
-            self.signals.finished.emit(result, message)
+                # 预处理数据，确保数据类型正确
+                self._preprocess_data()
+                self._checkpoint()
+
+                # 流式模式下，对完整文件逐块分箱，替换为预分箱数据
+                if self.stream is not None and self.plot_type in ("直方图", "2D密度图"):
+                    self._reduce_stream()
+                    self._checkpoint()
+                
+                # 只计算数组，由GUI线程应用到画布
+                arrays = self._prepare()
+                self._checkpoint()
+                if arrays is None:
+                    message = f"不支持的绘图类型: {self.plot_type}"
+                    self.logger.error(message)
+                    self.signals.finished.emit(False, message)
+                    return
+                if cache_key is not None:
+                    if self.stream is not None:
+                        arrays['bins'] = self.kwargs.get('bins')
+                    self.cache.put(cache_key, arrays)
+
+            self.signals.prepared.emit(PlotPayload(self.plot_type, arrays, self.kwargs))
             
+        except PlotCancelled:
+            self.logger.info(f"绘图任务已取消: {self.plot_type}")
         except Exception as e:
             # 记录错误并发送错误信号
             error_msg = f"绘图过程中发生错误: {str(e)}"
@@ -70,6 +114,28 @@ class PlotWorker(QRunnable):
             self.signals.error.emit(error_msg)
             self.signals.finished.emit(False, error_msg)
     
+    def _cache_key(self):
+        """准备结果的缓存键：绘图类型、数据标识（数据版本、筛选版本、列名）和影响结果的参数"""
+        data_key = self.kwargs.get('data_key')
+        if self.cache is None or data_key is None:
+            return None
+        limits = (self.kwargs.get('x_min'), self.kwargs.get('x_max'),
+                  self.kwargs.get('y_min'), self.kwargs.get('y_max'))
+        if self.plot_type in ("直方图", "2D密度图"):
+            # 流式模式按坐标轴范围分箱
+            params = (freeze(self.kwargs.get('bins', 50)),
+                      limits if self.stream is not None else None)
+        else:
+            # 抽稀和栅格与像素大小、渲染模式和可见范围有关
+            params = (tuple(self.kwargs.get('pixel_size', ())),
+                      self.kwargs.get('render_mode', 'auto'), limits)
+        return (self.plot_type, data_key, params)
+
+    def _checkpoint(self):
+        """取消检查点：任务被更新的请求取代时抛出PlotCancelled"""
+        if self.job is not None:
+            self.job.check()
+
     def _preprocess_data(self):
         """预处理数据，确保数据类型正确"""
         # 获取列名
@@ -78,238 +144,105 @@ class PlotWorker(QRunnable):
         xerr_col = self.kwargs.get('xerr_col')
         yerr_col = self.kwargs.get('yerr_col')
         
-        # 确保X和Y列是数值类型
-        if x_col and x_col in self.data.columns:
-            self.data[x_col] = pd.to_numeric(self.data[x_col], errors='coerce')
-        
-        if y_col and y_col in self.data.columns:
-            self.data[y_col] = pd.to_numeric(self.data[y_col], errors='coerce')
-        
-        # 处理误差列
-        if xerr_col and xerr_col in self.data.columns:
-            self.data[xerr_col] = pd.to_numeric(self.data[xerr_col], errors='coerce')
-        
-        if yerr_col and yerr_col in self.data.columns:
-            self.data[yerr_col] = pd.to_numeric(self.data[yerr_col], errors='coerce')
-    
-    def _draw_scatter(self):
-        """绘制散点图"""
-        x_col = self.kwargs.get('x_col')
-        y_col = self.kwargs.get('y_col')
-        color = self.kwargs.get('color', 'blue')
-        alpha = self.kwargs.get('alpha', 0.7)
-        mark_style = self.kwargs.get('mark_style', 'o')
-        mark_size = self.kwargs.get('mark_size', 10)
-        alpha = self.kwargs.get('alpha', 0.7)
-        title = self.kwargs.get('title')
-        x_label = self.kwargs.get('x_label')
-        y_label = self.kwargs.get('y_label')
-        x_min = self.kwargs.get('x_min')
-        x_max = self.kwargs.get('x_max')
-        y_min = self.kwargs.get('y_min')
-        y_max = self.kwargs.get('y_max')
-        x_major_ticks = self.kwargs.get('x_major_ticks', 5)
-        x_minor_ticks = self.kwargs.get('x_minor_ticks', 1)
-        x_show_grid = self.kwargs.get('x_show_grid', True)
-        y_major_ticks = self.kwargs.get('y_major_ticks', 5)
-        y_minor_ticks = self.kwargs.get('y_minor_ticks', 1)
-        y_show_grid = self.kwargs.get('y_show_grid', True)
-        
-        return self.visualizer.scatter_plot(
-            self.data, x_col, y_col, 
-            title=title, 
-            x_label=x_label, 
-            y_label=y_label, 
-            color=color, 
-            alpha=alpha, 
-            mark_size=mark_size, 
-            mark_style=mark_style,
-            x_major_ticks=x_major_ticks,
-            x_minor_ticks=x_minor_ticks,
-            x_show_grid=x_show_grid,
-            y_major_ticks=y_major_ticks,
-            y_minor_ticks=y_minor_ticks,
-            y_show_grid=y_show_grid,
-            x_min=x_min,
-            x_max=x_max,
-            y_min=y_min,
-            y_max=y_max
-        )
+        # 确保X、Y和误差列是数值类型（已是数值类型的列不再转换）
+        copied = False
+        for col in (x_col, y_col, xerr_col, yerr_col):
+            if not col or col not in self.data.columns:
+                continue
+            if pd.api.types.is_numeric_dtype(self.data[col]):
+                continue
+            if not copied:
+                # 浅拷贝，避免修改调用方的数据
+                self.data = self.data.copy(deep=False)
+                copied = True
+            self.data[col] = pd.to_numeric(self.data[col], errors='coerce')
     
-    def _draw_scatter_with_error(self):
-        """绘制带误差棒的散点图"""
+    def _value_range(self, col, lower, upper):
+        """确定分箱范围：优先使用用户设置的坐标轴范围，否则使用完整扫描的极值"""
+        if lower is not None and upper is not None and lower != upper:
+            return lower, upper
+        acc = self.stream.stream_stats.get(col) if self.stream.stream_stats else None
+        if acc is not None and acc.count > 0:
+            lo, hi = acc.min, acc.max
+        else:
+            values = self.data[col].dropna()
+            lo, hi = values.min(), values.max()
+        if lo == hi:
+            lo, hi = lo - 0.5, hi + 0.5
+        return lo, hi
+
+    def _reduce_stream(self):
+        """逐块累加完整数据的分箱计数，只在内存中保留计数数组"""
         x_col = self.kwargs.get('x_col')
         y_col = self.kwargs.get('y_col')
-        xerr_col = self.kwargs.get('xerr_col')
-        yerr_col = self.kwargs.get('yerr_col')
-        color = self.kwargs.get('color', 'blue')
-        alpha = self.kwargs.get('alpha', 0.7)
-        mark_style = self.kwargs.get('mark_style', 'o')
-        mark_size = self.kwargs.get('mark_size', 10)
-        alpha = self.kwargs.get('alpha', 0.7)
-        title = self.kwargs.get('title')
-        x_label = self.kwargs.get('x_label')
-        y_label = self.kwargs.get('y_label')
-        x_min = self.kwargs.get('x_min')
-        x_max = self.kwargs.get('x_max')
-        y_min = self.kwargs.get('y_min')
-        y_max = self.kwargs.get('y_max')
-        x_major_ticks = self.kwargs.get('x_major_ticks', 5)
-        x_minor_ticks = self.kwargs.get('x_minor_ticks', 1)
-        x_show_grid = self.kwargs.get('x_show_grid', True)
-        y_major_ticks = self.kwargs.get('y_major_ticks', 5)
-        y_minor_ticks = self.kwargs.get('y_minor_ticks', 1)
-        y_show_grid = self.kwargs.get('y_show_grid', True)
-         
-        return self.visualizer.scatter_plot_with_error(
-            self.data, x_col, y_col, 
-            xerr_col=xerr_col, 
-            yerr_col=yerr_col, 
-            title=title, 
-            x_label=x_label, 
-            y_label=y_label, 
-            color=color, 
-            alpha=alpha, 
-            mark_size=mark_size, 
-            mark_style=mark_style,
-            x_major_ticks=x_major_ticks,
-            x_minor_ticks=x_minor_ticks,
-            x_show_grid=x_show_grid,
-            y_major_ticks=y_major_ticks,
-            y_minor_ticks=y_minor_ticks,
-            y_show_grid=y_show_grid,
-            x_min=x_min,
-            x_max=x_max,
-            y_min=y_min,
-            y_max=y_max
-        )
-    
-    def _draw_histogram(self):
-        """绘制直方图"""
-        x_col = self.kwargs.get('x_col')
         bins = self.kwargs.get('bins', 50)
-        histtype = self.kwargs.get('histtype', 'bar')
-        color = self.kwargs.get('color', 'blue')
-        alpha = self.kwargs.get('alpha', 0.7)
-        title = self.kwargs.get('title')
-        x_label = self.kwargs.get('x_label')
-        y_label = self.kwargs.get('y_label', '次数')
-        x_min = self.kwargs.get('x_min')
-        x_max = self.kwargs.get('x_max')
-        y_min = self.kwargs.get('y_min')
-        y_max = self.kwargs.get('y_max')
-        x_major_ticks = self.kwargs.get('x_major_ticks', 5)
-        x_minor_ticks = self.kwargs.get('x_minor_ticks', 1)
-        x_show_grid = self.kwargs.get('x_show_grid', True)
-        y_major_ticks = self.kwargs.get('y_major_ticks', 5)
-        y_minor_ticks = self.kwargs.get('y_minor_ticks', 1)
-        y_show_grid = self.kwargs.get('y_show_grid', True)
-        
-        return self.visualizer.histogram(
-            self.data, x_col, 
-            bins=bins, 
-            title=title, 
-            x_label=x_label, 
-            y_label=y_label, 
-            color=color, 
-            alpha=alpha,
-            histtype=histtype, 
-            x_major_ticks=x_major_ticks,
-            x_minor_ticks=x_minor_ticks,
-            x_show_grid=x_show_grid,
-            y_major_ticks=y_major_ticks,
-            y_minor_ticks=y_minor_ticks,
-            y_show_grid=y_show_grid,
-            x_min=x_min,
-            x_max=x_max,
-            y_min=y_min,
-            y_max=y_max
-        )
-    
-    def _draw_density_map_2d(self):
-        """绘制2D密度图"""
+        x_edges = np.linspace(*self._value_range(x_col, self.kwargs.get('x_min'), self.kwargs.get('x_max')), bins + 1)
+
+        if self.plot_type == "直方图":
+            lower, upper = sorted((float(x_edges[0]), float(x_edges[-1])))
+            self.histogram = self._base_histogram(x_col, lower, upper, bins).rebin(bins)
+        else:
+            x_edges = np.sort(x_edges)
+            y_edges = np.sort(np.linspace(*self._value_range(y_col, self.kwargs.get('y_min'), self.kwargs.get('y_max')), bins + 1))
+            counts = np.zeros((bins, bins))
+            for chunk in self.stream.iter_display_chunks([x_col, y_col], self.signals.progress.emit):
+                self._checkpoint()
+                x = pd.to_numeric(chunk[x_col], errors='coerce').to_numpy(dtype=float)
+                y = pd.to_numeric(chunk[y_col], errors='coerce').to_numpy(dtype=float)
+                # 与内存中的2D密度图使用同一个bincount累加器，NaN在其中被忽略
+                counts += density_grid(x, y, bins=[x_edges, y_edges])[0]
+            x_centers = (x_edges[:-1] + x_edges[1:]) / 2
+            y_centers = (y_edges[:-1] + y_edges[1:]) / 2
+            X, Y = np.meshgrid(x_centers, y_centers, indexing='ij')
+            self.data = pd.DataFrame({x_col: X.ravel(), y_col: Y.ravel()})
+            self.weights = counts.ravel()
+            self.kwargs['bins'] = [x_edges, y_edges]
+        self.signals.progress.emit(100)
+
+    def _base_histogram(self, col, lower, upper, bins):
+        """细粒度的基础直方图
+
+        逐块累加完整文件一次后放入缓存；之后修改分箱数时直接重新分箱，
+        不再读取文件。
+        """
+        base_bins = max(BASE_BINS, bins)
+        key = None
+        if self.cache is not None and self.kwargs.get('data_key') is not None:
+            key = ("直方图基础", self.kwargs.get('data_key'), (lower, upper, base_bins))
+            base = self.cache.get(key)
+            if base is not None:
+                self.logger.info("使用缓存的基础直方图重新分箱")
+                return base
+
+        base = HistogramAccumulator(lower, upper, base_bins)
+        for chunk in self.stream.iter_display_chunks([col], self.signals.progress.emit):
+            self._checkpoint()
+            base.add(pd.to_numeric(chunk[col], errors='coerce').to_numpy(dtype=float))
+        if key is not None:
+            self.cache.put(key, base)
+        return base
+
+    def _prepare(self):
+        """计算绘图需要的数组（不访问figure和画布）"""
         x_col = self.kwargs.get('x_col')
         y_col = self.kwargs.get('y_col')
         bins = self.kwargs.get('bins', 50)
-        colormap = self.kwargs.get('colormap', 'viridis')
-        colorbar_scale = self.kwargs.get('colorbar_scale', '线性')
-        title = self.kwargs.get('title')
-        x_label = self.kwargs.get('x_label')
-        y_label = self.kwargs.get('y_label')
-        x_min = self.kwargs.get('x_min')
-        x_max = self.kwargs.get('x_max')
-        y_min = self.kwargs.get('y_min')
-        y_max = self.kwargs.get('y_max')
-        x_major_ticks = self.kwargs.get('x_major_ticks', 5)
-        x_minor_ticks = self.kwargs.get('x_minor_ticks', 1)
-        x_show_grid = self.kwargs.get('x_show_grid', True)
-        y_major_ticks = self.kwargs.get('y_major_ticks', 5)
-        y_minor_ticks = self.kwargs.get('y_minor_ticks', 1)
-        y_show_grid = self.kwargs.get('y_show_grid', True)
-        
-        return self.visualizer.density_map_2d(
-            self.data, x_col, y_col, 
-            bins=bins, 
-            title=title, 
-            x_label=x_label, 
-            y_label=y_label, 
-            colormap=colormap,
-            colorbar_scale=colorbar_scale,
-            x_major_ticks=x_major_ticks,
-            x_minor_ticks=x_minor_ticks,
-            x_show_grid=x_show_grid,
-            y_major_ticks=y_major_ticks,
-            y_minor_ticks=y_minor_ticks,
-            y_show_grid=y_show_grid,
-            x_min=x_min,
-            x_max=x_max,
-            y_min=y_min,
-            y_max=y_max
-        )
-    
-    def _draw_line(self):
-        """绘制线图"""
-        x_col = self.kwargs.get('x_col')
-        y_col = self.kwargs.get('y_col')
-        color = self.kwargs.get('color', 'blue')
-        alpha = self.kwargs.get('alpha', 0.7)
-        mark_style = self.kwargs.get('mark_style', 'o')
-        mark_size = self.kwargs.get('mark_size', 10)
-        line_style = self.kwargs.get('line_style', '-')
-        line_width = self.kwargs.get('line_width', 2)
-        title = self.kwargs.get('title')
-        x_label = self.kwargs.get('x_label')
-        y_label = self.kwargs.get('y_label')
-        x_min = self.kwargs.get('x_min')
-        x_max = self.kwargs.get('x_max')
-        y_min = self.kwargs.get('y_min')
-        y_max = self.kwargs.get('y_max')
-        x_major_ticks = self.kwargs.get('x_major_ticks', 5)
-        x_minor_ticks = self.kwargs.get('x_minor_ticks', 1)
-        x_show_grid = self.kwargs.get('x_show_grid', True)
-        y_major_ticks = self.kwargs.get('y_major_ticks', 5)
-        y_minor_ticks = self.kwargs.get('y_minor_ticks', 1)
-        y_show_grid = self.kwargs.get('y_show_grid', True)
-        
-        return self.visualizer.line_plot(
-            self.data, x_col, y_col, 
-            title=title, 
-            x_label=x_label, 
-            y_label=y_label, 
-            color=color, 
-            alpha=alpha,
-            marker=mark_style,
-            marker_size = mark_size,
-            linestyle=line_style,
-            linewidth=line_width,
-            x_major_ticks=x_major_ticks,
-            x_minor_ticks=x_minor_ticks,
-            x_show_grid=x_show_grid,
-            y_major_ticks=y_major_ticks,
-            y_minor_ticks=y_minor_ticks,
-            y_show_grid=y_show_grid,
-            x_min=x_min,
-            x_max=x_max,
-            y_min=y_min,
-            y_max=y_max
-        )
\ No newline at end of file
+        pixel_size = self.kwargs.get('pixel_size', (640, 480))
+        render_mode = self.kwargs.get('render_mode', 'auto')
+        limits = (self.kwargs.get('x_min'), self.kwargs.get('x_max'),
+                  self.kwargs.get('y_min'), self.kwargs.get('y_max'))
+
+        if self.plot_type == "散点图":
+            return prepare_xy(self.data, x_col, y_col, 'scatter', pixel_size, render_mode, limits)
+        if self.plot_type == "带误差棒的散点图":
+            return prepare_xy(self.data, x_col, y_col, 'errorbar', pixel_size, render_mode, limits,
+                              self.kwargs.get('xerr_col'), self.kwargs.get('yerr_col'))
+        if self.plot_type == "直方图":
+            if self.histogram is not None:
+                return histogram_arrays(self.histogram, weighted=True)
+            return prepare_histogram(self.data, x_col, bins, self.weights)
+        if self.plot_type == "2D密度图":
+            return prepare_density(self.data, x_col, y_col, bins, self.weights)
+        if self.plot_type == "线图":
+            return prepare_xy(self.data, x_col, y_col, 'line', pixel_size, render_mode, limits)
+        return None
@@ -0,0 +1,198 @@
+import numpy as np
+
+
+def _popcount(bits):
+    """统计打包位数组中置位的个数"""
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(bits).sum(dtype=np.int64))
+    return int(np.unpackbits(bits).sum(dtype=np.int64))
+
+
+def _grow(buffer, size, needed, dtype):
+    """返回容量至少为needed的数组，前size个元素与原数组相同（容量按倍数扩大）"""
+    if buffer is not None and needed <= len(buffer):
+        return buffer
+    grown = np.zeros(max(int(needed * 1.5), 16), dtype=dtype)
+    if buffer is not None:
+        grown[:size] = buffer[:size]
+    return grown
+
+
+def _span_bits(start, stop, length):
+    """直接生成行区间 [start, stop) 的打包位数组，只写入区间覆盖的字节"""
+    bits = np.zeros((length + 7) // 8, dtype=np.uint8)
+    if stop <= start:
+        return bits
+    first, last = start // 8, (stop - 1) // 8
+    head = 0xFF >> (start % 8)
+    tail = (0xFF << (7 - (stop - 1) % 8)) & 0xFF
+    if first == last:
+        bits[first] = head & tail
+    else:
+        bits[first] = head
+        bits[first + 1:last] = 0xFF
+        bits[last] = tail
+    return bits
+
+
+class RowMask:
+    """按位打包的行选择结果
+
+    每行只占1位，筛选结果不再复制DataFrame；多个结果之间的与、或、非
+    直接在打包的字节上按位计算。连续区间的结果只保存切片（位数组在需要时才生成），
+    取数据时可以走零拷贝的切片路径。数据末尾追加行时原位扩展（位数组和行位置数组
+    预留容量），开销只与新增的行数有关。
+    """
+
+    __slots__ = ('_bits', 'length', '_count', '_span', '_indices', '_index_buffer')
+
+    def __init__(self, bits, length, count=None, span=None):
+        # 位数组可能预留了容量，有效部分是前 (length + 7) // 8 个字节
+        self._bits = bits
+        self.length = length
+        self._count = count
+        self._span = span
+        self._indices = None
+        self._index_buffer = None
+
+    @property
+    def bits(self):
+        """打包的位数组（区间结果第一次访问时生成）"""
+        if self._bits is None:
+            self._bits = _span_bits(self._span.start, self._span.stop, self.length)
+        return self._bits[:(self.length + 7) // 8]
+
+    @classmethod
+    def from_bool(cls, mask):
+        """由布尔数组创建"""
+        mask = np.asarray(mask, dtype=bool)
+        return cls(np.packbits(mask), len(mask), count=int(np.count_nonzero(mask)))
+
+    @classmethod
+    def from_indices(cls, indices, length):
+        """由升序的行位置数组创建"""
+        indices = np.asarray(indices, dtype=np.intp)
+        bits = np.zeros((length + 7) // 8, dtype=np.uint8)
+        np.bitwise_or.at(bits, indices >> 3, (0x80 >> (indices & 7)).astype(np.uint8))
+        result = cls(bits, length, count=len(indices))
+        result._indices = indices
+        return result
+
+    @classmethod
+    def from_slice(cls, rows, length):
+        """由行区间创建"""
+        start, stop, _ = rows.indices(length)
+        stop = max(start, stop)
+        return cls(None, length, count=stop - start, span=slice(start, stop))
+
+    @property
+    def count(self):
+        """选中的行数"""
+        if self._count is None:
+            self._count = _popcount(self.bits)
+        return self._count
+
+    @property
+    def nbytes(self):
+        return 0 if self._bits is None else self._bits.nbytes
+
+    def any(self):
+        return self.count > 0
+
+    def to_bool(self):
+        """展开为布尔数组"""
+        if self._bits is None:
+            mask = np.zeros(self.length, dtype=bool)
+            mask[self._span] = True
+            return mask
+        return np.unpackbits(self.bits, count=self.length).astype(bool)
+
+    def indices(self):
+        """选中行的位置数组（计算一次后缓存）"""
+        if self._indices is None:
+            if self._span is not None:
+                self._indices = np.arange(self._span.start, self._span.stop, dtype=np.intp)
+            else:
+                self._indices = np.flatnonzero(np.unpackbits(self.bits, count=self.length))
+        return self._indices
+
+    def indexer(self):
+        """用于iloc的行索引器：连续区间返回切片，否则返回位置数组"""
+        if self._span is not None:
+            return self._span
+        return self.indices()
+
+    def extend(self, mask):
+        """数据在末尾追加了行：按新增行的布尔数组原位扩展选择结果，返回自身
+
+        同一个对象被多处引用时只能扩展一次。
+        """
+        mask = np.asarray(mask, dtype=bool)
+        start, length = self.length, self.length + len(mask)
+        count = self.count + int(np.count_nonzero(mask))
+        added = count - self.count
+
+        if self._span is not None:
+            first, stop = self._span.start, self._span.stop
+            if added == 0:
+                span = self._span
+            elif added == len(mask) and (stop == start or first == stop):
+                # 新增的行全部选中且与原区间相接（或原区间为空），仍是连续区间
+                span = slice(first if first < stop else start, length)
+            else:
+                span = None
+            if self._bits is None and span is None:
+                self._bits = _span_bits(first, stop, start)
+            self._span = span
+
+        if self._bits is not None:
+            self._bits = _grow(self._bits, (start + 7) // 8, (length + 7) // 8, np.uint8)
+            offset, first_byte = start % 8, start // 8
+            if offset:
+                # 第一个新行落在原来最后一个字节的填充位上（填充位总是0）
+                packed = np.packbits(np.concatenate([np.zeros(offset, dtype=bool), mask]))
+                self._bits[first_byte] |= packed[0]
+                self._bits[first_byte + 1:first_byte + len(packed)] = packed[1:]
+            else:
+                packed = np.packbits(mask)
+                self._bits[first_byte:first_byte + len(packed)] = packed
+
+        if self._indices is not None:
+            size = len(self._indices)
+            if self._index_buffer is None:
+                self._index_buffer = self._indices
+            self._index_buffer = _grow(self._index_buffer, size, size + added, np.intp)
+            self._index_buffer[size:size + added] = np.flatnonzero(mask) + start
+            self._indices = self._index_buffer[:size + added]
+
+        self._count = count
+        self.length = length
+        return self
+
+    def refine(self, mask):
+        """在已选中的行中再按布尔数组筛选（mask长度等于选中行数）"""
+        return RowMask.from_indices(self.indices()[np.asarray(mask, dtype=bool)], self.length)
+
+    def _check(self, other):
+        if not isinstance(other, RowMask) or other.length != self.length:
+            raise ValueError("只能组合长度相同的行选择结果")
+
+    def __and__(self, other):
+        self._check(other)
+        if self._span is not None and other._span is not None:
+            start = max(self._span.start, other._span.start)
+            return RowMask.from_slice(slice(start, min(self._span.stop, other._span.stop)),
+                                      self.length)
+        return RowMask(np.bitwise_and(self.bits, other.bits), self.length)
+
+    def __or__(self, other):
+        self._check(other)
+        return RowMask(np.bitwise_or(self.bits, other.bits), self.length)
+
+    def __invert__(self):
+        bits = np.invert(self.bits)
+        tail = self.length % 8
+        if tail:
+            # 清除最后一个字节中的填充位
+            bits[-1] &= (0xFF << (8 - tail)) & 0xFF
+        return RowMask(bits, self.length, count=self.length - self.count)
@@ -0,0 +1,131 @@
+import logging
+import numpy as np
+import pandas as pd
+from core.filter_engine import constant_value
+
+_RANGE_OPS = {'<', '<=', '>', '>=', '=='}
+# 常量在左侧时翻转比较方向：5 < MJD 等价于 MJD > 5
+_FLIPPED = {'<': '>', '<=': '>=', '>': '<', '>=': '<=', '==': '=='}
+
+
+class SortedIndex:
+    """单调数值列的索引
+
+    加载数据时检测已排序（升序或降序）且没有空值的数值列，
+    对这些列上的范围条件用二分查找直接得到行区间，不需要逐行比较。
+    列按位置记录，不受列名修改的影响。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger("PlotData.SortedIndex")
+        self._columns = {}  # 列位置 -> 是否升序
+        self._column_store = None
+
+    def build(self, data, column_store):
+        """检测单调列
+
+        直接检查DataFrame中的列，不把各列写入列存储；
+        二分查找时才从列存储读取被索引的列。
+        """
+        self._columns = {}
+        self._column_store = column_store
+        if data is None or len(data) < 2:
+            return
+
+        for position, dtype in enumerate(data.dtypes):
+            if not pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+                continue
+            series = data.iloc[:, position]
+            if series.hasnans:
+                continue
+            if series.is_monotonic_increasing:
+                self._columns[position] = True
+            elif series.is_monotonic_decreasing:
+                self._columns[position] = False
+
+        if self._columns:
+            names = [str(data.columns[position]) for position in self._columns]
+            self.logger.info(f"已为单调列建立索引: {', '.join(names)}")
+
+    def extend(self, start):
+        """数据在末尾追加了行：只检查新增的行（及其前一行）是否保持单调"""
+        for position, ascending in list(self._columns.items()):
+            values = self._column_store.get(position)[max(start - 1, 0):]
+            if np.isnan(values).any():
+                del self._columns[position]
+            elif ascending and not np.all(values[1:] >= values[:-1]):
+                del self._columns[position]
+            elif not ascending and not np.all(values[1:] <= values[:-1]):
+                del self._columns[position]
+
+    def clear(self):
+        """清除索引"""
+        self._columns = {}
+        self._column_store = None
+
+    def _range_term(self, node, data):
+        """识别 列 op 常量 形式的范围条件，返回 (列位置, 运算符, 常量)"""
+        if node[0] != 'cmp' or node[1] not in _RANGE_OPS:
+            return None
+        op, left, right = node[1], node[2], node[3]
+        if left[0] != 'col' and right[0] == 'col':
+            op, left, right = _FLIPPED[op], right, left
+        # 常量可以带负号（-5 被解析为 ('neg', ('num', 5.0))）
+        value = constant_value(right)
+        if left[0] != 'col' or not isinstance(value, float) or left[1] not in data.columns:
+            return None
+        position = data.columns.get_loc(left[1])
+        if not isinstance(position, int) or position not in self._columns:
+            return None
+        return position, op, value
+
+    def resolve(self, plan, data):
+        """把筛选计划中单调列上的范围条件解析为行区间
+
+        Returns:
+            (slice, 剩余条件的筛选计划或None)；没有可用的范围条件时返回None
+        """
+        if not self._columns:
+            return None
+
+        start, stop = 0, len(data)
+        residual = []
+        used = False
+        for node in plan.conjuncts:
+            term = self._range_term(node, data)
+            if term is None:
+                residual.append(node)
+                continue
+            used = True
+            position, op, value = term
+            lo, hi = self._bounds(position, op, value)
+            start, stop = max(start, lo), min(stop, hi)
+
+        if not used:
+            return None
+        return slice(start, max(start, stop)), plan.subplan(residual)
+
+    def _bounds(self, position, op, value):
+        """用二分查找求出满足单个条件的行区间 [lo, hi)"""
+        values = self._column_store.get(position)
+        ascending = self._columns[position]
+        n = len(values)
+        if not ascending:
+            # 降序列在反转视图上查找，再映射回原始行位置
+            values = values[::-1]
+
+        if op == '>':
+            lo, hi = np.searchsorted(values, value, side='right'), n
+        elif op == '>=':
+            lo, hi = np.searchsorted(values, value, side='left'), n
+        elif op == '<':
+            lo, hi = 0, np.searchsorted(values, value, side='left')
+        elif op == '<=':
+            lo, hi = 0, np.searchsorted(values, value, side='right')
+        else:
+            lo = np.searchsorted(values, value, side='left')
+            hi = np.searchsorted(values, value, side='right')
+
+        if not ascending:
+            lo, hi = n - hi, n - lo
+        return int(lo), int(hi)
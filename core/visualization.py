@@ -1,15 +1,39 @@
 import numpy as np
+import pandas as pd
 import traceback
 import matplotlib.pyplot as plt
-from matplotlib.colors import LogNorm, Normalize, ListedColormap
+from matplotlib.colors import LogNorm, Normalize, ListedColormap, LinearSegmentedColormap, to_rgba
 import matplotlib.ticker as ticker
+from matplotlib.markers import MarkerStyle
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
+from PyQt6.QtCore import QTimer, pyqtSignal
 import matplotlib
+from matplotlib.collections import LineCollection
+from core.lod import LOD_MIN_POINTS, LODController, RasterController, ErrorbarController
+from core.errorbars import cap_segments, data_per_pixel
+from core.plot_prepare import use_raster, prepare_xy, prepare_histogram, prepare_density
+from core.plot_cache import freeze
 matplotlib.rcParams['font.sans-serif'] = ['Microsoft YaHei', 'SimHei', 'DejaVu Sans']  # First try Microsoft YaHei, then SimHei
 matplotlib.rcParams['axes.unicode_minus'] = False  # Fix minus sign display issue
 
 class PlotCanvas(FigureCanvasQTAgg):
+    """绘图画布
+
+    支持鼠标左键拖动平移、滚轮缩放、双击恢复初始范围。交互过程中缓存
+    坐标轴、刻度和网格组成的静态背景，只重绘数据层（blitting），
+    松开鼠标（或滚轮停止）后再完整重绘一次。
+    """
+
+    # 交互开始和结束时发出，用于暂停和恢复多级细节抽稀
+    navigation_started = pyqtSignal()
+    navigation_finished = pyqtSignal()
+
+    # 滚轮每一格的缩放比例
+    ZOOM_STEP = 1.2
+    # 滚轮停止多久后完整重绘（毫秒）
+    WHEEL_SETTLE_MS = 200
+
     def __init__(self, parent=None, width=5, height=4, dpi=100):
         self.fig = Figure(figsize=(width, height), dpi=dpi)
         self.axes = self.fig.add_subplot(111)
@@ -21,19 +45,236 @@ class PlotCanvas(FigureCanvasQTAgg):
             self.axes = self.fig.add_subplot(111)
         self.fig.tight_layout()
 
+        # 交互状态
+        self._drag = None
+        self._background = None
+        self._animated = []
+        self._home = None
+        self._wheel_timer = QTimer(self)
+        self._wheel_timer.setSingleShot(True)
+        self._wheel_timer.setInterval(self.WHEEL_SETTLE_MS)
+        self._wheel_timer.timeout.connect(self._end_navigation)
+
+        self.mpl_connect('button_press_event', self._on_press)
+        self.mpl_connect('motion_notify_event', self._on_motion)
+        self.mpl_connect('button_release_event', self._on_release)
+        self.mpl_connect('scroll_event', self._on_scroll)
+
+    def _data_artists(self):
+        """数据层的artist（交互时单独重绘）"""
+        axes = self.axes
+        return [artist for artist in
+                list(axes.lines) + list(axes.collections) + list(axes.images) + list(axes.patches)
+                if artist.get_visible()]
+
+    def _begin_navigation(self):
+        """缓存不含数据层的静态背景"""
+        if self._background is not None:
+            return
+        axes = self.axes
+        if self._home is None or self._home[0] is not axes:
+            self._home = (axes, axes.get_xlim(), axes.get_ylim())
+        self.navigation_started.emit()
+
+        self._animated = self._data_artists()
+        for artist in self._animated:
+            artist.set_animated(True)
+        self.draw()
+        self._background = self.copy_from_bbox(self.fig.bbox)
+
+    def _blit(self):
+        """在缓存的背景上只重绘数据层"""
+        if self._background is None:
+            return
+        self.restore_region(self._background)
+        for artist in self._animated:
+            self.axes.draw_artist(artist)
+        self.blit(self.axes.bbox)
+
+    def _end_navigation(self):
+        """结束交互，完整重绘一次"""
+        if self._background is None:
+            return
+        for artist in self._animated:
+            artist.set_animated(False)
+        self._animated = []
+        self._background = None
+        self.navigation_finished.emit()
+        self.draw_idle()
+
+    def _set_pixel_bounds(self, inverse, x0, y0, x1, y1):
+        """把像素范围换算为数据范围并设置坐标轴"""
+        (dx0, dy0), (dx1, dy1) = inverse.transform([(x0, y0), (x1, y1)])
+        self.axes.set_xlim(dx0, dx1)
+        self.axes.set_ylim(dy0, dy1)
+
+    def _on_press(self, event):
+        if event.inaxes is not self.axes or event.button != 1:
+            return
+        if event.dblclick:
+            # 双击恢复交互前的范围
+            if self._home is not None and self._home[0] is self.axes:
+                self.axes.set_xlim(self._home[1])
+                self.axes.set_ylim(self._home[2])
+                self.draw_idle()
+            return
+        self._wheel_timer.stop()
+        self._begin_navigation()
+        self._drag = (event.x, event.y, self.axes.transData.frozen().inverted(),
+                      self.axes.bbox.frozen())
+
+    def _on_motion(self, event):
+        if self._drag is None or event.x is None:
+            return
+        start_x, start_y, inverse, bbox = self._drag
+        dx, dy = event.x - start_x, event.y - start_y
+        self._set_pixel_bounds(inverse, bbox.x0 - dx, bbox.y0 - dy, bbox.x1 - dx, bbox.y1 - dy)
+        self._blit()
+
+    def _on_release(self, event):
+        if self._drag is None:
+            return
+        self._drag = None
+        self._end_navigation()
+
+    def _on_scroll(self, event):
+        if event.inaxes is not self.axes or self._drag is not None:
+            return
+        factor = 1 / self.ZOOM_STEP if event.button == 'up' else self.ZOOM_STEP
+        self._begin_navigation()
+        bbox = self.axes.bbox
+        # 以鼠标位置为中心缩放
+        self._set_pixel_bounds(
+            self.axes.transData.inverted(),
+            event.x + (bbox.x0 - event.x) * factor,
+            event.y + (bbox.y0 - event.y) * factor,
+            event.x + (bbox.x1 - event.x) * factor,
+            event.y + (bbox.y1 - event.y) * factor)
+        self._blit()
+        self._wheel_timer.start()
+
 class Visualizer:
+    """图表绘制
+
+    所有方法只能在GUI线程中调用。工作线程用core.plot_prepare计算好数组，
+    通过render()交给GUI线程应用到artist。
+    """
+
     def __init__(self):
         self.canvas = None
         self.colorbar = None
         self.current_colorbar = None
+        # 散点图/折线图的多级细节控制器（缩放时重新抽稀）
+        self.lod = None
+        # 散点图渲染模式：'auto'、'marker'（逐点绘制）或 'raster'（按像素聚合）
+        self.render_mode = 'auto'
+        # 当前图表的结构键和artist；结构不变时只更新样式，不重建图表
+        self._plot_key = None
+        self._artists = None
         
     def set_canvas(self, canvas):
         """设置画布"""
         self.canvas = canvas
+        if isinstance(canvas, PlotCanvas):
+            canvas.navigation_started.connect(self._on_navigation_started)
+            canvas.navigation_finished.connect(self._on_navigation_finished)
+
+    def _on_navigation_started(self):
+        """交互过程中暂停重新抽稀/聚合"""
+        if self.lod is not None:
+            self.lod.suspended = True
+
+    def _on_navigation_finished(self):
+        """交互结束后按新的范围重新抽稀/聚合"""
+        if self.lod is not None:
+            self.lod.suspended = False
+            self.lod.update()
+
+    def render(self, payload):
+        """把工作线程准备好的绘图数据应用到画布（只在GUI线程中调用）
+
+        Args:
+            payload: PlotPayload, 包含绘图类型、准备好的数组和样式参数
+
+        Returns:
+            (bool, str): 成功状态和消息
+        """
+        kw = payload.kwargs
+        plot_type = payload.plot_type
+        common = dict(
+            title=kw.get('title'),
+            x_label=kw.get('x_label'),
+            x_min=kw.get('x_min'),
+            x_max=kw.get('x_max'),
+            y_min=kw.get('y_min'),
+            y_max=kw.get('y_max'),
+            x_major_ticks=kw.get('x_major_ticks', 5),
+            x_minor_ticks=kw.get('x_minor_ticks', 1),
+            x_show_grid=kw.get('x_show_grid', True),
+            y_major_ticks=kw.get('y_major_ticks', 5),
+            y_minor_ticks=kw.get('y_minor_ticks', 1),
+            y_show_grid=kw.get('y_show_grid', True),
+            data_key=kw.get('data_key'),
+            prepared=payload.arrays
+        )
+        x_col = kw.get('x_col')
+        y_col = kw.get('y_col')
+
+        if plot_type == "散点图":
+            return self.scatter_plot(
+                None, x_col, y_col,
+                y_label=kw.get('y_label'),
+                color=kw.get('color', 'blue'),
+                alpha=kw.get('alpha', 0.7),
+                mark_size=kw.get('mark_size', 10),
+                mark_style=kw.get('mark_style', 'o'),
+                **common)
+        if plot_type == "带误差棒的散点图":
+            return self.scatter_plot_with_error(
+                None, x_col, y_col,
+                xerr_col=kw.get('xerr_col'),
+                yerr_col=kw.get('yerr_col'),
+                y_label=kw.get('y_label'),
+                color=kw.get('color', 'blue'),
+                alpha=kw.get('alpha', 0.7),
+                mark_size=kw.get('mark_size', 10),
+                mark_style=kw.get('mark_style', 'o'),
+                **common)
+        if plot_type == "直方图":
+            return self.histogram(
+                None, x_col,
+                bins=kw.get('bins', 50),
+                y_label=kw.get('y_label', '次数'),
+                color=kw.get('color', 'blue'),
+                alpha=kw.get('alpha', 0.7),
+                histtype=kw.get('histtype', 'bar'),
+                **common)
+        if plot_type == "2D密度图":
+            return self.density_map_2d(
+                None, x_col, y_col,
+                bins=kw.get('bins', 50),
+                y_label=kw.get('y_label'),
+                colormap=kw.get('colormap', 'viridis'),
+                colorbar_scale=kw.get('colorbar_scale', '线性'),
+                **common)
+        if plot_type == "线图":
+            return self.line_plot(
+                None, x_col, y_col,
+                y_label=kw.get('y_label'),
+                color=kw.get('color', 'blue'),
+                alpha=kw.get('alpha', 0.7),
+                marker=kw.get('mark_style', 'o'),
+                marker_size=kw.get('mark_size', 10),
+                linestyle=kw.get('line_style', '-'),
+                linewidth=kw.get('line_width', 2),
+                **common)
+        return False, f"不支持的绘图类型: {plot_type}"
         
     def clear_plot(self):
         """清除图表"""
         if self.canvas:
+            self._detach_lod()
+
             # 完全重置图形 - 最彻底的方式
             self.canvas.fig.clear()
             
@@ -43,10 +284,182 @@ class Visualizer:
             # 确保colorbar引用被清除
             self.colorbar = None
             
-            # 重置布局参数
+            # 重置布局参数（由随后的绘图方法统一绘制，这里不再单独刷新画布）
             self.canvas.fig.subplots_adjust(left=0.1, right=0.9, bottom=0.1, top=0.9)
-            self.canvas.draw()
-    
+        self._plot_key = None
+        self._artists = None
+
+    def _begin_plot(self, plot_type, data_key, structure=()):
+        """开始绘图
+
+        data_key标识绘图数据（数据版本、筛选版本、列名）。绘图类型、数据和
+        结构参数都与当前图表相同时返回True，调用方只需更新现有artist的样式；
+        否则清除图表并返回False。
+        """
+        key = None if data_key is None else (plot_type, data_key, freeze(structure))
+        if key is not None and key == self._plot_key and self._artists is not None:
+            return True
+        self.clear_plot()
+        self._plot_key = key
+        return False
+
+    def _finish_restyle(self, title, x_label, y_label, limits,
+                        x_major_ticks, x_minor_ticks, x_show_grid,
+                        y_major_ticks, y_minor_ticks, y_show_grid):
+        """更新标题、标签、坐标轴范围和刻度，只请求一次重绘"""
+        axes = self.canvas.axes
+        axes.set_title(title or "")
+        axes.set_xlabel(x_label)
+        axes.set_ylabel(y_label)
+
+        if limits != self._artists.get('limits'):
+            x_min, x_max, y_min, y_max = limits
+            if x_min is not None and x_max is not None and x_min != x_max:
+                axes.set_xlim(x_min, x_max)
+            else:
+                axes.autoscale(enable=True, axis='x')
+            if y_min is not None and y_max is not None and y_min != y_max:
+                axes.set_ylim(y_min, y_max)
+            else:
+                axes.autoscale(enable=True, axis='y')
+            self._artists['limits'] = limits
+
+        self._configure_axes(axes,
+            x_major_ticks, x_minor_ticks, x_show_grid,
+            y_major_ticks, y_minor_ticks, y_show_grid)
+        self.canvas.draw_idle()
+
+    @staticmethod
+    def _set_collection_marker(collection, mark_style):
+        """修改散点集合的标记形状"""
+        marker = MarkerStyle(mark_style)
+        collection.set_paths([marker.get_path().transformed(marker.get_transform())])
+
+    @staticmethod
+    def _raster_cmap(color):
+        """栅格模式使用的由浅到深的单色colormap"""
+        return LinearSegmentedColormap.from_list(
+            'raster', [to_rgba(color, 0.25), to_rgba(color, 1.0)])
+
+    def _detach_lod(self):
+        """断开当前的多级细节控制器"""
+        if self.lod is not None:
+            self.lod.detach()
+            self.lod = None
+
+    def pixel_size(self):
+        """绘图区域的像素大小，决定抽稀和栅格的分辨率"""
+        bbox = self.canvas.axes.get_window_extent()
+        return max(int(bbox.width), 1), max(int(bbox.height), 1)
+
+    def _attach_lod(self, kind, x, y, artist):
+        """坐标轴范围确定后关联多级细节控制器"""
+        self._detach_lod()
+        self.lod = LODController(self.canvas.axes, kind, x, y, artist)
+
+    def append_points(self, previous_key, data_key, x, y):
+        """把新增的点追加到当前的散点图或折线图，不重建图表（跟踪文件时使用）
+
+        只更新artist的数据和坐标轴范围；点数超过LOD_MIN_POINTS后改由多级细节控制器抽稀。
+        用户设置了坐标轴范围或缩放过的坐标轴保持不变。
+
+        Args:
+            previous_key: 追加前的绘图数据标识，与当前图表不一致时不追加
+            data_key: 追加后的绘图数据标识
+
+        Returns:
+            bool: 是否已追加；为False时调用方需要重新绘图
+        """
+        if self.canvas is None or self._artists is None or self._plot_key is None:
+            return False
+        plot_type = self._plot_key[0]
+        if (plot_type not in ("散点图", "线图") or 'x' not in self._artists
+                or self._plot_key[1] != previous_key):
+            return False
+
+        new_x = np.asarray(x, dtype=np.float64)
+        new_y = np.asarray(y, dtype=np.float64)
+        x = np.concatenate([self._artists['x'], new_x])
+        y = np.concatenate([self._artists['y'], new_y])
+        self._artists['x'] = x
+        self._artists['y'] = y
+        artist = self._artists['main']
+        kind = 'line' if plot_type == "线图" else 'scatter'
+
+        if self.lod is not None:
+            self.lod.extend(new_x, new_y)
+        elif len(x) > LOD_MIN_POINTS:
+            self._attach_lod(kind, x, y, artist)
+        elif kind == 'line':
+            artist.set_data(x, y)
+        else:
+            artist.set_offsets(np.column_stack([x, y]))
+
+        axes = self.canvas.axes
+        valid = np.isfinite(new_x) & np.isfinite(new_y)
+        if valid.any():
+            points = np.column_stack([new_x[valid], new_y[valid]])
+            if isinstance(self.lod, RasterController):
+                # 栅格图的范围在绘制时已固定，没有设置范围时扩展到包含新增的点
+                x_min, x_max, y_min, y_max = self._artists['limits']
+                if x_min is None or x_max is None or x_min == x_max:
+                    x0, x1 = axes.get_xlim()
+                    axes.set_xlim(min(x0, points[:, 0].min()), max(x1, points[:, 0].max()))
+                if y_min is None or y_max is None or y_min == y_max:
+                    y0, y1 = axes.get_ylim()
+                    axes.set_ylim(min(y0, points[:, 1].min()), max(y1, points[:, 1].max()))
+            else:
+                axes.update_datalim(points)
+                # 只有仍在自动缩放的坐标轴会改变范围
+                axes.autoscale_view()
+
+        if self.lod is not None:
+            self.lod.update()
+        self._plot_key = (plot_type, data_key, self._plot_key[2])
+        self.canvas.draw_idle()
+        return True
+
+    def _is_raster(self, data, prepared):
+        """判断散点类图表是否使用栅格渲染"""
+        if prepared is not None:
+            return prepared['grid'] is not None
+        return use_raster(self.render_mode, len(data))
+
+    def _draw_raster(self, arrays, color):
+        """用单个图像显示按像素聚合的计数网格
+
+        内存占用只与像素数有关，与数据行数无关。
+        """
+        axes = self.canvas.axes
+        grid = arrays['grid']
+        x_range = arrays['x_range']
+        y_range = arrays['y_range']
+
+        # 由浅到深的单色colormap，保留用户选择的颜色
+        cmap = self._raster_cmap(color)
+        vmax = grid.max()
+        vmax = 1.0 if vmax is np.ma.masked else max(float(vmax), 1.0)
+        image = axes.imshow(
+            grid,
+            extent=(x_range[0], x_range[1], y_range[0], y_range[1]),
+            origin='lower',
+            aspect='auto',
+            interpolation='nearest',
+            cmap=cmap,
+            norm=LogNorm(vmin=1, vmax=vmax)
+        )
+        axes.set_xlim(*x_range)
+        axes.set_ylim(*y_range)
+
+        self.colorbar = self.canvas.fig.colorbar(image, ax=axes, fraction=0.046, pad=0.04)
+        self.colorbar.ax.set_ylabel("点数")
+        return image
+
+    def _attach_raster(self, x, y, image):
+        """关联栅格控制器，缩放时重新聚合"""
+        self._detach_lod()
+        self.lod = RasterController(self.canvas.axes, x, y, image)
+
     def scatter_plot(self, data, 
         x_col,
         y_col,
@@ -66,14 +479,33 @@ class Visualizer:
         x_min=None,
         x_max=None,
         y_min=None,
-        y_max=None):
+        y_max=None,
+        data_key=None,
+        prepared=None):
+
+        """绘制散点图
 
-        """绘制散点图"""
+        data_key与上一次绘图相同时只更新颜色、透明度、标记和标签等样式。
+        prepared为工作线程用prepare_xy准备好的数组，为None时在这里计算。
+        """
         if self.canvas is None:
             return False, "画布未初始化"
 
-        # 先清除之前的图表
-        self.clear_plot()
+        limits = (x_min, x_max, y_min, y_max)
+        raster = self._is_raster(data, prepared)
+        if self._begin_plot("散点图", data_key, (x_col, y_col, raster)):
+            artist = self._artists['main']
+            if raster:
+                artist.set_cmap(self._raster_cmap(color))
+            else:
+                artist.set_color(color)
+                artist.set_alpha(alpha)
+                artist.set_sizes([mark_size])
+                self._set_collection_marker(artist, mark_style)
+            self._finish_restyle(title, x_label or x_col, y_label or y_col, limits,
+                x_major_ticks, x_minor_ticks, x_show_grid,
+                y_major_ticks, y_minor_ticks, y_show_grid)
+            return True, "散点图绘制成功"
 
          # 添加标记样式映射
         style_map = {
@@ -89,15 +521,24 @@ class Visualizer:
         }
         
         try:
-            x = data[x_col]
-            y = data[y_col]
+            if prepared is None:
+                prepared = prepare_xy(data, x_col, y_col, 'scatter', self.pixel_size(),
+                                      self.render_mode, limits)
+            x = prepared['x']
+            y = prepared['y']
+            indices = prepared['indices']
             
             self.canvas.axes.clear()
-            self.canvas.axes.scatter(x, y,
-                marker=mark_style,
-                c=color,
-                s=mark_size,
-                alpha=alpha)
+            if raster:
+                artist = self._draw_raster(prepared, color)
+            else:
+                artist = self.canvas.axes.scatter(
+                    x if indices is None else x[indices],
+                    y if indices is None else y[indices],
+                    marker=mark_style,
+                    c=color,
+                    s=mark_size,
+                    alpha=alpha)
             
             # 设置标题和标签
             if title:
@@ -126,7 +567,12 @@ class Visualizer:
                             y_show_grid)
 
             self.canvas.fig.tight_layout()
-            self.canvas.draw()
+            if raster:
+                self._attach_raster(x, y, artist)
+            elif indices is not None:
+                self._attach_lod('scatter', x, y, artist)
+            self._artists = {'main': artist, 'limits': limits, 'x': x, 'y': y}
+            self.canvas.draw_idle()
             
             return True, "散点图绘制成功"
         except Exception as e:
@@ -153,14 +599,32 @@ class Visualizer:
         x_min=None, 
         x_max=None, 
         y_min=None, 
-        y_max=None):
+        y_max=None,
+        data_key=None,
+        prepared=None):
 
         """绘制带误差棒的散点图"""
         if self.canvas is None:
             return False, "画布未初始化"
 
-        # 先清除之前的图表
-        self.clear_plot()
+        limits = (x_min, x_max, y_min, y_max)
+        raster = self._is_raster(data, prepared)
+        if self._begin_plot("带误差棒的散点图", data_key, (x_col, y_col, xerr_col, yerr_col, raster)):
+            artist = self._artists['main']
+            if raster:
+                artist.set_cmap(self._raster_cmap(color))
+            else:
+                artist.set_color(color)
+                artist.set_alpha(alpha)
+                artist.set_marker(mark_style)
+                artist.set_markersize(mark_size)
+                for part in (self._artists['bars'], self._artists['caps']):
+                    part.set_color(color)
+                    part.set_alpha(alpha)
+            self._finish_restyle(title, x_label or x_col, y_label or y_col, limits,
+                x_major_ticks, x_minor_ticks, x_show_grid,
+                y_major_ticks, y_minor_ticks, y_show_grid)
+            return True, "带误差棒的散点图绘制成功"
 
         # 添加标记样式映射
         style_map = {
@@ -176,25 +640,31 @@ class Visualizer:
         }
         
         try:
-            x = data[x_col]
-            y = data[y_col]
-            
-            xerr = data[xerr_col] if xerr_col and xerr_col != "无" else None
-            yerr = data[yerr_col] if yerr_col and yerr_col != "无" else None
+            if prepared is None:
+                prepared = prepare_xy(data, x_col, y_col, 'errorbar', self.pixel_size(),
+                                      self.render_mode, limits, xerr_col, yerr_col)
+            x = prepared['x']
+            y = prepared['y']
+            indices = prepared['indices']
+            rows = indices if indices is not None else slice(None)
             
             self.canvas.axes.clear()
-            # 修改为正确的errorbar参数设置
-            self.canvas.axes.errorbar(x, y,
-                                    xerr=xerr,
-                                    yerr=yerr,
-                                    fmt=mark_style,        
-                                    linestyle='',       # 改为空字符串确保完全禁用线条
-                                    markersize=mark_size,
-                                    color=color,
-                                    alpha=alpha,
-                                    ecolor=color,    # 误差棒颜色
-                                    elinewidth=1.5,   # 误差棒线宽
-                                    capsize=5)        # 误差棒端帽长度
+            bars = caps = None
+            if raster:
+                # 点数过多时误差棒小于像素，按点的位置聚合显示
+                artist = self._draw_raster(prepared, color)
+            else:
+                # 所有误差棒放入一个LineCollection，端帽放入另一个，标记为一个Line2D
+                bars = LineCollection(prepared['bars'], colors=color, linewidths=1.5, alpha=alpha)
+                self.canvas.axes.add_collection(bars, autolim=True)
+                caps = LineCollection([], colors=color, linewidths=1.5, alpha=alpha)
+                self.canvas.axes.add_collection(caps, autolim=False)
+                artist, = self.canvas.axes.plot(x[rows], y[rows],
+                                        marker=mark_style,
+                                        linestyle='',       # 改为空字符串确保完全禁用线条
+                                        markersize=mark_size,
+                                        color=color,
+                                        alpha=alpha)
             
             # 设置标题和标签
             if title:
@@ -222,7 +692,21 @@ class Visualizer:
                 y_minor_ticks,  # 添加参数
                 y_show_grid)    # 添加参数
             self.canvas.fig.tight_layout()
-            self.canvas.draw()
+            if raster:
+                self._attach_raster(x, y, artist)
+            else:
+                # 端帽长度与像素比例有关，坐标轴范围确定后再生成
+                xerr = prepared['xerr']
+                yerr = prepared['yerr']
+                caps.set_segments(cap_segments(
+                    x[rows], y[rows],
+                    None if xerr is None else xerr[rows],
+                    None if yerr is None else yerr[rows],
+                    *data_per_pixel(self.canvas.axes)))
+                self._detach_lod()
+                self.lod = ErrorbarController(self.canvas.axes, x, y, xerr, yerr, artist, bars, caps)
+            self._artists = {'main': artist, 'bars': bars, 'caps': caps, 'limits': limits}
+            self.canvas.draw_idle()
             
             return True, "带误差棒的散点图绘制成功"
         except Exception as e:
@@ -248,6 +732,9 @@ class Visualizer:
         x_max=None, 
         y_min=None, 
         y_max=None,
+        weights=None,
+        data_key=None,
+        prepared=None,
         **kwargs):
         """绘制直方图
         Args:
@@ -257,25 +744,53 @@ class Visualizer:
             color: str, 颜色
             histtype: str, 直方图类型 ('bar', 'barstacked', 'step', 'stepfilled')
             alpha: float, 透明度
+            weights: array, 每个值的权重（用于绘制预分箱的计数）
+            prepared: dict, 工作线程用prepare_histogram计算好的计数和分箱边界
             **kwargs: 其他参数
         """
         if self.canvas is None:
             return False, "画布未初始化"
 
-        # 先清除之前的图表
-        self.clear_plot()
+        limits = (x_min, x_max, y_min, y_max)
+        weighted = prepared['weighted'] if prepared is not None else weights is not None
+        if self._begin_plot("直方图", data_key, (col, bins, histtype, weighted)):
+            for patch in self._artists['patches']:
+                if patch.get_fill():
+                    patch.set_facecolor(color)
+                else:
+                    patch.set_edgecolor(color)
+                patch.set_alpha(alpha)
+            self._finish_restyle(title, x_label or col, y_label, limits,
+                x_major_ticks, x_minor_ticks, x_show_grid,
+                y_major_ticks, y_minor_ticks, y_show_grid)
+            return True, "直方图绘制成功"
         
         try:
-            values = data[col]
+            if prepared is None:
+                prepared = prepare_histogram(data, col, bins, weights)
+            edges = prepared['edges']
+            counts = prepared['counts']
             
             self.canvas.axes.clear()
-            self.canvas.axes.hist(values, 
-                bins=bins,
-                color=color,
-                histtype = histtype,
-                edgecolor = 'black',
-                hatch = '/',
-                alpha=alpha)
+            # 计数已经算好，直接绘制预分箱的结果
+            if histtype in ('step', 'stepfilled'):
+                filled = histtype == 'stepfilled'
+                patches = [self.canvas.axes.stairs(
+                    counts, edges,
+                    fill=filled,
+                    facecolor=color if filled else 'none',
+                    edgecolor='black' if filled else color,
+                    hatch='/' if filled else None,
+                    alpha=alpha)]
+            else:
+                patches = self.canvas.axes.bar(
+                    edges[:-1], counts,
+                    width=np.diff(edges),
+                    align='edge',
+                    color=color,
+                    edgecolor='black',
+                    hatch='/',
+                    alpha=alpha).patches
             
             # 设置标题和标签
             if title:
@@ -300,7 +815,8 @@ class Visualizer:
                 y_minor_ticks,  # 添加参数
                 y_show_grid)    # 添加参数
             self.canvas.fig.tight_layout()
-            self.canvas.draw()
+            self._artists = {'patches': list(patches), 'limits': limits}
+            self.canvas.draw_idle()
             
             return True, "直方图绘制成功"
         except Exception as e:
@@ -313,6 +829,7 @@ class Visualizer:
         y_label=None, 
         colormap='viridis',
         colorbar_scale='线性',
+        weights=None,
         x_major_ticks=5,  # 修改为X轴主刻度
         x_minor_ticks=1,  # 修改为X轴次刻度
         x_show_grid=True, # 修改为X轴网格线
@@ -322,56 +839,54 @@ class Visualizer:
         x_min=None, 
         x_max=None, 
         y_min=None, 
-        y_max=None):
+        y_max=None,
+        data_key=None,
+        prepared=None):
 
         if self.canvas is None:
             return False, "画布未初始化"
 
-        # 先清除之前的图表
-        self.clear_plot()
+        limits = (x_min, x_max, y_min, y_max)
+        weighted = prepared['weighted'] if prepared is not None else weights is not None
+        # 对数比例下零值区域的颜色取决于colormap，切换colormap需要重建
+        structure = (x_col, y_col, bins, colorbar_scale, weighted,
+                     colormap if colorbar_scale == '对数' else None)
+        if self._begin_plot("2D密度图", data_key, structure):
+            if colorbar_scale != '对数':
+                self._artists['main'].set_cmap(colormap)
+            self._finish_restyle(title, x_label or x_col, y_label or y_col, limits,
+                x_major_ticks, x_minor_ticks, x_show_grid,
+                y_major_ticks, y_minor_ticks, y_show_grid)
+            return True, "2D密度图绘制成功"
  
         try:
-            # 使用标准清理方法代替直接操作fig
-            self.clear_plot()  # 替换原有的fig.clear()
 
-            # 检查列是否存在
-            if x_col not in data.columns:
-                return False, f"列 '{x_col}' 不存在"
-            if y_col not in data.columns:
-                return False, f"列 '{y_col}' 不存在"
+            if prepared is None:
+                # 检查列是否存在
+                if x_col not in data.columns:
+                    return False, f"列 '{x_col}' 不存在"
+                if y_col not in data.columns:
+                    return False, f"列 '{y_col}' 不存在"
+                prepared = prepare_density(data, x_col, y_col, bins, weights)
+
+            if prepared['count'] == 0:
+                return False, "没有足够的有效数据点"
 
             # 重置图形布局参数 - 为colorbar预留空间
             self.canvas.fig.subplots_adjust(left=0.15, right=0.95, bottom=0.1, top=0.9)
-    
-            # 提取数据
-            x_data = data[x_col].dropna()
-            y_data = data[y_col].dropna()
-            
-            if len(x_data) == 0 or len(y_data) == 0:
-                return False, "没有足够的有效数据点"
-            
-            # 确保数据长度一致
-            min_len = min(len(x_data), len(y_data))
-            x_data = x_data[:min_len]
-            y_data = y_data[:min_len]
             
-            # 计算2D直方图数据
-            h, xedges, yedges = np.histogram2d(x_data, y_data, bins=bins)
-            
-            # 创建网格
-            X, Y = np.meshgrid(xedges[:-1] + 0.5 * (xedges[1] - xedges[0]), 
-                              yedges[:-1] + 0.5 * (yedges[1] - yedges[0]))
+            # 2D直方图数据
+            h = prepared['h']
+            xedges = prepared['x_edges']
+            yedges = prepared['y_edges']
             
             # 创建掩码数组，标记零值区域
             mask = h == 0
             
-            # 获取原始colormap
-            cmap = plt.cm.get_cmap(colormap)
+            # 获取原始colormap（plt.cm.get_cmap在新版本matplotlib中已移除）
+            cmap = matplotlib.colormaps[colormap]
             
             if colorbar_scale == '对数':
-                # 清除当前图形
-                self.canvas.axes.clear()
-                
                 # 创建自定义colormap，将零值设为黑色
                 # 复制原始colormap的颜色
                 colors = cmap(np.linspace(0, 1, 256))
@@ -409,10 +924,9 @@ class Visualizer:
                     alpha=0.9  # 调整透明度
                 )
             else:
-                # 线性比例，使用标准hist2d
-                h, xedges, yedges, im = self.canvas.axes.hist2d(
-                    x_data, y_data, 
-                    bins=bins, 
+                # 线性比例，与hist2d相同的网格
+                im = self.canvas.axes.pcolormesh(
+                    xedges, yedges, h.T,
                     cmap=colormap
                 )
             
@@ -455,9 +969,10 @@ class Visualizer:
 
             # 确保坐标轴比例自动调整
             self.canvas.axes.set_aspect('auto')
+            self._artists = {'main': im, 'limits': limits}
             
             # 更新画布
-            self.canvas.draw()
+            self.canvas.draw_idle()
             
             return True, "2D密度图绘制成功"
         
@@ -536,21 +1051,40 @@ class Visualizer:
         x_min=None, 
         x_max=None, 
         y_min=None, 
-        y_max=None):
+        y_max=None,
+        data_key=None,
+        prepared=None):
         
         """绘制折线图"""
         if self.canvas is None:
             return False, "画布未初始化"
 
-        # 先清除之前的图表
-        self.clear_plot()
+        limits = (x_min, x_max, y_min, y_max)
+        if self._begin_plot("线图", data_key, (x_col, y_col)):
+            artist = self._artists['main']
+            artist.set_color(color)
+            artist.set_alpha(alpha)
+            artist.set_marker(marker)
+            artist.set_markersize(marker_size)
+            artist.set_linestyle(linestyle)
+            artist.set_linewidth(linewidth)
+            self._finish_restyle(title, x_label or x_col, y_label or y_col, limits,
+                x_major_ticks, x_minor_ticks, x_show_grid,
+                y_major_ticks, y_minor_ticks, y_show_grid)
+            return True, "折线图绘制成功"
 
         try:
-            x = data[x_col]
-            y = data[y_col]
+            if prepared is None:
+                prepared = prepare_xy(data, x_col, y_col, 'line', self.pixel_size(),
+                                      self.render_mode, limits)
+            x = prepared['x']
+            y = prepared['y']
+            indices = prepared['indices']
             
             self.canvas.axes.clear()
-            self.canvas.axes.plot(x, y, 
+            artist, = self.canvas.axes.plot(
+                x if indices is None else x[indices],
+                y if indices is None else y[indices],
                 marker=marker,
                 markersize=marker_size,
                 linestyle=linestyle, 
@@ -586,7 +1120,10 @@ class Visualizer:
                 y_show_grid)    # 添加参数
 
             self.canvas.fig.tight_layout()
-            self.canvas.draw()
+            if indices is not None:
+                self._attach_lod('line', x, y, artist)
+            self._artists = {'main': artist, 'limits': limits, 'x': x, 'y': y}
+            self.canvas.draw_idle()
             
             return True, "折线图绘制成功"
         except Exception as e:
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# 测试直接导入 core 包，把项目根目录加入搜索路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def data_manager(tmp_path, monkeypatch):
+    """缓存目录位于临时目录中的DataManager"""
+    monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+    from core.data_manager import DataManager
+    manager = DataManager()
+    yield manager
+    manager.column_store.close()
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.append_buffer import AppendBuffer
+
+
+@pytest.fixture
+def data():
+    return pd.DataFrame({
+        'x': np.arange(5, dtype=np.float64),
+        'n': np.arange(5, dtype=np.int64),
+        'name': pd.Series(list('abcde'), dtype='str'),
+        'kind': pd.Categorical(list('pqpqp')),
+    })
+
+
+def _rows(start, count, kind='p'):
+    return pd.DataFrame({
+        'x': np.arange(start, start + count, dtype=np.float64),
+        'n': np.arange(start, start + count, dtype=np.int64),
+        'name': pd.Series([f"r{i}" for i in range(count)], dtype='str'),
+        'kind': [kind] * count,
+    })
+
+
+def test_append_matches_concat(data):
+    buffer = AppendBuffer(data)
+    expected = data
+    for step in range(20):
+        rows = _rows(len(expected), step % 4 + 1, kind=f"k{step % 3}")
+        result = buffer.append(rows)
+        expected = pd.concat([expected, rows], ignore_index=True)
+        assert result.shape == expected.shape
+    pd.testing.assert_frame_equal(result.astype({'kind': str}), expected.astype({'kind': str}))
+    assert result['x'].dtype == np.float64
+    assert result['n'].dtype == np.int64
+    assert isinstance(result['kind'].dtype, pd.CategoricalDtype)
+    assert list(result['kind'].cat.categories[:2]) == ['p', 'q']
+    assert isinstance(result.index, pd.RangeIndex)
+
+
+def test_frame_does_not_copy(data):
+    buffer = AppendBuffer(data)
+    result = buffer.append(_rows(5, 3))
+    first = result['x'].to_numpy()
+    result = buffer.append(_rows(8, 2))
+    # 容量足够时新行写入同一个数组，之前的结果不受影响
+    assert np.shares_memory(first, result['x'].to_numpy())
+    np.testing.assert_array_equal(first, np.arange(8.0))
+
+
+def test_incompatible_values_upcast(data):
+    buffer = AppendBuffer(data)
+    rows = _rows(5, 2)
+    rows['n'] = [np.nan, 6.0]
+    result = buffer.append(rows)
+    assert result['n'].dtype == np.float64
+    assert np.isnan(result['n'].iloc[5])
+    result = buffer.append(_rows(7, 1))
+    assert result['n'].iloc[-1] == 7
+
+
+def test_string_chunks_stay_few(data):
+    buffer = AppendBuffer(data)
+    for step in range(500):
+        result = buffer.append(_rows(5 + step, 1))
+    assert len(buffer._columns[2].chunks) <= 12
+    assert result['name'].iloc[-1] == 'r0'
+    assert len(result) == 505
+
+
+def test_keeps_custom_index(data):
+    data.index = [10, 20, 30, 40, 50]
+    result = AppendBuffer(data).append(_rows(5, 2))
+    assert list(result.index) == [10, 20, 30, 40, 50, 5, 6]
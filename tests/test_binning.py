@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from core.binning import aggregate, cell_indices, data_range
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(0)
+    x = rng.uniform(-1, 1, 10_000)
+    y = rng.uniform(-1, 1, 10_000)
+    x[::101] = np.nan
+    return x, y, rng.normal(size=10_000)
+
+
+def test_cell_indices():
+    x = np.array([0.0, 0.5, 1.0, 1.5, np.nan])
+    y = np.array([0.0, 0.5, 1.0, 0.5, 0.5])
+    cells, valid = cell_indices(x, y, (0.0, 1.0), (0.0, 1.0), 2, 2)
+    np.testing.assert_array_equal(valid, [True, True, True, False, False])
+    # 上边界上的点归入最后一个单元
+    np.testing.assert_array_equal(cells, [0, 3, 3])
+
+
+def test_count_matches_histogram2d(points):
+    x, y, _ = points
+    grid = aggregate(x, y, (-1, 1), (-1, 1), 30, 20)
+    valid = ~np.isnan(x)
+    expected = np.histogram2d(y[valid], x[valid], bins=[20, 30], range=[(-1, 1), (-1, 1)])[0]
+    np.testing.assert_array_equal(grid, expected)
+
+
+@pytest.mark.parametrize('how', ['sum', 'mean'])
+def test_weighted(points, how):
+    x, y, values = points
+    grid = aggregate(x, y, (-1, 1), (-1, 1), 8, 8, values=values, how=how)
+    valid = ~np.isnan(x)
+    args = dict(bins=[8, 8], range=[(-1, 1), (-1, 1)])
+    sums = np.histogram2d(y[valid], x[valid], weights=values[valid], **args)[0]
+    if how == 'sum':
+        np.testing.assert_allclose(grid, sums)
+    else:
+        counts = np.histogram2d(y[valid], x[valid], **args)[0]
+        with np.errstate(invalid='ignore'):
+            np.testing.assert_allclose(grid, sums / counts)
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_chunks_and_threads(points, workers):
+    x, y, _ = points
+    whole = aggregate(x, y, (-1, 1), (-1, 1), 16, 16)
+    chunked = aggregate(x, y, (-1, 1), (-1, 1), 16, 16, chunk_rows=777, workers=workers)
+    np.testing.assert_array_equal(chunked, whole)
+
+
+@pytest.mark.parametrize('values, lower, upper, expected', [
+    (np.array([1.0, np.nan, 3.0]), None, None, (1.0, 3.0)),
+    (np.array([1.0, np.inf, 3.0]), None, None, (1.0, 3.0)),
+    (np.array([2.0, 2.0]), None, None, (1.5, 2.5)),
+    (np.array([]), None, None, (0.0, 1.0)),
+    (np.array([np.nan]), None, None, (0.0, 1.0)),
+    (np.array([1.0, 3.0]), 5.0, -1.0, (-1.0, 5.0)),
+])
+def test_data_range(values, lower, upper, expected):
+    assert data_range(values, lower, upper) == expected
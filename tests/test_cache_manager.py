@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.cache_manager import DataCache
+from core.data_loader import file_snapshot, read_file
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DataCache(cache_dir=str(tmp_path / 'cache'))
+
+
+def _write(path, rows=10):
+    path.write_text('a,b\n' + ''.join(f'{i},{i * 2}\n' for i in range(rows)))
+    return str(path)
+
+
+def _frame(rows=10):
+    return pd.DataFrame({'a': np.arange(rows), 'b': np.arange(rows) * 2})
+
+
+def test_round_trip(cache, tmp_path):
+    path = _write(tmp_path / 'data.csv')
+    assert cache.get(path) is None
+    assert cache.put(path, _frame())
+    pd.testing.assert_frame_equal(cache.get(path), _frame())
+
+
+def test_key_depends_on_file_and_separator(cache, tmp_path):
+    path = _write(tmp_path / 'data.csv')
+    key = cache.make_key(path)
+    assert cache.make_key(path) == key
+    assert cache.make_key(path, ',') != key
+    assert cache.make_key(_write(tmp_path / 'other.csv')) != key
+
+    cache.put(path, _frame())
+    # 文件内容改变（大小和修改时间不同）后缓存失效
+    _write(tmp_path / 'data.csv', rows=20)
+    os.utime(path, ns=(1, 1))
+    assert cache.make_key(path) != key
+    assert cache.get(path) is None
+
+
+def test_key_uses_snapshot_taken_before_parse(cache, tmp_path):
+    path = _write(tmp_path / 'data.csv')
+    snapshot = file_snapshot(path)
+    # 解析期间文件被追加：缓存键仍对应解析之前的状态
+    _write(tmp_path / 'data.csv', rows=20)
+    os.utime(path, ns=(1, 1))
+    cache.put(path, _frame(), snapshot=snapshot)
+    assert cache.get(path) is None
+    pd.testing.assert_frame_equal(cache.get(path, snapshot=snapshot), _frame())
+
+
+def test_rows_appended_during_load_are_not_cached(data_manager, tmp_path, monkeypatch):
+    path = _write(tmp_path / 'data.csv')
+
+    def read_and_append(*args, **kwargs):
+        result = read_file(*args, **kwargs)
+        with open(path, 'a') as f:
+            f.write('10,20\n')
+        return result
+
+    monkeypatch.setattr('core.data_manager.read_file', read_and_append)
+    result, _ = data_manager.read_dataset(path)
+    assert len(result['data']) == 10
+
+    monkeypatch.setattr('core.data_manager.read_file', read_file)
+    result, _ = data_manager.read_dataset(path)
+    assert result['load_info']['engine'] != 'cache'
+    assert len(result['data']) == 11
+    result, _ = data_manager.read_dataset(path)
+    assert result['load_info']['engine'] == 'cache'
+    assert len(result['data']) == 11
+
+
+def test_index_persists(cache, tmp_path):
+    path = _write(tmp_path / 'data.csv')
+    cache.put(path, _frame())
+    reopened = DataCache(cache_dir=cache.cache_dir)
+    pd.testing.assert_frame_equal(reopened.get(path), _frame())
+
+
+def test_evicts_least_recently_used(cache, tmp_path):
+    paths = [_write(tmp_path / f'data{i}.csv') for i in range(3)]
+    for i, path in enumerate(paths):
+        cache.put(path, _frame())
+        cache.index[cache.make_key(path)]['last_access'] = i
+    entry_size = next(iter(cache.index.values()))['size']
+
+    # 访问第一个文件后，最久未使用的是第二、第三个文件
+    cache.get(paths[0])
+    cache.max_bytes = 2 * entry_size
+    newest = _write(tmp_path / 'data3.csv')
+    cache.put(newest, _frame())
+
+    assert len(cache.index) == 2
+    assert len(os.listdir(cache.cache_dir)) == 3  # 两个缓存文件和索引
+    assert cache.get(paths[1]) is None
+    assert cache.get(paths[2]) is None
+    assert cache.get(paths[0]) is not None
+    assert cache.get(newest) is not None
+
+
+def test_clear(cache, tmp_path):
+    path = _write(tmp_path / 'data.csv')
+    cache.put(path, _frame())
+    cache.clear()
+    assert cache.index == {}
+    assert cache.get(path) is None
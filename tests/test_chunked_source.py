@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.chunked_source import ChunkedSource, ColumnAccumulator, bottom_k_sample
+
+ROWS = 1000
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    rng = np.random.default_rng(0)
+    v = rng.random(ROWS)
+    v[::13] = np.nan
+    data = pd.DataFrame({'t': np.arange(ROWS), ' v': v, 'name': [f'n{i % 5}' for i in range(ROWS)]})
+    path = tmp_path / 'data.csv'
+    data.to_csv(path, index=False)
+    return str(path)
+
+
+def _full(path):
+    data = pd.read_csv(path)
+    data.columns = data.columns.str.strip()
+    return data
+
+
+@pytest.mark.parametrize('chunksize', [7, 100, 5000])
+def test_chunks_match_single_pass_load(csv_path, chunksize):
+    source = ChunkedSource(csv_path, chunksize=chunksize)
+    chunks = list(source.iter_chunks())
+    assert len(chunks) == -(-ROWS // chunksize)
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), _full(csv_path))
+    # 只读取部分列
+    pd.testing.assert_frame_equal(pd.concat(source.iter_chunks(columns=['v']), ignore_index=True),
+                                  _full(csv_path)[['v']])
+
+
+def test_scan_statistics_match_full_data(csv_path):
+    full = _full(csv_path)
+    _, accumulators, total_rows = ChunkedSource(csv_path, chunksize=7).scan(10)
+    assert total_rows == ROWS
+    assert set(accumulators) == {'t', 'v'}
+    for col, acc in accumulators.items():
+        values = full[col]
+        assert acc.count == values.count()
+        assert acc.na_count == values.isna().sum()
+        assert acc.mean == pytest.approx(values.mean())
+        assert acc.std == pytest.approx(values.std())
+        assert acc.min == values.min()
+        assert acc.max == values.max()
+
+
+def test_scan_keeps_all_rows_when_sample_is_large(csv_path):
+    sample, _, _ = ChunkedSource(csv_path, chunksize=7).scan(ROWS)
+    pd.testing.assert_frame_equal(sample, _full(csv_path))
+
+
+def test_scan_sample_is_deterministic(csv_path):
+    full = _full(csv_path)
+    samples = [ChunkedSource(csv_path, chunksize=chunksize).scan(50, seed=1)[0]
+               for chunksize in (7, 64, 5000)]
+    for sample in samples:
+        pd.testing.assert_frame_equal(sample, samples[0])
+    # 样本按原始行序排列，内容与原始行一致
+    assert len(samples[0]) == 50
+    assert samples[0].index.is_monotonic_increasing
+    pd.testing.assert_frame_equal(samples[0], full.loc[samples[0].index])
+    other = ChunkedSource(csv_path).scan(50, seed=2)[0]
+    assert not other.index.equals(samples[0].index)
+
+
+def test_column_accumulator_merges_batches():
+    rng = np.random.default_rng(3)
+    values = rng.normal(1e6, 5, 500)
+    values[::17] = np.nan
+    acc = ColumnAccumulator()
+    for batch in np.array_split(values, 9):
+        acc.add(batch)
+    acc.add([])
+    acc.add([np.nan, np.nan])
+    assert acc.count == np.count_nonzero(~np.isnan(values))
+    assert acc.na_count == np.isnan(values).sum() + 2
+    assert acc.mean == pytest.approx(np.nanmean(values))
+    assert acc.std == pytest.approx(np.nanstd(values, ddof=1))
+    assert (acc.min, acc.max) == (np.nanmin(values), np.nanmax(values))
+
+
+def test_column_accumulator_std_needs_two_values():
+    acc = ColumnAccumulator()
+    assert np.isnan(acc.std)
+    acc.add([4.0])
+    assert np.isnan(acc.std)
+    assert acc.min == acc.max == acc.mean == 4.0
+
+
+def test_bottom_k_sample_is_independent_of_chunking():
+    rng = np.random.default_rng(4)
+    data = pd.DataFrame({'a': np.arange(300)})
+    keys = rng.random(300)
+    expected = set(np.argsort(keys)[:20])
+    for size in (1, 16, 300):
+        sample, sample_keys = None, None
+        for start in range(0, 300, size):
+            sample, sample_keys = bottom_k_sample(sample, sample_keys, data.iloc[start:start + size],
+                                                  keys[start:start + size], 20)
+        assert set(sample['a']) == expected
+        np.testing.assert_array_equal(sample_keys, keys[sample['a']])
+
+
+@pytest.fixture
+def streaming(data_manager, csv_path):
+    success, message = data_manager.load_data(csv_path, streaming=True)
+    assert success, message
+    # 小数据块，使筛选跨越多个块
+    data_manager.stream_source.chunksize = 7
+    return data_manager
+
+
+def test_streaming_filter_across_chunks(streaming, csv_path):
+    full = _full(csv_path)
+    success, message = streaming.set_filtered_data('v > 0.5 and t % 3 == 0')
+    assert success, message
+    expected = full[(full['v'] > 0.5) & (full['t'] % 3 == 0)]
+    assert str(len(expected)) in message
+    pd.testing.assert_frame_equal(streaming.filtered_data, expected)
+
+
+def test_streaming_filter_keeps_sample_of_matches(streaming, csv_path):
+    full = _full(csv_path)
+    streaming.STREAM_SAMPLE_ROWS = 5
+    success, message = streaming.set_filtered_data('t >= 500')
+    assert success
+    assert '500' in message
+    result = streaming.filtered_data
+    assert len(result) == 5
+    assert result.index.is_monotonic_increasing
+    assert (result['t'] >= 500).all()
+    pd.testing.assert_frame_equal(result, full.loc[result.index])
+
+
+def test_streaming_filter_without_matches(streaming):
+    success, _ = streaming.set_filtered_data('t > 5000')
+    assert not success
+    assert streaming.filtered_data is None
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.column_store import ColumnStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ColumnStore(base_dir=str(tmp_path))
+    yield store
+    store.close()
+
+
+def test_build_writes_nothing_until_requested(store, tmp_path):
+    store.build(pd.DataFrame({'a': np.arange(10.0), 'b': np.arange(10)}))
+    assert store.store_dir is None
+    assert list(tmp_path.iterdir()) == []
+    store.get(0)
+    assert len(os.listdir(store.store_dir)) == 1
+
+
+def test_keeps_integer_precision(store):
+    big = np.array([2 ** 53 + 1, 2 ** 62 + 3], dtype=np.int64)
+    store.build(pd.DataFrame({'id': big, 'f32': np.array([1.5, 2.5], dtype=np.float32)}))
+    values = store.get(0)
+    assert values.dtype == np.int64
+    np.testing.assert_array_equal(values, big)
+    assert store.get(1).dtype == np.float32
+
+
+def test_converts_other_columns_to_float(store):
+    data = pd.DataFrame({
+        'nullable': pd.array([1, None, 3], dtype='Int64'),
+        'text': ['1.5', 'x', '3'],
+    })
+    store.build(data)
+    np.testing.assert_array_equal(store.get(0), [1.0, np.nan, 3.0])
+    np.testing.assert_array_equal(store.get(1), [1.5, np.nan, 3.0])
+
+
+def test_get_rows(store):
+    store.build(pd.DataFrame({'a': np.arange(10)}))
+    np.testing.assert_array_equal(store.get(0, slice(2, 5)), [2, 3, 4])
+    np.testing.assert_array_equal(store.get(0, np.array([1, 7])), [1, 7])
+
+
+def test_extend_appends_rows(store):
+    data = pd.DataFrame({'a': np.arange(5), 'b': np.arange(5)})
+    store.build(data)
+    old = store.get(0)
+    store.get(1)
+    more = pd.concat([data, pd.DataFrame({'a': [5, 6], 'b': [np.nan, 6.0]}, index=[5, 6])])
+    store.extend(more, 5)
+    np.testing.assert_array_equal(store.get(0), np.arange(7))
+    # 整数列出现缺失值后重新按float64写入
+    assert store.get(1).dtype == np.float64
+    assert np.isnan(store.get(1)[5])
+    np.testing.assert_array_equal(old, np.arange(5))
+
+
+def test_close_removes_files(store):
+    store.build(pd.DataFrame({'a': np.arange(10.0)}))
+    store.get(0)
+    store_dir = store.store_dir
+    store.close()
+    assert not os.path.exists(store_dir)
+    assert store.store_dir is None
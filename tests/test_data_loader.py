@@ -0,0 +1,86 @@
+import os
+
+import pandas as pd
+import pytest
+
+from core.data_loader import SNIFF_BYTES, WHITESPACE_SEP, file_snapshot, read_text_table
+
+
+@pytest.mark.parametrize('content, end_offset, partial', [
+    (b'a,b\n1,2\n', 8, False),
+    (b'a,b\n1,2\n3,', 8, True),
+    (b'a,b\n1,2\n  ', 8, False),
+    (b'a,b', 0, True),
+    (b'', 0, False),
+])
+def test_file_snapshot(tmp_path, content, end_offset, partial):
+    path = tmp_path / 'data.csv'
+    path.write_bytes(content)
+    snapshot = file_snapshot(str(path))
+    assert snapshot['size'] == len(content)
+    assert snapshot['end_offset'] == end_offset
+    assert snapshot['partial_tail'] is partial
+    stat = os.stat(path)
+    assert snapshot['identity'] == (stat.st_dev, stat.st_ino)
+
+
+def test_file_snapshot_long_tail(tmp_path):
+    path = tmp_path / 'data.csv'
+    content = b'a\n' + b'x' * 200_000
+    path.write_bytes(content)
+    snapshot = file_snapshot(str(path))
+    assert snapshot['end_offset'] == 2
+    assert snapshot['partial_tail']
+
+
+def test_read_text_table_records_snapshot(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_bytes(b't,v\n1,2\n3,4\n5,')
+    data, load_info = read_text_table(str(path))
+    assert list(data['t']) == [1, 3, 5]
+    assert load_info['end_offset'] == 12
+    assert load_info['partial_tail']
+
+
+def _space_aligned(tail, rows=None):
+    # 头部样本之后再追加tail，样本中看不到这些行
+    rows = rows or SNIFF_BYTES // 10 + 100
+    body = ''.join(f'  {i}   {i * 0.5}  {i % 7}\n' for i in range(rows))
+    return ' t    v  k\n' + body + tail
+
+
+@pytest.mark.parametrize('tail', [
+    '',
+    '1 2 3\n',
+    '1\t2 3\n',
+    '   \n4 5 6\n',
+    '1 2 3  \n',
+    '\t1\t2\t3\n',
+])
+def test_whitespace_fast_path_matches_regex(tmp_path, tail):
+    path = tmp_path / 'data.txt'
+    path.write_text(_space_aligned(tail))
+    data, load_info = read_text_table(str(path))
+    assert load_info['sep'] == WHITESPACE_SEP
+    pd.testing.assert_frame_equal(data, pd.read_csv(path, sep=WHITESPACE_SEP))
+
+
+def test_explicit_separator_is_used_as_given(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text('a , b\n1 ,2\n3, 4\n')
+    data, load_info = read_text_table(str(path), r'\s*,\s*')
+    assert load_info['sep'] == r'\s*,\s*'
+    assert list(data.columns) == ['a', 'b']
+    assert list(data['b']) == [2, 4]
+
+    # 指定的分隔符不在文件中时不替换为嗅探结果
+    data, load_info = read_text_table(str(path), ';')
+    assert load_info['sep'] == ';'
+    assert data.shape == (2, 1)
+
+
+def test_explicit_separator_parse_error_is_reported(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text('a;b\n1;2\n3;4;5\n')
+    with pytest.raises(ValueError, match="';'"):
+        read_text_table(str(path), ';')
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def loaded(data_manager, tmp_path):
+    path = tmp_path / 'data.csv'
+    pd.DataFrame({'a': np.arange(100), 'b': np.arange(100) % 7}).to_csv(path, index=False)
+    success, message = data_manager.load_data(str(path))
+    assert success, message
+    return data_manager
+
+
+def test_filtered_frame_is_reused_until_filter_changes(loaded):
+    assert loaded.set_filtered_data('a > 50')[0]
+    first = loaded.filtered_data
+    assert list(first['a']) == list(range(51, 100))
+    assert loaded.get_data() is first
+    assert loaded.get_display_data() is first
+
+    assert loaded.set_filtered_data('a > 50 and b == 3')[0]
+    second = loaded.filtered_data
+    assert second is not first
+    assert list(second['a']) == [a for a in range(51, 100) if a % 7 == 3]
+
+    loaded.undo_filter()
+    assert list(loaded.filtered_data['a']) == list(range(51, 100))
+    loaded.clear_filtered_data()
+    assert loaded.filtered_data is None
+    assert loaded.get_data() is loaded.data
+
+
+def test_filtered_frame_follows_data_changes(loaded):
+    assert loaded.set_filtered_data('a < 10')[0]
+    before = loaded.filtered_data
+    assert loaded.optimize_dtypes()[0]
+    after = loaded.filtered_data
+    assert after is not before
+    assert after['a'].dtype != before['a'].dtype
+    assert list(after['a']) == list(range(10))
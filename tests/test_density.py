@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from core.density import density_grid
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=5000)
+    y = rng.normal(size=5000)
+    x[::97] = np.nan
+    y[::89] = np.nan
+    return x, y
+
+
+def _histogram2d(x, y, x_edges, y_edges):
+    valid = ~(np.isnan(x) | np.isnan(y))
+    return np.histogram2d(x[valid], y[valid], bins=[x_edges, y_edges])[0]
+
+
+@pytest.mark.parametrize('bins', [10, [7, 13]])
+def test_matches_histogram2d(points, bins):
+    x, y = points
+    h, x_edges, y_edges = density_grid(x, y, bins=bins)
+    np.testing.assert_array_equal(h, _histogram2d(x, y, x_edges, y_edges))
+
+
+def test_edge_bins_match_histogram2d(points):
+    x, y = points
+    x_edges = np.linspace(-1, 1, 21)
+    y_edges = np.linspace(-2, 0.5, 11)
+    h, _, _ = density_grid(x, y, bins=[x_edges, y_edges])
+    np.testing.assert_array_equal(h, _histogram2d(x, y, x_edges, y_edges))
+
+
+def test_chunked_accumulation(points):
+    # 流式模式逐块累加的结果与一次计算相同
+    x, y = points
+    x_edges = np.linspace(-3, 3, 31)
+    y_edges = np.linspace(-3, 3, 31)
+    counts = np.zeros((30, 30))
+    for start in range(0, len(x), 700):
+        counts += density_grid(x[start:start + 700], y[start:start + 700], bins=[x_edges, y_edges])[0]
+    np.testing.assert_array_equal(counts, density_grid(x, y, bins=[x_edges, y_edges])[0])
+
+
+def test_weighted_mean(points):
+    x, y = points
+    weights = np.nan_to_num(x) * 2
+    h, x_edges, y_edges = density_grid(x, y, bins=5, weights=weights, how='mean')
+    sums = np.histogram2d(x, y, bins=[x_edges, y_edges], weights=weights)[0]
+    counts = _histogram2d(x, y, x_edges, y_edges)
+    with np.errstate(invalid='ignore'):
+        np.testing.assert_allclose(h, np.where(counts > 0, sums / counts, np.nan))
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from core.dtype_optimizer import optimize_frame
+
+
+def test_string_columns_become_categorical():
+    data = pd.DataFrame({
+        'flag': pd.Series(['a', 'b'] * 500, dtype='str'),
+        'obj': pd.Series(['x', 'y'] * 500, dtype=object),
+    })
+    optimized, report = optimize_frame(data)
+    assert isinstance(optimized['flag'].dtype, pd.CategoricalDtype)
+    assert isinstance(optimized['obj'].dtype, pd.CategoricalDtype)
+    assert set(report['changed']) == {'flag', 'obj'}
+    assert optimized['flag'].astype(str).tolist() == data['flag'].tolist()
+
+
+def test_high_cardinality_strings_unchanged():
+    data = pd.DataFrame({'name': [f"n{i}" for i in range(100)]})
+    optimized, report = optimize_frame(data)
+    assert 'name' not in report['changed']
+    assert optimized['name'].dtype == data['name'].dtype
+
+
+def test_numeric_downcast_is_lossless():
+    data = pd.DataFrame({
+        'i': np.arange(1000, dtype=np.int64),
+        'f32': np.linspace(0, 1, 1000).astype(np.float32).astype(np.float64),
+        'f64': np.linspace(0, 1, 1000) + 1e-12,
+        'whole': np.arange(1000, dtype=np.float64),
+    })
+    optimized, report = optimize_frame(data)
+    assert optimized['i'].dtype == np.int16
+    assert optimized['f32'].dtype == np.float32
+    assert optimized['f64'].dtype == np.float64
+    assert pd.api.types.is_integer_dtype(optimized['whole'].dtype)
+    for col in data.columns:
+        np.testing.assert_array_equal(optimized[col].to_numpy(np.float64), data[col].to_numpy())
+    assert report['after'] < report['before']
@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.filter_engine import (FilterEngine, FilterPlan, QueryPlan, FilterSyntaxError,
+                                UnknownColumnError, NUMEXPR_MIN_ROWS, referenced_columns)
+
+
+@pytest.fixture(params=[100, NUMEXPR_MIN_ROWS * 2], ids=['numpy', 'numexpr'])
+def data(request):
+    n = request.param
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'MJD': 51540 + np.arange(n, dtype=np.float64),
+        'dX': rng.normal(0, 1e-4, n),
+        'UT1-UTC': rng.normal(0, 0.3, n),
+        'flag': np.where(np.arange(n) % 3 == 0, 'a', 'b'),
+    })
+
+
+EXPRESSIONS = [
+    'MJD > 51550',
+    'MJD >= 51545 and MJD < 51560',
+    '51545 < MJD <= 51560',
+    'MJD > 51550 | dX < 0',
+    'not (MJD > 51550)',
+    '(MJD - 51540) % 7 == 0',
+    'MJD > -5',
+    '-dX > 0.0001',
+    'dX ** 2 < 1e-8',
+    'MJD in [51544, 51545]',
+    'MJD not in [51544, 51545]',
+    'MJD == [51541, 51542]',
+    'flag == "a"',
+    'flag in ["a"] and MJD > 51550',
+    'abs(dX) > 0.0001',
+    'sqrt(abs(dX)) < 0.01 & MJD > 51545',
+    'arctan2(dX, 1) > 0',
+    'floor(MJD / 2) == 25772',
+    '`UT1-UTC` > 0',
+]
+
+
+@pytest.mark.parametrize('expr', EXPRESSIONS)
+def test_matches_dataframe_query(data, expr):
+    plan = FilterEngine().compile(expr, data)
+    assert isinstance(plan, FilterPlan)
+    expected = data.index.isin(data.query(expr).index)
+    np.testing.assert_array_equal(plan.evaluate(data), expected)
+
+
+def test_bare_column_name_with_operator_characters(data):
+    plan = FilterEngine().compile('UT1-UTC > 0', data)
+    np.testing.assert_array_equal(plan.evaluate(data), data['UT1-UTC'].to_numpy() > 0)
+
+
+def test_evaluate_rows_subset(data):
+    plan = FilterEngine().compile('MJD in [51544, 51545] | abs(dX) > 0.0001', data)
+    full = plan.evaluate(data)
+    rows = np.arange(10, 60)
+    np.testing.assert_array_equal(plan.evaluate(data, rows=rows), full[rows])
+    np.testing.assert_array_equal(plan.evaluate(data, rows=slice(5, 50)), full[5:50])
+
+
+def test_falls_back_to_dataframe_eval(data):
+    plan = FilterEngine().compile('MJD.between(51541, 51543)', data)
+    assert isinstance(plan, QueryPlan)
+    assert plan.evaluate(data).sum() == 3
+
+
+def test_unknown_column_reported(data):
+    with pytest.raises(UnknownColumnError) as info:
+        FilterEngine().compile('nosuch > 1', data)
+    assert info.value.columns == ['nosuch']
+
+
+def test_invalid_expression(data):
+    with pytest.raises(FilterSyntaxError):
+        FilterEngine().compile('MJD > (1', data)
+
+
+def test_compile_cache_hit(data):
+    engine = FilterEngine()
+    plan = engine.compile('MJD > 51550', data)
+    assert engine.compile('MJD > 51550', data) is plan
+    assert engine.last_timings['cache_hit']
+
+
+def test_refinement_of():
+    data = pd.DataFrame({'a': [1.0, 2.0], 'b': [3.0, 4.0]})
+    engine = FilterEngine()
+    previous = engine.compile('a > 1', data)
+    refined = engine.compile('a > 1 and b in [3, 4]', data)
+    extra = refined.refinement_of(previous)
+    assert [refined.subplan(extra).text] == ["(`b` in [3.0, 4.0])"]
+    assert engine.compile('b > 1', data).refinement_of(previous) is None
+
+
+def test_referenced_columns():
+    columns = ['MJD', 'dX', 'dY']
+    assert referenced_columns('abs(dX) > 1 and MJD in [1, 2]', columns) == ['dX', 'MJD']
+    assert referenced_columns('dY.between(1, 2)', columns) == ['dY']
+
+
+@pytest.fixture
+def manager(data_manager, tmp_path):
+    path = tmp_path / 'data.csv'
+    pd.DataFrame({'a': np.arange(200), 'b': np.arange(200) % 5}).to_csv(path, index=False)
+    success, message = data_manager.load_data(str(path))
+    assert success, message
+    return data_manager
+
+
+def _rows(manager):
+    return list(manager.filtered_data['a'])
+
+
+def test_refine_ands_with_previous_mask(manager):
+    assert manager.set_filtered_data('a > 120')[0]
+    previous = manager.filter_mask
+    previous_rows = previous.to_bool().copy()
+
+    assert manager.set_filtered_data('a > 120 and b == 3')[0]
+    assert manager.filter_timings['backend'].startswith('refine')
+    assert _rows(manager) == [a for a in range(121, 200) if a % 5 == 3]
+    # 追加条件不修改上一步的结果
+    np.testing.assert_array_equal(previous.to_bool(), previous_rows)
+    assert [plan.expr for plan, _ in manager.filter_stack] == ['a > 120', 'a > 120 and b == 3']
+
+
+def test_unrelated_filter_is_not_refined(manager):
+    assert manager.set_filtered_data('a > 120')[0]
+    assert manager.set_filtered_data('b == 3')[0]
+    assert not manager.filter_timings['backend'].startswith('refine')
+    assert _rows(manager) == [a for a in range(200) if a % 5 == 3]
+
+
+def test_undo_restores_previous_mask_and_expression(manager):
+    assert manager.set_filtered_data('a > 120')[0]
+    previous = manager.filter_mask
+    assert manager.set_filtered_data('a > 120 and b == 3')[0]
+
+    success, _, expr = manager.undo_filter()
+    assert success
+    assert expr == 'a > 120'
+    assert manager.filter_mask is previous
+    assert _rows(manager) == list(range(121, 200))
+
+    success, _, expr = manager.undo_filter()
+    assert success
+    assert expr == ''
+    assert manager.filtered_data is None
+    assert manager.filter_stack == []
+
+
+def test_undo_with_empty_stack(manager):
+    success, message, expr = manager.undo_filter()
+    assert not success
+    assert expr == ''
+    assert manager.filtered_data is None
+
+
+def test_stack_is_bounded(manager):
+    manager.FILTER_STACK_SIZE = 3
+    for limit in range(10, 60, 10):
+        assert manager.set_filtered_data(f'a > {limit}')[0]
+    assert [plan.expr for plan, _ in manager.filter_stack] == ['a > 30', 'a > 40', 'a > 50']
+
+
+def test_reload_clears_stack(manager):
+    assert manager.set_filtered_data('a > 120')[0]
+    assert manager.set_filtered_data('a > 120 and b == 3')[0]
+    assert manager.load_data(manager.file_path)[0]
+    assert manager.filter_stack == []
+    assert manager.filtered_data is None
+    assert manager.undo_filter()[0] is False
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from core.histogram import BASE_BINS, HistogramAccumulator, accumulate
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=20_000)
+    values[::50] = np.nan
+    return values
+
+
+def test_add_matches_numpy(values):
+    hist = HistogramAccumulator(-2.0, 2.0, 37).add(values)
+    expected, edges = np.histogram(values[~np.isnan(values)], bins=37, range=(-2.0, 2.0))
+    np.testing.assert_array_equal(hist.counts, expected)
+    np.testing.assert_allclose(hist.edges, edges)
+
+
+def test_values_on_edges_match_numpy():
+    edges = np.linspace(0.0, 1.0, 11)
+    values = np.concatenate([edges, edges + 1e-12, edges - 1e-12])
+    hist = HistogramAccumulator(0.0, 1.0, 10).add(values)
+    np.testing.assert_array_equal(hist.counts, np.histogram(values, bins=edges)[0])
+
+
+def test_weights(values):
+    weights = np.abs(np.nan_to_num(values))
+    hist = HistogramAccumulator(-3.0, 3.0, 20).add(values, weights)
+    expected = np.histogram(values[~np.isnan(values)], bins=20, range=(-3.0, 3.0),
+                            weights=weights[~np.isnan(values)])[0]
+    np.testing.assert_allclose(hist.counts, expected)
+
+
+def test_merge(values):
+    whole = HistogramAccumulator(-3.0, 3.0, 25).add(values)
+    parts = HistogramAccumulator(-3.0, 3.0, 25)
+    for start in range(0, len(values), 3000):
+        parts.merge(parts.empty_like().add(values[start:start + 3000]))
+    np.testing.assert_array_equal(parts.counts, whole.counts)
+    with pytest.raises(ValueError):
+        parts.merge(HistogramAccumulator(-3.0, 3.0, 26))
+
+
+@pytest.mark.parametrize('bins', [10, 50, 60, 200])
+def test_rebin_aligned_is_exact(values, bins):
+    base = HistogramAccumulator(-4.0, 4.0, BASE_BINS).add(values)
+    rebinned = base.rebin(bins)
+    direct = HistogramAccumulator(-4.0, 4.0, bins).add(values)
+    np.testing.assert_allclose(rebinned.counts, direct.counts)
+
+
+@pytest.mark.parametrize('bins, lower, upper', [(7, None, None), (50, -1.0, 1.5)])
+def test_rebin_unaligned_within_one_fine_bin(values, bins, lower, upper):
+    base = HistogramAccumulator(-4.0, 4.0, BASE_BINS).add(values)
+    rebinned = base.rebin(bins, lower, upper)
+    direct = HistogramAccumulator(rebinned.lower, rebinned.upper, bins).add(values)
+    assert np.abs(rebinned.counts - direct.counts).max() <= base.counts.max()
+    assert rebinned.total == pytest.approx(direct.total, abs=2 * base.counts.max())
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_accumulate_chunks(values, workers):
+    hist = accumulate(values, 30, chunk_rows=1_000, workers=workers)
+    finite = values[~np.isnan(values)]
+    expected = np.histogram(finite, bins=30, range=(finite.min(), finite.max()))[0]
+    np.testing.assert_array_equal(hist.counts, expected)
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from core.lod import decimate_line, is_sorted, thin_scatter
+
+
+def _pixel_envelope(x, y, indices, width, x_range):
+    """每个像素列中y的最小值和最大值"""
+    columns = np.clip(((x[indices] - x_range[0]) / (x_range[1] - x_range[0]) * width).astype(int),
+                      0, width - 1)
+    result = {}
+    for column, value in zip(columns, y[indices]):
+        lo, hi = result.get(column, (value, value))
+        result[column] = (min(lo, value), max(hi, value))
+    return result
+
+
+def test_is_sorted():
+    assert is_sorted(np.array([1.0, 1.0, 2.0]))
+    assert not is_sorted(np.array([2.0, 1.0]))
+    assert is_sorted(np.array([]))
+
+
+def test_decimate_line_keeps_small_input():
+    x = np.arange(100.0)
+    np.testing.assert_array_equal(decimate_line(x, np.sin(x), width=50), np.arange(100))
+
+
+def test_decimate_line_preserves_extremes():
+    rng = np.random.default_rng(0)
+    x = np.arange(100_000.0)
+    y = rng.normal(size=len(x))
+    y[12_345] = 50.0
+    y[67_890] = -50.0
+    width = 200
+    indices = decimate_line(x, y, width)
+    assert len(indices) <= 4 * width
+    assert np.all(np.diff(indices) > 0)
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert 12_345 in indices and 67_890 in indices
+    # 每个桶的最小值和最大值都被保留
+    full = _pixel_envelope(x, y, np.arange(len(x)), width, (x[0], x[-1]))
+    kept = _pixel_envelope(x, y, indices, width, (x[0], x[-1]))
+    assert kept == full
+
+
+def test_decimate_line_visible_range():
+    x = np.arange(100_000.0)
+    y = np.cos(x / 1000)
+    indices = decimate_line(x, y, width=100, x_range=(20_000, 30_000))
+    assert x[indices].min() < 20_000 <= x[indices[1]]
+    assert x[indices].max() > 30_000 >= x[indices[-2]]
+
+
+def test_decimate_line_unsorted_x():
+    rng = np.random.default_rng(1)
+    x = rng.random(50_000)
+    y = rng.random(50_000)
+    indices = decimate_line(x, y, width=100)
+    assert len(indices) <= 400
+    assert np.argmax(y) in indices and np.argmin(y) in indices
+
+
+def test_thin_scatter_keeps_small_input():
+    x = np.array([0.0, np.nan, 2.0])
+    np.testing.assert_array_equal(thin_scatter(x, x, 10, 10), [0, 2])
+
+
+def test_thin_scatter_limits_points_and_keeps_outliers():
+    rng = np.random.default_rng(2)
+    x = rng.normal(size=300_000)
+    y = rng.normal(size=300_000)
+    x[-1], y[-1] = 40.0, 40.0
+    indices = thin_scatter(x, y, 100, 100, max_points=10_000)
+    assert len(indices) < 20_000
+    assert len(x) - 1 in indices
+    # 被占据的像素都至少保留一个点
+    px = np.clip(((x - x.min()) / (x.max() - x.min()) * 100).astype(int), 0, 99)
+    py = np.clip(((y - y.min()) / (y.max() - y.min()) * 100).astype(int), 0, 99)
+    cells = set(zip(px, py))
+    assert set(zip(px[indices], py[indices])) == cells
+
+
+def test_thin_scatter_is_stable():
+    rng = np.random.default_rng(3)
+    x = rng.normal(size=100_000)
+    y = rng.normal(size=100_000)
+    first = thin_scatter(x, y, 50, 50, max_points=5_000)
+    second = thin_scatter(x, y, 50, 50, max_points=5_000)
+    np.testing.assert_array_equal(first, second)
+
+
+@pytest.mark.parametrize('x_range', [(-1.0, 1.0), (0.5, 3.0)])
+def test_thin_scatter_visible_range(x_range):
+    rng = np.random.default_rng(4)
+    x = rng.normal(size=50_000)
+    y = rng.normal(size=50_000)
+    indices = thin_scatter(x, y, 50, 50, x_range=x_range, max_points=1_000)
+    assert np.all((x[indices] >= x_range[0]) & (x[indices] <= x_range[1]))
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.multi_loader import SOURCE_COLUMN, expand_paths, read_many
+
+
+@pytest.fixture
+def files(tmp_path):
+    first = tmp_path / 'a.csv'
+    first.write_text('t,x\n1,10\n2,20\n')
+    second = tmp_path / 'b.txt'
+    second.write_text('t y\n3 0.5\n')
+    (tmp_path / 'notes.md').write_text('skip')
+    return [str(first), str(second)], str(tmp_path / 'missing.csv')
+
+
+def test_expand_paths(files, tmp_path):
+    paths, missing = files
+    assert expand_paths(str(tmp_path)) == paths
+    assert expand_paths(str(tmp_path / '*.csv')) == paths[:1]
+    assert expand_paths([paths[1], paths[0], paths[1], missing]) == [paths[1], paths[0]]
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_read_many_merges_and_reports_failures(files, processes):
+    paths, missing = files
+    progress = []
+    merged, report = read_many([paths[0], missing, paths[1]], processes=processes,
+                               progress_callback=progress.append)
+
+    # 列取并集，缺少的列为缺失值；行按文件顺序排列
+    assert sorted(merged.columns) == sorted(['t', 'x', 'y', SOURCE_COLUMN])
+    assert list(merged['t']) == [1, 2, 3]
+    np.testing.assert_array_equal(merged['x'], [10, 20, np.nan])
+    np.testing.assert_array_equal(merged['y'], [np.nan, np.nan, 0.5])
+    assert isinstance(merged[SOURCE_COLUMN].dtype, pd.CategoricalDtype)
+    assert list(merged[SOURCE_COLUMN]) == ['a.csv', 'a.csv', 'b.txt']
+
+    assert [item['file'] for item in report] == [paths[0], missing, paths[1]]
+    assert [item['rows'] for item in report] == [2, 0, 1]
+    assert report[0]['error'] is None and report[2]['error'] is None
+    assert report[1]['error']
+    assert report[1]['engine'] is None
+    assert progress[-1] == 100
+
+
+def test_read_many_all_failed(files):
+    _, missing = files
+    merged, report = read_many([missing], processes=1)
+    assert merged is None
+    assert len(report) == 1 and report[0]['error']
@@ -0,0 +1,124 @@
+import numpy as np
+import pytest
+
+from core.row_mask import RowMask
+
+
+def _random_mask(length, seed=0):
+    return np.random.default_rng(seed).random(length) < 0.4
+
+
+@pytest.mark.parametrize('length', [1, 7, 8, 9, 16, 17, 100])
+def test_from_slice_matches_from_bool(length):
+    for start in range(length + 1):
+        for stop in range(start, length + 2):
+            expected = np.zeros(length, dtype=bool)
+            expected[start:stop] = True
+            mask = RowMask.from_slice(slice(start, stop), length)
+            assert mask.count == expected.sum()
+            assert mask.nbytes == 0
+            np.testing.assert_array_equal(mask.bits, np.packbits(expected))
+            np.testing.assert_array_equal(mask.to_bool(), expected)
+
+
+def test_from_slice_keeps_span_indexer():
+    mask = RowMask.from_slice(slice(10, 20), 50)
+    assert mask.indexer() == slice(10, 20)
+    np.testing.assert_array_equal(mask.indices(), np.arange(10, 20))
+
+
+def test_span_intersection_stays_span():
+    mask = RowMask.from_slice(slice(0, 30), 50) & RowMask.from_slice(slice(20, 40), 50)
+    assert mask.indexer() == slice(20, 30)
+    assert mask.nbytes == 0
+    empty = RowMask.from_slice(slice(0, 10), 50) & RowMask.from_slice(slice(20, 40), 50)
+    assert empty.count == 0
+
+
+def test_from_indices_matches_from_bool():
+    expected = _random_mask(37)
+    mask = RowMask.from_indices(np.flatnonzero(expected), len(expected))
+    np.testing.assert_array_equal(mask.bits, np.packbits(expected))
+    assert mask.count == expected.sum()
+
+
+@pytest.mark.parametrize('length', [5, 8, 13, 64])
+def test_logical_operations(length):
+    a, b = _random_mask(length, 1), _random_mask(length, 2)
+    ma, mb = RowMask.from_bool(a), RowMask.from_bool(b)
+    np.testing.assert_array_equal((ma & mb).to_bool(), a & b)
+    np.testing.assert_array_equal((ma | mb).to_bool(), a | b)
+    inverted = ~ma
+    np.testing.assert_array_equal(inverted.to_bool(), ~a)
+    assert inverted.count == (~a).sum()
+    # 填充位被清除，重新统计的结果一致
+    assert RowMask(inverted.bits, length).count == (~a).sum()
+
+
+def test_mixed_span_and_bits():
+    a = _random_mask(40)
+    span = RowMask.from_slice(slice(5, 25), 40)
+    expected = np.zeros(40, dtype=bool)
+    expected[5:25] = True
+    np.testing.assert_array_equal((span & RowMask.from_bool(a)).to_bool(), expected & a)
+    np.testing.assert_array_equal((span | RowMask.from_bool(a)).to_bool(), expected | a)
+
+
+def test_refine_and_indexer():
+    a = _random_mask(50)
+    mask = RowMask.from_bool(a)
+    selected = np.flatnonzero(a)
+    keep = np.arange(len(selected)) % 2 == 0
+    refined = mask.refine(keep)
+    np.testing.assert_array_equal(refined.indexer(), selected[keep])
+    assert refined.count == keep.sum()
+
+
+def test_rejects_different_lengths():
+    with pytest.raises(ValueError):
+        RowMask.from_bool(np.ones(3, dtype=bool)) & RowMask.from_bool(np.ones(4, dtype=bool))
+
+
+def test_extend():
+    a, b = _random_mask(21, 3), _random_mask(12, 4)
+    extended = RowMask.from_bool(a).extend(b)
+    expected = np.concatenate([a, b])
+    assert extended.length == len(expected)
+    assert extended.count == expected.sum()
+    np.testing.assert_array_equal(extended.to_bool(), expected)
+
+
+@pytest.mark.parametrize('make', [
+    lambda: RowMask.from_bool(_random_mask(13, 5)),
+    lambda: RowMask.from_slice(slice(3, 13), 13),
+    lambda: RowMask.from_slice(slice(3, 9), 13),
+    lambda: RowMask.from_slice(slice(0, 0), 13),
+])
+def test_repeated_extend_in_place(make):
+    mask = make()
+    expected = mask.to_bool()
+    old_indices = mask.indices().copy()
+    rng = np.random.default_rng(6)
+    for step in range(30):
+        size = int(rng.integers(0, 11))
+        kind = step % 3
+        new = rng.random(size) < 0.5 if kind == 0 else np.full(size, kind == 1)
+        assert mask.extend(new) is mask
+        expected = np.concatenate([expected, new])
+        assert mask.length == len(expected)
+        assert mask.count == expected.sum()
+        np.testing.assert_array_equal(mask.bits, np.packbits(expected))
+        np.testing.assert_array_equal(mask.indices(), np.flatnonzero(expected))
+    np.testing.assert_array_equal(mask.to_bool(), expected)
+    np.testing.assert_array_equal(old_indices, np.flatnonzero(expected)[:len(old_indices)])
+
+
+def test_extend_keeps_span():
+    mask = RowMask.from_slice(slice(5, 10), 10)
+    mask.extend(np.ones(4, dtype=bool))
+    assert mask.indexer() == slice(5, 14)
+    mask.extend(np.zeros(3, dtype=bool))
+    assert mask.indexer() == slice(5, 14)
+    assert mask.nbytes == 0
+    mask.extend(np.ones(2, dtype=bool))
+    np.testing.assert_array_equal(mask.indexer(), np.r_[5:14, 17:19])
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.column_store import ColumnStore
+from core.filter_engine import FilterEngine
+from core.sorted_index import SortedIndex
+
+
+@pytest.fixture
+def indexed():
+    data = pd.DataFrame({
+        'MJD': np.arange(-50, 50, dtype=np.float64),
+        'down': np.arange(100, 0, -1, dtype=np.int64),
+        'noise': np.random.default_rng(0).normal(size=100),
+    })
+    store = ColumnStore()
+    index = SortedIndex()
+    store.build(data)
+    index.build(data, store)
+    yield data, index
+    store.close()
+
+
+def test_detects_monotonic_columns(indexed):
+    data, index = indexed
+    assert index._columns == {0: True, 1: False}
+
+
+@pytest.mark.parametrize('expr', [
+    'MJD > -5', 'MJD >= -5.5', '-5 < MJD', 'MJD == -3', 'MJD <= 10 and MJD > -10',
+    'down < 30', 'down >= 70 & noise > 0', '20 >= down',
+])
+def test_resolve_matches_full_scan(indexed, expr):
+    data, index = indexed
+    plan = FilterEngine().compile(expr, data)
+    resolved = index.resolve(plan, data)
+    assert resolved is not None
+    rows, residual = resolved
+    mask = np.zeros(len(data), dtype=bool)
+    mask[rows] = True
+    if residual is not None:
+        mask[rows] &= residual.evaluate(data, rows=rows)
+    np.testing.assert_array_equal(mask, data.eval(expr).to_numpy())
+
+
+def test_non_constant_terms_not_indexed(indexed):
+    data, index = indexed
+    plan = FilterEngine().compile('MJD > noise', data)
+    assert index.resolve(plan, data) is None
+
+
+def test_extend_drops_broken_order(indexed):
+    data, index = indexed
+    store = index._column_store
+    grown = pd.concat([data, pd.DataFrame({'MJD': [60.0], 'down': [5], 'noise': [0.0]})],
+                      ignore_index=True)
+    store.extend(grown, len(data))
+    index.extend(len(data))
+    assert index._columns == {0: True}
@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+from collections import OrderedDict
 from PyQt6 import sip
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                             QLabel, QTableView, QHeaderView, QComboBox, 
@@ -8,32 +9,109 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
 from PyQt6.QtCore import (Qt, QAbstractTableModel, QModelIndex, pyqtSignal,
                           QMetaObject, Qt, QThread, pyqtSignal)
 
+def _format_column(series):
+    """把一列数据批量格式化为显示字符串（空值显示为空字符串）"""
+    dtype = series.dtype
+    if pd.api.types.is_float_dtype(dtype):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        text = np.char.mod("%.6g", values).astype(object)
+        text[np.isnan(values)] = ""
+        return text
+    if pd.api.types.is_numeric_dtype(dtype) and not series.hasnans:
+        return series.astype(str).to_numpy(dtype=object)
+
+    # 对象列中可能混有浮点数，逐个处理
+    text = np.empty(len(series), dtype=object)
+    for i, value in enumerate(series.tolist()):
+        if pd.isna(value):
+            text[i] = ""
+        elif isinstance(value, (float, np.floating)):
+            text[i] = f"{value:.6g}"
+        else:
+            text[i] = str(value)
+    return text
+
+
 class PandasModel(QAbstractTableModel):
-    """用于在QTableView中显示pandas DataFrame的模型"""
+    """用于在QTableView中显示pandas DataFrame的模型
+
+    按行块批量取数和格式化，格式化结果放入有上限的LRU缓存；
+    行数很多时通过 canFetchMore/fetchMore 逐批暴露给视图。
+    """
+
+    # 每个缓存块的行数
+    BLOCK_ROWS = 256
+    # 最多缓存的块数
+    MAX_BLOCKS = 64
+    # 每次向视图追加的行数
+    FETCH_ROWS = 100_000
     
-    def __init__(self, data=None):
+    def __init__(self, data=None, rows=None):
         super().__init__()
         self._data = data if data is not None else pd.DataFrame()
+        # 行位置数组：显示筛选结果时直接按位置读取原始数据，不复制
+        self._rows = rows
+        self._blocks = OrderedDict()
+        self._loaded_rows = min(self.total_rows(), self.FETCH_ROWS)
+
+    def total_rows(self):
+        """要显示的总行数（包括尚未追加到视图的行）"""
+        if self._rows is not None:
+            return len(self._rows)
+        return len(self._data)
     
     def rowCount(self, parent=QModelIndex()):
-        return len(self._data)
+        if parent.isValid():
+            return 0
+        return self._loaded_rows
     
     def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
         return len(self._data.columns)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._loaded_rows < self.total_rows()
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        remaining = self.total_rows() - self._loaded_rows
+        count = min(remaining, self.FETCH_ROWS)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded_rows, self._loaded_rows + count - 1)
+        self._loaded_rows += count
+        self.endInsertRows()
+
+    def _block(self, block_id):
+        """获取一个行块的格式化结果（按列保存的字符串数组）"""
+        block = self._blocks.get(block_id)
+        if block is not None:
+            self._blocks.move_to_end(block_id)
+            return block
+
+        start = block_id * self.BLOCK_ROWS
+        stop = min(start + self.BLOCK_ROWS, self.total_rows())
+        positions = slice(start, stop) if self._rows is None else self._rows[start:stop]
+        frame = self._data.iloc[positions]
+        block = [_format_column(frame.iloc[:, col]) for col in range(frame.shape[1])]
+
+        self._blocks[block_id] = block
+        if len(self._blocks) > self.MAX_BLOCKS:
+            self._blocks.popitem(last=False)
+        return block
     
     def data(self, index, role=Qt.ItemDataRole.DisplayRole):
         if not index.isValid():
             return None
             
         if role == Qt.ItemDataRole.DisplayRole:
-            value = self._data.iloc[index.row(), index.column()]
-            # 处理不同类型的数据
-            if pd.isna(value):
-                return ""
-            elif isinstance(value, (float, np.float64)):
-                return f"{value:.6g}"  # 格式化浮点数
-            else:
-                return str(value)
+            row = index.row()
+            block = self._block(row // self.BLOCK_ROWS)
+            return block[index.column()][row % self.BLOCK_ROWS]
                 
         return None
     
@@ -45,12 +123,30 @@ class PandasModel(QAbstractTableModel):
                 return str(section + 1)  # 行号从1开始
         return None
     
-    def update_data(self, data):
-        """更新模型中的数据"""
+    def update_data(self, data, rows=None):
+        """更新模型中的数据，rows为要显示的行位置（None表示全部行）"""
         self.beginResetModel()
         self._data = data if data is not None else pd.DataFrame()
+        self._rows = rows
+        self._blocks.clear()
+        self._loaded_rows = min(self.total_rows(), self.FETCH_ROWS)
         self.endResetModel()
 
+    def extend_data(self, data, rows=None):
+        """数据末尾追加了行：保留已格式化的块和滚动位置，只插入新增的行"""
+        old_total = self.total_rows()
+        self._data = data if data is not None else pd.DataFrame()
+        self._rows = rows
+        # 原来的最后一块可能不完整，丢弃后重新格式化
+        self._blocks.pop(old_total // self.BLOCK_ROWS, None)
+        count = min(self.total_rows() - old_total, self.FETCH_ROWS)
+        if self._loaded_rows < old_total or count <= 0:
+            # 视图还没有显示到末尾，新增的行随fetchMore显示
+            return
+        self.beginInsertRows(QModelIndex(), old_total, old_total + count - 1)
+        self._loaded_rows += count
+        self.endInsertRows()
+
 
 class DataView(QWidget):
     """数据视图组件"""
@@ -61,6 +157,8 @@ class DataView(QWidget):
         super().__init__()
         self.data_manager = data_manager
         self.init_ui()  # 确保初始化方法被调用
+        self.data_manager.columns_loaded.connect(self.on_columns_loaded)
+        self.data_manager.rows_appended.connect(self.on_rows_appended)
        
     def init_ui(self):
         # 创建主布局
@@ -138,6 +236,12 @@ class DataView(QWidget):
         self.apply_filter_btn.setMaximumHeight(25)  # 减小按钮高度
         filter_btn_layout.addWidget(self.apply_filter_btn)
         
+        # 撤销筛选按钮
+        self.undo_filter_btn = QPushButton("撤销筛选")
+        self.undo_filter_btn.clicked.connect(self.undo_filter)
+        self.undo_filter_btn.setMaximumHeight(25)  # 减小按钮高度
+        filter_btn_layout.addWidget(self.undo_filter_btn)
+        
         # 清除筛选按钮
         self.clear_filter_btn = QPushButton("清除筛选")
         self.clear_filter_btn.clicked.connect(self.clear_filter)
@@ -184,27 +288,30 @@ class DataView(QWidget):
                 return
     
             # 合并后的数据加载逻辑
-            data = self.data_manager.get_data()
-            if data is None:
+            if not self.data_manager.has_data():
                 print("警告：数据为空")
                 return
     
             # 新增：清理列名中的空格
+            data = self.data_manager.get_data(filtered=False)
             data.columns = data.columns.str.replace(' ', '')  # 移除列名中的空格
     
-            # 统一更新表格模型
-            self.table_model.update_data(data)
+            # 统一更新表格模型（行位图筛选结果按行位置读取原始数据，不复制）
+            display_data, rows = self.data_manager.get_display_view()
+            self.table_model.update_data(display_data, rows)
+            n_rows = self.data_manager.filtered_count
             
-            columns = list(data.columns)
+            # 懒加载列模式下包括尚未载入的列
+            columns = self.data_manager.get_column_names()
             
             # 安全更新所有下拉框
             self.safe_update_comboboxes(columns)
             
             # 更新标签显示
-            self.table_label.setText(f"数据预览: {len(data)}行 x {len(data.columns)}列")
+            self.update_table_label(n_rows)
     
             # 打印调试信息
-            print(f"已更新数据视图，列数：{len(columns)}，行数：{len(data)}")
+            print(f"已更新数据视图，列数：{len(columns)}，行数：{n_rows}")
     
             # 通知 PlotView 更新
             main_window = self.window()
@@ -222,6 +329,28 @@ class DataView(QWidget):
             import traceback
             traceback.print_exc()
 
+    def update_table_label(self, n_rows):
+        """更新表格上方的行数、列数说明"""
+        n_columns = len(self.data_manager.column_names)
+        label = f"数据预览: {n_rows}行 x {n_columns}列"
+        if self.data_manager.is_preview():
+            label += "（文件头部预览，正在加载完整数据）"
+        elif self.data_manager.is_lazy():
+            label += f"（已载入 {n_columns}/{len(self.data_manager.get_column_names())} 列，其他列在用到时载入）"
+        self.table_label.setText(label)
+
+    def on_columns_loaded(self, columns):
+        """懒加载列模式下载入新列后刷新表格"""
+        display_data, rows = self.data_manager.get_display_view()
+        self.table_model.update_data(display_data, rows)
+        self.update_table_label(len(self.data_manager.get_data(filtered=False)))
+
+    def on_rows_appended(self, start):
+        """跟踪文件时追加了新行：只向表格插入新增的行"""
+        display_data, rows = self.data_manager.get_display_view()
+        self.table_model.extend_data(display_data, rows)
+        self.update_table_label(len(self.data_manager.get_data(filtered=False)))
+
     def safe_update_comboboxes(self, columns):
         """安全更新所有下拉框"""
         try:
@@ -302,11 +431,11 @@ class DataView(QWidget):
                 
                 if success:
                     # 使用数据管理器的显示数据接口
-                    display_data = self.data_manager.get_display_data()
-                    self.table_model.update_data(display_data)
+                    display_data, rows = self.data_manager.get_display_view()
+                    self.table_model.update_data(display_data, rows)
                     # 添加筛选状态标记
                     self.filter_applied = True
-                    info_msg = f"筛选结果: {len(display_data)} 行 (原始数据 {len(raw_data)} 行)"
+                    info_msg = f"筛选结果: {self.table_model.total_rows()} 行 (原始数据 {len(raw_data)} 行)"
                     self.table_label.setText(info_msg)
                 else:
                     QMessageBox.warning(self, "筛选错误", message)
@@ -331,19 +460,35 @@ class DataView(QWidget):
 
     def clear_filter(self):
         """清除筛选条件"""
-        # 恢复原始数据
-        data = self.data_manager.get_data()
-        self.table_model.update_data(data)
-
         # 清空筛选后的数据
         self.data_manager.clear_filtered_data()
 
+        # 恢复原始数据
+        self.table_model.update_data(self.data_manager.get_data(filtered=False))
+
         # 清空筛选输入
         self.filter_expr_edit.clear()
         
         # 更新状态信息
         self.table_label.setText("数据预览")
     
+    def undo_filter(self):
+        """撤销最近一次筛选，恢复上一步的筛选结果"""
+        success, message, expr = self.data_manager.undo_filter()
+        if not success:
+            self.table_label.setText(message)
+            return
+
+        display_data, rows = self.data_manager.get_display_view()
+        self.table_model.update_data(display_data, rows)
+        self.filter_expr_edit.setPlainText(expr)
+        if expr:
+            raw_data = self.data_manager.get_data(filtered=False)
+            self.table_label.setText(f"筛选结果: {self.table_model.total_rows()} 行 (原始数据 {len(raw_data)} 行)")
+        else:
+            self.filter_applied = False
+            self.table_label.setText("数据预览")
+
     # 添加重置筛选功能
     def reset_filter(self):
         """重置数据筛选"""
@@ -355,7 +500,7 @@ class DataView(QWidget):
     # 添加显示可用列名的方法
     def show_available_columns(self):
         """显示当前数据中可用的列名"""
-        if not self.data_manager or self.data_manager.get_data() is None:
+        if not self.data_manager or not self.data_manager.has_data():
             QMessageBox.warning(self, "警告", "请先加载数据")
             return
             
@@ -409,7 +554,7 @@ class DataView(QWidget):
         """数据加载后的处理"""
         try:
             # 检查数据是否有效
-            if self.data_manager.get_data() is None:
+            if not self.data_manager.has_data():
                 raise ValueError("加载的数据为空")            
 
             # 更新数据视图
@@ -432,13 +577,11 @@ class DataView(QWidget):
         try:
             parent = self.window()
             if hasattr(parent, 'open_file'):
-                # 新增：先禁用UI防止重复操作
-                self.setEnabled(False)  
-                QApplication.processEvents()
+                # 文件在后台加载，期间当前数据保持可用，不禁用UI
 
-                # 先断开之前的连接，避免重复连接
+                # 先断开之前的连接，避免重复连接（只断开本视图的槽）
                 try:
-                    self.data_manager.data_loaded.disconnect()
+                    self.data_manager.data_loaded.disconnect(self.on_data_loaded)
                 except TypeError:
                     pass
                 # 连接信号
@@ -450,10 +593,9 @@ class DataView(QWidget):
                 # 调用主窗口的打开文件方法
                 success = parent.open_file()
                 if not success:
-                    self.setEnabled(True)
                     return False, "文件打开失败"
                 
-                return True, "数据加载成功"
+                return True, "开始加载数据"
             else:
                 return False, "无法找到主窗口"
         except Exception as e:
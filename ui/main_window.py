@@ -3,8 +3,8 @@ from PyQt6 import sip
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                             QSplitter, QFileDialog, QMessageBox, QTabWidget, 
                             QStatusBar, QLabel, QDialog, QApplication, 
-                            QInputDialog)
-from PyQt6.QtCore import Qt
+                            QInputDialog, QProgressBar, QProgressDialog)
+from PyQt6.QtCore import Qt, QEventLoop
 from PyQt6.QtGui import QPalette, QColor, QAction
 from .plot_view import PlotView
 from ui.data_view import DataView
@@ -22,6 +22,23 @@ class MainWindow(QMainWindow):
             lambda: self.data_view.update_data_view(),
             Qt.ConnectionType.QueuedConnection
         )        
+        self.data_manager.load_progress.connect(self.show_progress)
+        self.data_manager.data_loaded.connect(self._on_load_finished)
+        self.data_manager.load_failed.connect(self._on_load_failed)
+        self.data_manager.load_cancelled.connect(self._on_load_finished)
+        self.data_manager.follow_changed.connect(self._on_follow_changed)
+        self.data_manager.rows_appended.connect(self._on_rows_appended)
+        # 后台加载的进度对话框
+        self.load_dialog = None
+        # 正在进行的加载是否为多文件合并（完成后显示各文件的结果）
+        self._loading_many = False
+
+        # 应用数据缓存容量设置
+        if self.config_manager is not None:
+            cache_mb = self.config_manager.get("data_cache_max_mb", 2048)
+            self.data_manager.cache.max_bytes = cache_mb * 1024 ** 2
+            self.data_manager.optimize_dtypes_on_load = self.config_manager.get("optimize_dtypes_on_load", False)
+            self.data_manager.lazy_columns = self.config_manager.get("lazy_columns", False)
         
         # 初始化UI
         self.init_ui()
@@ -115,6 +132,11 @@ class MainWindow(QMainWindow):
         self.open_action = QAction("载入数据", self)
         self.open_action.setShortcut("Ctrl+O")
         self.open_action.triggered.connect(lambda: self.open_file())  # 确保使用lambda传递空参数
+
+        # 打开多个文件（文件夹或通配符）并合并
+        self.open_many_action = QAction("载入多个文件", self)
+        self.open_many_action.setShortcut("Ctrl+Shift+O")
+        self.open_many_action.triggered.connect(lambda: self.open_many())
         
         # 添加导出功能
         self.export_action = QAction("导出数据", self)
@@ -138,6 +160,15 @@ class MainWindow(QMainWindow):
         self.clean_data_action = QAction("数据清洗", self)
         self.clean_data_action.triggered.connect(self.show_clean_dialog)
         
+        # 添加数据类型优化操作
+        self.optimize_dtypes_action = QAction("优化数据类型", self)
+        self.optimize_dtypes_action.triggered.connect(self.optimize_dtypes)
+
+        # 添加跟踪文件追加操作
+        self.follow_action = QAction("跟踪文件追加", self)
+        self.follow_action.setCheckable(True)
+        self.follow_action.triggered.connect(self.toggle_follow)
+        
         # 添加帮助操作
         self.help_action = QAction("帮助内容", self)
         self.help_action.setShortcut("F1")
@@ -168,6 +199,7 @@ class MainWindow(QMainWindow):
         # 文件菜单
         file_menu = menu_bar.addMenu("文件")
         file_menu.addAction(self.open_action)
+        file_menu.addAction(self.open_many_action)
         
         # 添加最近文件子菜单
         self.recent_menu = file_menu.addMenu("最近打开的文件")
@@ -187,6 +219,9 @@ class MainWindow(QMainWindow):
         # 添加数据菜单
         data_menu = menu_bar.addMenu("数据")
         data_menu.addAction(self.clean_data_action)
+        data_menu.addAction(self.optimize_dtypes_action)
+        data_menu.addSeparator()
+        data_menu.addAction(self.follow_action)
         
         # 添加视图菜单
         view_menu = menu_bar.addMenu("视图")
@@ -211,6 +246,21 @@ class MainWindow(QMainWindow):
         self.status_label = QLabel("就绪")
         self.status_bar.addWidget(self.status_label)
 
+        # 添加进度条（流式加载和逐块绘图时显示）
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.setVisible(False)
+        self.status_bar.addPermanentWidget(self.progress_bar)
+
+    def show_progress(self, value):
+        """更新状态栏进度条，完成后自动隐藏"""
+        self.progress_bar.setValue(value)
+        self.progress_bar.setVisible(value < 100)
+        # 流式筛选在主线程中同步进行，只重绘进度条；不能处理事件，
+        # 否则排队的加载完成、绘图完成等信号会在进度更新中途执行
+        self.progress_bar.repaint()
+
     def update_recent_file_actions(self):
         """更新最近文件操作"""
         if self.config_manager is None:
@@ -235,7 +285,18 @@ class MainWindow(QMainWindow):
         
         self.recent_menu.setEnabled(num_recent_files > 0)
 
-    def open_file(self, file_path=None):
+    def open_file(self, file_path=None, wait=False):
+        """打开数据文件
+
+        文件在后台线程中解析，期间当前数据仍然可以浏览和绘图，可以在进度对话框中取消。
+        大文件先显示头部预览，完整数据加载完成后自动替换。
+
+        Args:
+            wait: bool, 是否等待加载完成（需要立即使用新数据时，如加载图表设置）
+
+        Returns:
+            bool: wait为False时表示是否开始加载，为True时表示是否加载成功
+        """
         if file_path is None:
             file_path, _ = QFileDialog.getOpenFileName(
                 self, 
@@ -255,18 +316,126 @@ class MainWindow(QMainWindow):
                 )
                 sep = sep.strip() if sep.strip() else None
                 
-                # 加载数据
-                success, message = self.data_manager.load_data(file_path, sep)
-                if not success:
-                    QMessageBox.critical(self, "错误", message)
-                    return False
-                    
-                return True
+                # 先显示头部预览，再在后台加载完整数据，完成后DataManager发出data_loaded
+                self.show_load_dialog(os.path.basename(file_path))
+                self.data_manager.load_data_async(file_path, sep, preview=True)
+                if not wait:
+                    return True
+
+                # 等待期间事件循环继续运行，加载结束（成功、失败或取消）时退出；
+                # 预览数据也会发出data_loaded，此时加载尚未结束
+                loop = QEventLoop()
+                loaded = []
+
+                def on_loaded():
+                    if not self.data_manager.is_loading():
+                        loaded.append(True)
+                        loop.quit()
+
+                signals = (self.data_manager.load_failed, self.data_manager.load_cancelled)
+                self.data_manager.data_loaded.connect(on_loaded)
+                for signal in signals:
+                    signal.connect(loop.quit)
+                try:
+                    if self.data_manager.is_loading():
+                        loop.exec()
+                finally:
+                    self.data_manager.data_loaded.disconnect(on_loaded)
+                    for signal in signals:
+                        signal.disconnect(loop.quit)
+                return bool(loaded)
             except Exception as e:
                 QMessageBox.critical(self, "错误", f"文件打开失败: {str(e)}")
                 return False
         return False
 
+    def open_many(self, pattern=None):
+        """打开文件夹或通配符匹配的多个文件，并行解析后合并为一个数据集
+
+        合并后的数据增加source_file列记录来源文件；单个文件失败不影响其他文件。
+        """
+        if pattern is None:
+            pattern, ok = QInputDialog.getText(
+                self,
+                "载入多个文件",
+                "请输入文件夹路径或通配符（如 data/*.txt）:"
+            )
+            if not ok:
+                return False
+            pattern = pattern.strip()
+        if not pattern:
+            return False
+
+        try:
+            sep, ok = QInputDialog.getText(
+                self,
+                "分隔符设置",
+                "请输入列分隔符（留空自动识别）:"
+            )
+            sep = sep.strip() if sep.strip() else None
+
+            self._loading_many = True
+            self.show_load_dialog(pattern)
+            self.data_manager.load_many_async(pattern, sep)
+            return True
+        except Exception as e:
+            self._loading_many = False
+            QMessageBox.critical(self, "错误", f"文件打开失败: {str(e)}")
+            return False
+
+    def _show_many_report(self):
+        """显示多文件合并的结果：成功的文件数、总行数和失败的文件"""
+        load_info = self.data_manager.load_info or {}
+        report = load_info.get('files', [])
+        failed = [item for item in report if item['error'] is not None]
+        rows = len(self.data_manager.data) if self.data_manager.data is not None else 0
+        self.status_label.setText(
+            f"已合并 {len(report) - len(failed)}/{len(report)} 个文件，共 {rows} 行，"
+            f"耗时 {load_info.get('timings', {}).get('total', 0):.2f}s")
+        if failed:
+            details = "\n".join(f"{os.path.basename(item['file'])}: {item['error']}" for item in failed)
+            QMessageBox.warning(self, "部分文件加载失败", f"以下文件未能加载:\n{details}")
+
+    def show_load_dialog(self, file_name):
+        """显示后台加载的进度对话框（非模态，不阻塞当前数据的操作）"""
+        if self.load_dialog is None:
+            self.load_dialog = QProgressDialog(self)
+            self.load_dialog.setWindowTitle("加载中")
+            self.load_dialog.setCancelButtonText("取消")
+            self.load_dialog.setRange(0, 100)
+            self.load_dialog.setWindowModality(Qt.WindowModality.NonModal)
+            self.load_dialog.setMinimumDuration(500)
+            self.load_dialog.setAutoClose(False)
+            self.load_dialog.setAutoReset(False)
+            self.load_dialog.canceled.connect(self.data_manager.cancel_load)
+            self.data_manager.load_progress.connect(self.load_dialog.setValue)
+        self.load_dialog.setLabelText(f"正在加载 {file_name} ...")
+        self.load_dialog.setValue(0)
+        self.status_label.setText(f"正在加载 {file_name} ...")
+
+    def _on_load_finished(self):
+        """加载完成或取消后关闭进度对话框"""
+        if self.data_manager.is_loading():
+            # 只是显示了预览，完整数据仍在加载
+            self.status_label.setText("已显示预览，正在加载完整数据...")
+            return
+        if self.data_manager.is_preview():
+            # 完整加载被取消，保留预览数据
+            self.status_label.setText("加载已取消，当前只有预览数据")
+        else:
+            self.status_label.setText("就绪")
+        if self.load_dialog is not None:
+            self.load_dialog.reset()
+        self.progress_bar.setVisible(False)
+        loading_many, self._loading_many = self._loading_many, False
+        if loading_many and (self.data_manager.load_info or {}).get('engine') == 'multi':
+            self._show_many_report()
+
+    def _on_load_failed(self, message):
+        """后台加载失败"""
+        self._on_load_finished()
+        QMessageBox.critical(self, "错误", message)
+
     def open_recent_file(self):
         """打开最近文件"""
         action = self.sender()
@@ -294,7 +463,7 @@ class MainWindow(QMainWindow):
 
     def export_data(self):
         """导出当前数据"""
-        if self.data_manager.get_data() is None:
+        if not self.data_manager.has_data():
             QMessageBox.warning(self, "警告", "没有可导出的数据")
             return
         
@@ -308,18 +477,27 @@ class MainWindow(QMainWindow):
             return
         
         try:
+            # 懒加载列模式下先载入全部列
+            success, message = self.data_manager.ensure_columns()
+            if not success:
+                QMessageBox.critical(self, "错误", message)
+                return
+
+            # 筛选结果只取一次（行位图结果每次获取都会复制）
+            data = self.data_manager.get_data()
+
             # 根据选择的文件类型导出数据
             if file_path.endswith('.csv'):
-                self.data_manager.get_data().to_csv(file_path, index=False)
+                data.to_csv(file_path, index=False)
             elif file_path.endswith('.xlsx'):
-                self.data_manager.get_data().to_excel(file_path, index=False)
+                data.to_excel(file_path, index=False)
             elif file_path.endswith('.json'):
-                self.data_manager.get_data().to_json(file_path, orient='records')
+                data.to_json(file_path, orient='records')
             else:
                 # 默认导出为CSV
                 if not file_path.endswith('.csv'):
                     file_path += '.csv'
-                self.data_manager.get_data().to_csv(file_path, index=False)
+                data.to_csv(file_path, index=False)
             
             self.status_label.setText(f"数据已导出至: {file_path}")
             QMessageBox.information(self, "成功", f"数据已成功导出至: {file_path}")
@@ -373,7 +551,7 @@ class MainWindow(QMainWindow):
 
     def show_clean_dialog(self):
         """显示数据清洗对话框"""
-        if self.data_manager.get_data() is None:
+        if not self.data_manager.has_data():
             QMessageBox.warning(self, "警告", "请先加载数据")
             return
         
@@ -391,6 +569,48 @@ class MainWindow(QMainWindow):
                     f"列数: {file_info['columns']}"
                 )
 
+    def optimize_dtypes(self):
+        """降级数值类型并转换分类列，显示内存占用变化"""
+        if not self.data_manager.has_data():
+            QMessageBox.warning(self, "警告", "请先加载数据")
+            return
+        
+        success, message = self.data_manager.optimize_dtypes()
+        if success:
+            self.data_view.update_data_view()
+            self.status_label.setText(message.split("\n")[0])
+            QMessageBox.information(self, "数据类型优化", message)
+        else:
+            QMessageBox.critical(self, "错误", message)
+
+    def toggle_follow(self, checked):
+        """开始或停止跟踪当前文件末尾追加的数据"""
+        if not checked:
+            self.data_manager.stop_follow()
+            return
+
+        rows = len(self.data_manager.data) if self.data_manager.has_data() else 0
+        success, message = self.data_manager.start_follow()
+        if success:
+            self.status_label.setText(message)
+            if len(self.data_manager.data) != rows:
+                # 去掉了加载时尚未写完的最后一行
+                self.data_view.update_data_view()
+        else:
+            self.follow_action.setChecked(False)
+            QMessageBox.warning(self, "警告", message)
+
+    def _on_follow_changed(self, following):
+        """跟踪状态变化（包括数据被修改后自动停止）时同步菜单项"""
+        self.follow_action.setChecked(following)
+        if not following and self.data_manager.data is not None:
+            self.status_label.setText("已停止跟踪文件")
+
+    def _on_rows_appended(self, start):
+        """跟踪文件时追加了新行"""
+        rows = len(self.data_manager.data)
+        self.status_label.setText(f"正在跟踪 {self.data_manager.file_name}: 新增 {rows - start} 行，共 {rows} 行")
+
     def show_preferences(self):
         """显示首选项对话框"""
         if self.config_manager is None:
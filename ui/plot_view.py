@@ -9,6 +9,8 @@ from PyQt6.QtCore import Qt, pyqtSlot, pyqtSignal, QThreadPool, QTimer
 import matplotlib
 from PyQt6.QtGui import QDoubleValidator, QColor
 matplotlib.use('QtAgg')
+from core.plot_scheduler import PlotScheduler
+from core.plot_cache import PlotCache
 
 class PlotView(QWidget):
     """绘图视图组件"""
@@ -28,6 +30,17 @@ class PlotView(QWidget):
         # 初始化线程池
         self.thread_pool = QThreadPool()
         self.thread_pool.setMaxThreadCount(4)  # 设置最大线程数
+
+        # 绘图数据准备结果的缓存
+        self.plot_cache = PlotCache()
+        self._cache_data_version = None
+
+        # 绘图任务调度器：新请求取消旧任务，只应用最新的结果
+        self.plot_scheduler = PlotScheduler(self.thread_pool, self)
+        self.plot_scheduler.prepared.connect(self._on_plot_prepared)
+        self.plot_scheduler.finished.connect(self._on_plot_finished)
+        self.plot_scheduler.error.connect(self._on_plot_error)
+        self.plot_scheduler.progress.connect(self._on_plot_progress)
         
         # 初始化防抖动定时器
         self.debounce_timer = QTimer()
@@ -44,6 +57,13 @@ class PlotView(QWidget):
         # 添加数据管理器的信号连接
         if hasattr(self.data_manager, 'data_changed'):
             self.data_manager.data_changed.connect(self.update_columns)
+        # 当前图表是否由头部预览数据绘制；完整数据加载后自动重绘
+        self._plotted_preview = False
+        self._plotted_file = None
+        self.data_manager.data_loaded.connect(self._on_data_loaded)
+        # 当前图表的绘图数据标识，跟踪文件时据此判断能否直接追加新增的点
+        self._plotted_key = None
+        self.data_manager.rows_appended.connect(self._on_rows_appended)
         
         # 初始化时尝试更新列
         self.update_columns()
@@ -181,6 +201,14 @@ class PlotView(QWidget):
         self.mark_size_spin.setRange(1, 30)
         self.mark_size_spin.setValue(10)
         marker_layout.addWidget(self.mark_size_spin)
+
+        # 渲染模式：数据量很大时可以把散点聚合为像素网格显示
+        marker_layout.addWidget(QLabel("渲染模式"))
+        self.render_mode_combo = QComboBox()
+        self.render_mode_combo.addItems(["自动", "标记", "栅格"])
+        self.render_mode_combo.setToolTip("栅格模式按像素聚合点数，适合千万级数据点的散点图")
+        self.render_mode_combo.currentTextChanged.connect(self.on_render_mode_changed)
+        marker_layout.addWidget(self.render_mode_combo)
         plot_control_layout.addLayout(marker_layout)
         
         # 线型设置
@@ -398,7 +426,11 @@ class PlotView(QWidget):
         self.current_plot_params['y_minor_ticks'] = self.y_minor_ticks_spin.value()
         self.current_plot_params['y_show_grid'] = self.y_grid_checkbox.isChecked()
         
-        # 重新处理绘图请求 - 添加histtype和bins参数
+        # 重新处理绘图请求
+        self._replot()
+
+    def _replot(self):
+        """按当前绘图参数重新绘图"""
         self.handle_plot_request(
             self.current_plot_params.get('plot_type', ''),
             self.current_plot_params.get('x_col', ''),
@@ -412,8 +444,43 @@ class PlotView(QWidget):
             self.current_plot_params.get('bins', 10),
             self.current_plot_params.get('colormap', 'viridis'),
             self.current_plot_params.get('line_style', '-'),
-            self.current_plot_params.get('line_width', 2)            
+            self.current_plot_params.get('line_width', 2),
+            self.current_plot_params.get('alpha', 0.7),
+            self.current_plot_params.get('colorbar_scale', '线性')
         )
+
+    def _on_data_loaded(self):
+        """完整数据替换预览数据后，重绘由预览数据绘制的图表"""
+        if not self._plotted_preview or self.data_manager.is_preview():
+            return
+        self._plotted_preview = False
+        if self.current_plot_params and self.data_manager.file_path == self._plotted_file:
+            print("完整数据加载完成，重新绘图")
+            self._replot()
+
+    def _on_rows_appended(self, start):
+        """跟踪文件时追加了新行：散点图和折线图直接追加新点，其他图表重新绘图"""
+        if not self.current_plot_params or self._plotted_key is None:
+            return
+        params = self.current_plot_params
+        x_col, y_col = params.get('x_col'), params.get('y_col')
+        names = self.data_manager.column_names
+        # 与handle_plot_request中的列一致，绘图数据标识才能对应
+        columns = [col for col in (x_col, y_col, params.get('xerr_col'), params.get('yerr_col'))
+                   if col and col in names]
+        data_key = self.data_manager.plot_data_key(columns)
+        appended = False
+        if params.get('plot_type') in ("散点图", "线图") and x_col in columns and y_col in columns:
+            new_data = self.data_manager.get_plot_data(columns, start=start)
+            if new_data is not None:
+                appended = self.visualizer.append_points(
+                    self._plotted_key, data_key,
+                    new_data[x_col].to_numpy(), new_data[y_col].to_numpy())
+        if appended:
+            self._plotted_key = data_key
+        else:
+            print("数据追加了新行，重新绘图")
+            self._replot()
    
     @pyqtSlot()
     def save_plot_settings(self):
@@ -547,14 +614,12 @@ class PlotView(QWidget):
                     progress.show()
                     progress.setValue(10)
                     
-                    # 修改：直接调用open_file，不处理返回值
-                    main_window.open_file(data_file_path)
+                    # 等待后台加载完成后再应用筛选和绘图设置
+                    main_window.open_file(data_file_path, wait=True)
                     progress.setValue(50)
-                    QApplication.processEvents()  # 等待数据加载完成
                     
-                    # 修改：使用empty属性验证数据是否加载成功
-                    data = self.data_manager.get_data()
-                    if data is None or data.empty:
+                    # 验证数据是否加载成功
+                    if not self.data_manager.has_data() or self.data_manager.filtered_count == 0:
                         progress.close()
                         QMessageBox.warning(self, "数据加载失败", "数据加载后为空")
                         return
@@ -569,7 +634,7 @@ class PlotView(QWidget):
                     )
 
             # 2. 应用筛选条件
-            if data_view and self.data_manager.get_data() is not None:
+            if data_view and self.data_manager.has_data():
                 filter_expr = settings.get('filter_expr')
                 if filter_expr:
                     data_view.filter_expr_edit.setPlainText(filter_expr)
@@ -657,7 +722,7 @@ class PlotView(QWidget):
                 self.y_ticks_max.clear()
             
             # 5. 触发绘图
-            if data_view and self.data_manager.get_data() is not None:
+            if data_view and self.data_manager.has_data():
                 data_view.request_plot()
                 QMessageBox.information(self, "成功", "设置已完整加载并应用")
             else:
@@ -723,27 +788,33 @@ class PlotView(QWidget):
             'line_width': line_width
         }
         
-        # 获取数据
-        data = self.data_manager.get_data()
-        if data is None or data.empty:
+        # 懒加载列模式下先载入绘图用到的列
+        success, message = self.data_manager.ensure_columns([x_col, y_col, xerr_col, yerr_col])
+        if not success:
+            QMessageBox.warning(self, "错误", message)
+            return
+
+        # 检查数据（不复制筛选结果）
+        if not self.data_manager.has_data() or self.data_manager.filtered_count == 0:
             QMessageBox.warning(self, "错误", "没有可用的数据")
             return
+        columns = self.data_manager.column_names
             
         # 检查列是否存在
-        if x_col not in data.columns:
+        if x_col not in columns:
             QMessageBox.warning(self, "错误", f"X轴列 '{x_col}' 不存在")
             return
             
-        if y_col not in data.columns and plot_type != "直方图":
+        if y_col not in columns and plot_type != "直方图":
             QMessageBox.warning(self, "错误", f"Y轴列 '{y_col}' 不存在")
             return
             
         # 检查误差棒列
-        if xerr_col and xerr_col not in data.columns:
+        if xerr_col and xerr_col not in columns:
             QMessageBox.warning(self, "错误", f"X误差列 '{xerr_col}' 不存在")
             return
             
-        if yerr_col and yerr_col not in data.columns:
+        if yerr_col and yerr_col not in columns:
             QMessageBox.warning(self, "错误", f"Y误差列 '{yerr_col}' 不存在")
             return
         
@@ -774,11 +845,25 @@ class PlotView(QWidget):
             # 创建绘图工作线程
             from core.plot_worker import PlotWorker
             
+            # 只提取绘图需要的列（只读零拷贝视图）
+            plot_columns = [col for col in (x_col, y_col, xerr_col, yerr_col) if col in columns]
+            plot_data = self.data_manager.get_plot_data(plot_columns)
+
+            # 数据重新加载后旧版本的准备结果不会再命中，释放内存
+            if self._cache_data_version != self.data_manager.data_version:
+                self.plot_cache.clear()
+                self._cache_data_version = self.data_manager.data_version
+
             # 创建工作线程
+            worker_key = self.data_manager.plot_data_key(plot_columns)
             worker = PlotWorker(
-                self.visualizer,
                 plot_type,
-                data,
+                plot_data,
+                stream=self.data_manager if self.data_manager.is_streaming() else None,
+                cache=self.plot_cache,
+                data_key=worker_key,
+                pixel_size=self.visualizer.pixel_size(),
+                render_mode=self.visualizer.render_mode,
                 x_col=x_col,
                 y_col=y_col,
                 xerr_col=xerr_col,
@@ -808,12 +893,13 @@ class PlotView(QWidget):
                 line_width = line_width
             )
             
-            # 连接信号
-            worker.signals.finished.connect(self._on_plot_finished)
-            worker.signals.error.connect(self._on_plot_error)
-            
-            # 启动工作线程
-            self.thread_pool.start(worker)
+            # 记录图表是否由预览数据绘制
+            self._plotted_key = worker_key
+            self._plotted_preview = self.data_manager.is_preview()
+            self._plotted_file = self.data_manager.file_path
+
+            # 提交给调度器：取消正在执行的旧任务，只应用最新的结果
+            self.plot_scheduler.submit(worker)
             
             print(f"绘图请求已提交到工作线程: {plot_type}")
             
@@ -822,6 +908,17 @@ class PlotView(QWidget):
             import traceback
             traceback.print_exc()
     
+    def _on_plot_prepared(self, payload):
+        """工作线程准备好绘图数据后，在GUI线程中绘制"""
+        success, message = self.visualizer.render(payload)
+        self._on_plot_finished(success, message)
+
+    def _on_plot_progress(self, value):
+        """转发最新绘图任务的进度"""
+        main_window = self.window()
+        if hasattr(main_window, 'show_progress'):
+            main_window.show_progress(value)
+
     def _on_plot_finished(self, success, message):
         """绘图完成回调函数"""
         if success:
@@ -930,6 +1027,11 @@ class PlotView(QWidget):
         
         print(f"绘图类型已更改为: {plot_type}")
     
+    def on_render_mode_changed(self, text):
+        """切换散点图的渲染模式"""
+        modes = {"自动": 'auto', "标记": 'marker', "栅格": 'raster'}
+        self.visualizer.render_mode = modes.get(text, 'auto')
+
     def update_marker_styles(self):
         """根据绘图类型更新标记样式选项"""
         current_style = self.mark_style_combo.currentText()
@@ -976,10 +1078,11 @@ class PlotView(QWidget):
             print("PlotView 接收到绘图请求")
             
             # 检查数据是否存在
-            data = self.data_manager.get_data()
-            if data is None or data.empty:
+            if not self.data_manager.has_data() or self.data_manager.filtered_count == 0:
                 QMessageBox.warning(self, "错误", "没有可用的数据")
                 return
+            # 懒加载列模式下包括尚未载入的列，绘图时再载入
+            columns = self.data_manager.get_column_names()
                 
             # 从控件获取当前值
             plot_type = self.plot_type_combo.currentText()
@@ -996,11 +1099,11 @@ class PlotView(QWidget):
                 return
                 
             # 检查列是否存在于数据中
-            if x_col not in data.columns:
+            if x_col not in columns:
                 QMessageBox.warning(self, "错误", f"X轴列 '{x_col}' 不存在于数据中")
                 return
                 
-            if plot_type != "直方图" and y_col not in data.columns:
+            if plot_type != "直方图" and y_col not in columns:
                 QMessageBox.warning(self, "错误", f"Y轴列 '{y_col}' 不存在于数据中")
                 return
                 
@@ -1009,11 +1112,11 @@ class PlotView(QWidget):
             yerr_col = self.yerr_combo.currentText() if self.yerr_combo.currentText() != "无" else None
             
             # 检查误差列是否存在
-            if xerr_col and xerr_col not in data.columns:
+            if xerr_col and xerr_col not in columns:
                 QMessageBox.warning(self, "错误", f"X误差列 '{xerr_col}' 不存在于数据中")
                 return
                 
-            if yerr_col and yerr_col not in data.columns:
+            if yerr_col and yerr_col not in columns:
                 QMessageBox.warning(self, "错误", f"Y误差列 '{yerr_col}' 不存在于数据中")
                 return
                 
@@ -1127,13 +1230,6 @@ class PlotView(QWidget):
             return
             
         try:
-            # 防止重复调用
-            if hasattr(self, '_is_plotting') and self._is_plotting:
-                print("绘图正在进行中，请稍候...")
-                return
-                
-            self._is_plotting = True
-            
             # 从当前请求中获取参数
             plot_type = self.current_request['plot_type']
             x_col = self.current_request['x_col']
@@ -1163,7 +1259,4 @@ class PlotView(QWidget):
             print(f"绘图请求处理失败: {str(e)}")
             import traceback
             traceback.print_exc()
-            QMessageBox.warning(self, "错误", f"绘图请求处理失败: {str(e)}")
-        finally:
-            # 无论成功还是失败，都重置绘图状态
-            self._is_plotting = False
\ No newline at end of file
+            QMessageBox.warning(self, "错误", f"绘图请求处理失败: {str(e)}")
\ No newline at end of file